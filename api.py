@@ -0,0 +1,179 @@
+"""
+Read-only data API for the F1 Telemetry Dashboard
+Laps, fastest-lap telemetry and weather of any session, served from the
+dashboard's shared session cache as Arrow IPC streams (pyarrow) or
+compact JSON
+
+    GET /api/2024/Abu%20Dhabi/R/laps?driver=VER&columns=LapNumber,LapTime
+    GET /api/2024/Abu%20Dhabi/R/telemetry?driver=1&distance=1000:2500&format=arrow
+    GET /api/2024/Abu%20Dhabi/R/weather?columns=Time,TrackTemp,Rainfall
+
+Timedelta columns are sent as float seconds. JSON is pandas' ``split``
+layout: {"columns": [...], "data": [[row], ...]}.
+
+Admin endpoints report this worker's memory. They are off unless
+F1_ADMIN_TOKEN is set, and then need it as an X-Admin-Token header:
+
+    GET  /api/admin/caches?deep=1          # every cache's entries, sizes, hits and ages
+    POST /api/admin/tracemalloc?calls=3    # trace the allocations of the next 3 chart updates
+    GET  /api/admin/tracemalloc            # the traced calls' top allocation sites
+"""
+
+import json
+
+from flask import Blueprint, Response, request
+
+from memory import MAX_ARMED, admin_authorized, arm_trace, memory_report, trace_report
+from sessions import LOAD_TIMEOUT, get_fastest_telemetry, get_session_within
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+# Historical session data never changes once loaded
+CACHE_CONTROL = 'public, max-age=3600'
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+@api.errorhandler(ApiError)
+def _api_error(error):
+    return Response(json.dumps({'error': str(error)}), status=error.status,
+                    mimetype='application/json', headers=error.headers)
+
+
+def _session(year, race, session_type):
+    try:
+        return get_session_within(year, race, session_type)
+    except TimeoutError:
+        raise ApiError(503, f"Session still loading after {LOAD_TIMEOUT:.0f}s - retry shortly", {'Retry-After': '10'})
+    except Exception as e:
+        raise ApiError(404, f"Could not load {year} {race} {session_type}: {e}")
+
+
+def _driver_number(session, driver):
+    """Driver number for a number or abbreviation (404 if not in the session)."""
+    laps = session.laps.pick_driver(driver)
+    if laps.empty:
+        raise ApiError(404, f"No driver {driver!r} in this session")
+    return str(laps['DriverNumber'].iloc[0])
+
+
+def _project(frame):
+    """Apply ?columns=a,b,c, keeping the requested order."""
+    columns = request.args.get('columns')
+    if not columns:
+        return frame
+    columns = [column.strip() for column in columns.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in frame.columns]
+    if unknown:
+        raise ApiError(400, f"Unknown columns {unknown}; available: {list(frame.columns)}")
+    return frame[columns]
+
+
+def _distance_range(telemetry):
+    """Apply ?distance=start:end (metres, either side optional) as a slice of the monotonic Distance channel."""
+    spec = request.args.get('distance')
+    if not spec:
+        return telemetry
+    try:
+        start, end = (float(part) if part else None for part in spec.split(':', 1))
+    except ValueError:
+        raise ApiError(400, f"distance must be start:end in metres, got {spec!r}")
+    distance = telemetry['Distance'].to_numpy()
+    lo = 0 if start is None else int(distance.searchsorted(start, side='left'))
+    hi = len(distance) if end is None else int(distance.searchsorted(end, side='right'))
+    return telemetry.iloc[lo:hi]
+
+
+def _plain(frame):
+    """Plain DataFrame with timedeltas as float seconds - what both encoders can carry."""
+    import pandas as pd  # deferred with the rest of the data stack
+
+    frame = pd.DataFrame(frame)
+    timedeltas = [column for column in frame.columns if pd.api.types.is_timedelta64_dtype(frame[column])]
+    if timedeltas:
+        frame = frame.assign(**{column: frame[column].dt.total_seconds() for column in timedeltas})
+    return frame
+
+
+def _respond(frame):
+    frame = _plain(_project(frame))
+    wants_arrow = request.args.get('format') == 'arrow' or ARROW_MIMETYPE in request.headers.get('Accept', '')
+    if wants_arrow:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ApiError(406, "Arrow output needs pyarrow (see requirements.txt); use format=json")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body, mimetype = sink.getvalue().to_pybytes(), ARROW_MIMETYPE
+    else:
+        body = frame.to_json(orient='split', index=False, date_format='iso', double_precision=6)
+        mimetype = 'application/json'
+    return Response(body, mimetype=mimetype, headers={'Cache-Control': CACHE_CONTROL})
+
+
+@api.route('/<int:year>/<race>/<session_type>/laps')
+def laps(year, race, session_type):
+    session = _session(year, race, session_type)
+    frame = session.laps
+    if request.args.get('driver'):
+        frame = frame.pick_driver(_driver_number(session, request.args['driver']))
+    return _respond(frame)
+
+
+@api.route('/<int:year>/<race>/<session_type>/telemetry')
+def telemetry(year, race, session_type):
+    session = _session(year, race, session_type)
+    if not request.args.get('driver'):
+        raise ApiError(400, "telemetry needs ?driver=<number or abbreviation>")
+    frame = get_fastest_telemetry(session, _driver_number(session, request.args['driver']))
+    if frame is None:
+        raise ApiError(404, "Driver has no timed lap in this session")
+    return _respond(_distance_range(frame))
+
+
+@api.route('/<int:year>/<race>/<session_type>/weather')
+def weather(year, race, session_type):
+    session = _session(year, race, session_type)
+    if session.weather_data is None or session.weather_data.empty:
+        raise ApiError(404, "No weather data for this session")
+    return _respond(session.weather_data)
+
+
+def _admin():
+    # Disabled endpoints look like missing ones
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        raise ApiError(404, "Not found")
+
+
+def _admin_json(data):
+    # Live worker state: never cache
+    return Response(json.dumps(data), mimetype='application/json', headers={'Cache-Control': 'no-store'})
+
+
+@api.route('/admin/caches')
+def admin_caches():
+    _admin()
+    return _admin_json(memory_report(deep=request.args.get('deep') == '1'))
+
+
+@api.route('/admin/tracemalloc', methods=['GET', 'POST'])
+def admin_tracemalloc():
+    _admin()
+    if request.method == 'POST':
+        try:
+            calls = int(request.args.get('calls', '1'))
+        except ValueError:
+            raise ApiError(400, "calls must be an integer")
+        if not 1 <= calls <= MAX_ARMED:
+            raise ApiError(400, f"calls must be between 1 and {MAX_ARMED}")
+        arm_trace(calls)
+    return _admin_json(trace_report())
@@ -0,0 +1,153 @@
+"""
+Headless batch reports for the F1 Telemetry Dashboard
+Lap-time, telemetry, track-map and table reports for every session and
+driver pair of an event, built with the shared figure builders
+
+    python batch_report.py 2024 "Abu Dhabi" --sessions R Q --top 6 --formats html json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.io as pio
+
+import figures
+from sessions import fastest_arrays, get_lap_index, get_session
+
+FIGURE_REPORTS = ['lap_times', 'telemetry', 'track_map']
+FORMATS = ['png', 'html', 'json']
+DEFAULT_SESSIONS = ['FP1', 'FP2', 'FP3', 'Q', 'R']
+
+
+def session_info(session, year, race, session_type):
+    drivers = []
+    for drv in session.drivers:
+        driver = session.get_driver(drv)
+        drivers.append({
+            'number': drv,
+            'name': driver['FullName'],
+            'team': driver['TeamName'],
+            'abbreviation': driver['Abbreviation']
+        })
+    return {'year': year, 'race': race, 'session_type': session_type, 'drivers': drivers}
+
+
+def _slug(text):
+    return ''.join(ch if ch.isalnum() else '_' for ch in str(text)).strip('_')
+
+
+def _write_figure(fig, path, formats):
+    written = 0
+    for fmt in formats:
+        if fmt == 'html':
+            pio.write_html(fig, f'{path}.html', include_plotlyjs='cdn')
+        elif fmt == 'json':
+            with open(f'{path}.json', 'w') as f:
+                f.write(pio.to_json(fig, validate=False))
+        elif fmt == 'png':
+            # Static export needs the optional kaleido package
+            try:
+                pio.write_image(fig, f'{path}.png', scale=2)
+            except (ImportError, ValueError, RuntimeError):
+                continue
+        written += 1
+    return written
+
+
+def render_pair(year, race, session_type, pair, session_data, out_dir, formats):
+    """Write every report for one driver pair; runs inside a worker process."""
+    session = get_session(year, race, session_type)
+    drivers = figures.driver_styles(list(pair), session_data['drivers'])
+    lap_index = get_lap_index(session)
+    telemetry = fastest_arrays(session, list(pair))
+    pair_dir = os.path.join(out_dir, _slug(session_type), '_vs_'.join(d['name'] for d in drivers))
+    os.makedirs(pair_dir, exist_ok=True)
+
+    builders = {
+        'lap_times': lambda: figures.lap_times_figure(lap_index, drivers),
+        'telemetry': lambda: figures.telemetry_figure(telemetry, drivers),
+        'track_map': lambda: figures.track_figure(telemetry, drivers),
+    }
+    files = 0
+    for report in FIGURE_REPORTS:
+        files += _write_figure(builders[report](), os.path.join(pair_dir, report), formats)
+
+    all_laps, _ = figures.all_laps_by_driver(lap_index, drivers)
+    table = {
+        'fastest_laps': figures.fastest_laps_rows(lap_index, drivers),
+        'all_laps': {all_laps[drv]['name']: all_laps[drv]['laps'] for drv in all_laps},
+    }
+    with open(os.path.join(pair_dir, 'table.json'), 'w') as f:
+        json.dump(table, f)
+    return files + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate reports for every session and driver pair of an event')
+    parser.add_argument('year', type=int)
+    parser.add_argument('race')
+    parser.add_argument('--sessions', nargs='+', default=DEFAULT_SESSIONS)
+    parser.add_argument('--top', type=int, help='only pair the first N drivers of each session')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['html', 'json'])
+    parser.add_argument('--out', default='reports')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    out_dir = os.path.join(args.out, f'{args.year}_{_slug(args.race)}')
+    start = time.perf_counter()
+
+    # Load sessions up front: with the fork start method the workers inherit the
+    # warm session cache copy-on-write instead of each loading it again
+    print(f"\n🏎️  Loading {args.year} {args.race}: {', '.join(args.sessions)}")
+    tasks = []
+    for session_type in args.sessions:
+        try:
+            session = get_session(args.year, args.race, session_type)
+        except Exception as e:
+            print(f"  ✗ {session_type}: {e}")
+            continue
+        session_data = session_info(session, args.year, args.race, session_type)
+        drivers = [d['number'] for d in session_data['drivers']][:args.top]
+        pairs = list(itertools.combinations(drivers, 2))
+        print(f"  ✓ {session_type}: {len(drivers)} drivers, {len(pairs)} pairs")
+        tasks += [(args.year, args.race, session_type, pair, session_data, out_dir, args.formats) for pair in pairs]
+    load_time = time.perf_counter() - start
+
+    if not tasks:
+        print("Nothing to render")
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    files = 0
+    failures = 0
+    render_start = time.perf_counter()
+    print(f"\n📊 Rendering {len(tasks)} pair reports on {args.workers} workers -> {out_dir}")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        futures = {executor.submit(render_pair, *task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            task = futures[future]
+            try:
+                files += future.result()
+            except Exception as e:
+                failures += 1
+                print(f"  ✗ {task[2]} {task[3]}: {e}")
+            if done % 10 == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - render_start
+                print(f"  [{done}/{len(tasks)}] {done / elapsed:.1f} pairs/s")
+
+    render_time = time.perf_counter() - render_start
+    print("\n" + "=" * 60)
+    print(f"✅ {len(tasks) - failures} pairs, {files} files, {failures} failures")
+    print(f"   load {load_time:.1f}s | render {render_time:.1f}s | "
+          f"{len(tasks) / render_time:.1f} pairs/s | {files / render_time:.1f} files/s")
+    print("=" * 60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
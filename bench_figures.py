@@ -0,0 +1,105 @@
+"""
+Figure builder benchmark for the F1 Telemetry Dashboard
+Times each builder in figures.py and reports its serialized payload size
+
+    python bench_figures.py 2024 "Abu Dhabi" R --drivers 1 4 16
+    python bench_figures.py --synthetic
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+import figures
+from gforce import acceleration_channels
+
+
+def synthetic_inputs(n_drivers=3, n_laps=58, samples=700, seed=0):
+    """Lap index and fastest-lap telemetry arrays shaped like a real race session."""
+    rng = np.random.default_rng(seed)
+    numbers = [str(n) for n in range(1, n_drivers + 1)]
+    lap_index = pd.DataFrame({
+        'DriverNumber': np.repeat(numbers, n_laps),
+        'LapNumber': np.tile(np.arange(1, n_laps + 1, dtype='float64'), n_drivers),
+        'LapTime': rng.normal(88.0, 0.6, n_drivers * n_laps),
+    })
+    theta = np.linspace(0, 2 * np.pi, samples, endpoint=False)
+    telemetry = {}
+    for driver in numbers:
+        speed = 200 + 100 * np.sin(3 * theta) + rng.normal(0, 2, samples)
+        telemetry[driver] = {
+            'Distance': np.cumsum(speed / 3.6 * 0.13),
+            'Speed': speed,
+            'Throttle': np.clip(100 * np.sin(3 * theta) + 50, 0, 100),
+            'Brake': np.sin(3 * theta) < -0.7,
+            'nGear': np.clip((speed / 40).astype(int), 1, 8),
+            'X': 3000 * np.cos(theta),
+            'Y': 2000 * np.sin(theta),
+        }
+        telemetry[driver]['AccLong'], telemetry[driver]['AccLat'] = acceleration_channels(
+            telemetry[driver]['Distance'], speed, telemetry[driver]['X'], telemetry[driver]['Y'])
+    drivers = [{'number': n, 'name': f'D{n}', 'color': '#ffffff'} for n in numbers]
+    return lap_index, telemetry, drivers
+
+
+def session_inputs(year, race, session_type, selected):
+    from sessions import fastest_arrays, get_lap_index, get_session
+
+    session = get_session(year, race, session_type)
+    session_drivers = [{'number': drv, 'abbreviation': session.get_driver(drv)['Abbreviation'],
+                        'team': session.get_driver(drv)['TeamName']} for drv in session.drivers]
+    selected = selected or session.drivers[:3]
+    return get_lap_index(session), fastest_arrays(session, selected), figures.driver_styles(selected, session_drivers)
+
+
+def bench(name, build, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        figure = build()
+        times.append((time.perf_counter() - start) * 1000.0)
+    payload = len(json.dumps(figure, cls=PlotlyJSONEncoder))
+    print(f"  {name:<18}{statistics.median(times):8.2f} ms   {payload / 1024:8.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the figure builders')
+    parser.add_argument('year', type=int, nargs='?')
+    parser.add_argument('race', nargs='?')
+    parser.add_argument('session_type', nargs='?', default='R')
+    parser.add_argument('--drivers', nargs='+')
+    parser.add_argument('--synthetic', action='store_true', help='use generated data instead of a FastF1 session')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.synthetic or args.year is None:
+        lap_index, telemetry, drivers = synthetic_inputs()
+        source = 'synthetic session'
+    else:
+        lap_index, telemetry, drivers = session_inputs(args.year, args.race, args.session_type, args.drivers)
+        source = f'{args.year} {args.race} {args.session_type}'
+
+    print("\n" + "=" * 60)
+    print(f"📊 Figure builders - {source}, {len(drivers)} drivers, median of {args.runs}")
+    print("=" * 60)
+    bench('lap_times', lambda: figures.lap_times_figure(lap_index, drivers), args.runs)
+    bench('speed', lambda: figures.speed_figure(telemetry, drivers), args.runs)
+    bench('telemetry', lambda: figures.telemetry_figure(telemetry, drivers), args.runs)
+    bench('track', lambda: figures.track_figure(telemetry, drivers), args.runs)
+    bench('friction_circle', lambda: figures.friction_circle_figure(telemetry, drivers), args.runs)
+    bench('fastest_laps', lambda: figures.fastest_laps_rows(lap_index, drivers), args.runs)
+    bench('all_laps', lambda: figures.all_laps_by_driver(lap_index, drivers), args.runs)
+
+    print(f"\n  {'@timed builder':<26}{'calls':>6}{'mean':>11}{'last':>11}")
+    for name, stats in figures.figure_timings().items():
+        print(f"  {name:<26}{stats['calls']:6d}{stats['mean_ms']:8.2f} ms{stats['last_ms']:8.2f} ms")
+    print()
+
+
+if __name__ == '__main__':
+    main()
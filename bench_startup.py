@@ -0,0 +1,118 @@
+"""
+Startup benchmark for the F1 Telemetry Dashboard
+Reports import time per module and time-to-first-response of a fresh server
+
+    python bench_startup.py            # Dash dev server
+    python bench_startup.py --gunicorn # gunicorn with gunicorn.conf.py
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WATCHED = ['dash', 'plotly', 'fastf1', 'pandas', 'numpy', 'caching', 'figures', 'sessions', 'sectors', 'season_index']
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_times(module='f1_dashboard'):
+    """Import time (ms) per top-level package when importing `module`, and which WATCHED modules it loaded.
+
+    Times are self times summed over every submodule of a package, wherever
+    it sits in the import tree, so a package imported by another is not
+    counted twice; `module` itself gets its cumulative time as the total.
+    """
+    code = f'import sys, {module}; print(" ".join(name for name in {WATCHED!r} if name in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=HERE, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, name = int(match.group(1)), int(match.group(2)), match.group(4)
+        top = name.split('.')[0]
+        times[top] = times.get(top, 0) + own / 1000.0
+        if name == module:
+            times['TOTAL'] = cumulative / 1000.0
+    loaded = set(result.stdout.split())
+    return times, loaded
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read()
+                return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def time_to_first_response(use_gunicorn=False, timeout=60):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port))
+    if use_gunicorn:
+        cmd = [sys.executable, '-m', 'gunicorn', 'f1_dashboard:server', '--config', 'gunicorn.conf.py']
+    else:
+        cmd = [sys.executable, '-c', f'import f1_dashboard; f1_dashboard.app.run(port={port}, debug=False)']
+
+    base = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        timings = {}
+        deadline = start + timeout
+        for label, path in [('index', '/'), ('layout', '/_dash-layout'), ('dependencies', '/_dash-dependencies')]:
+            if not wait_for(base + path, deadline):
+                timings[label] = None
+                break
+            timings[label] = time.perf_counter() - start
+        return timings
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard startup')
+    parser.add_argument('--gunicorn', action='store_true', help='serve with gunicorn instead of the Dash dev server')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("⏱️  Import time per module (import f1_dashboard)")
+    print("=" * 60)
+    times, loaded = import_times()
+    total = times.get('TOTAL')
+    for name in WATCHED:
+        # Deferred = not in sys.modules once the app is imported
+        status = f"{times.get(name, 0.0):8.1f} ms" if name in loaded else "   deferred"
+        print(f"  {name:<14}{status}")
+    if total is not None:
+        print(f"  {'TOTAL':<14}{total:8.1f} ms")
+
+    print("\n" + "=" * 60)
+    print(f"🚀 Time to first response ({'gunicorn' if args.gunicorn else 'dash dev server'}, {args.runs} runs)")
+    print("=" * 60)
+    for run in range(args.runs):
+        timings = time_to_first_response(args.gunicorn)
+        print("  run {}: ".format(run + 1) + ', '.join(
+            f"{label} {value * 1000:.0f} ms" if value is not None else f"{label} timeout" for label, value in timings.items()))
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+In-process caches for the F1 Telemetry Dashboard
+Size-bounded LRU caches with hit/miss/eviction accounting
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Every cache registers itself here so stats can be reported in one place
+CACHES = {}
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and (optionally) bytes."""
+
+    def __init__(self, name, max_entries=128, max_bytes=None, sizeof=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        CACHES[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            entry['last_access'] = time.time()
+            entry['hits'] += 1
+            self.hits += 1
+            return entry['value']
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = self.sizeof(value) if self.sizeof else 0
+        # Never keep something that could not fit on its own
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old['size']
+            self._entries[key] = {'value': value, 'size': size, 'created': now, 'last_access': now, 'hits': 0}
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry['size']
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.total_bytes -= entry['size']
+            return entry['value']
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def entries(self):
+        """Snapshot of the entries (least recently used first): key, value, size, created, last_access, hits."""
+        with self._lock:
+            return [dict(entry, key=key) for key, entry in self._entries.items()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hit_rate, 4),
+            }
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in CACHES.items()}
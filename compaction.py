@@ -0,0 +1,94 @@
+"""
+Memory compaction for loaded FastF1 sessions
+Downcasts telemetry channels, categorizes repeated strings and drops unused channels
+"""
+
+# Channels no dashboard view reads; FastF1 merges fine without them
+# (pos Status stays: overtake detection keeps only OnTrack samples)
+DROP_CAR_CHANNELS = ['RPM']
+DROP_POS_CHANNELS = ['Z']
+
+CAR_DTYPES = {
+    'Speed': 'float32',
+    'Throttle': 'float32',
+    'nGear': 'uint8',
+    'DRS': 'uint8',
+    'Brake': 'bool',
+}
+POS_DTYPES = {
+    'X': 'float32',
+    'Y': 'float32',
+    'Status': 'category',
+}
+LAP_CATEGORIES = ['Driver', 'DriverNumber', 'Team', 'Compound', 'TrackStatus']
+WEATHER_DTYPES = {
+    'AirTemp': 'float32',
+    'Humidity': 'float32',
+    'Pressure': 'float32',
+    'TrackTemp': 'float32',
+    'WindDirection': 'float32',
+    'WindSpeed': 'float32',
+    'Rainfall': 'bool',
+}
+
+
+def frame_bytes(df):
+    return 0 if df is None else int(df.memory_usage(deep=True).sum())
+
+
+def session_bytes(session):
+    """Deep memory footprint of a loaded session's data frames, by component."""
+    sizes = {
+        'laps': frame_bytes(getattr(session, '_laps', None)),
+        'weather': frame_bytes(getattr(session, '_weather_data', None)),
+        'car_data': sum(frame_bytes(df) for df in (getattr(session, '_car_data', None) or {}).values()),
+        'pos_data': sum(frame_bytes(df) for df in (getattr(session, '_pos_data', None) or {}).values()),
+    }
+    sizes['total'] = sum(sizes.values())
+    return sizes
+
+
+def _compact_frame(df, dtypes, drop=()):
+    df = df.drop(columns=[col for col in drop if col in df.columns])
+    casts = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype in ('uint8', 'bool'):
+            # Integer/bool channels must not carry NaN into the cast
+            if df[col].isna().any():
+                continue
+        casts[col] = dtype
+    return df.astype(casts) if casts else df
+
+
+def compact_session(session):
+    """Shrink a loaded session in place and return its memory before/after (bytes)."""
+    before = session_bytes(session)
+
+    # Telemetry: Telemetry.astype/drop keep the FastF1 metadata (session, driver)
+    car_data = getattr(session, '_car_data', None)
+    if car_data:
+        for drv in list(car_data):
+            car_data[drv] = _compact_frame(car_data[drv], CAR_DTYPES, DROP_CAR_CHANNELS)
+    pos_data = getattr(session, '_pos_data', None)
+    if pos_data:
+        for drv in list(pos_data):
+            pos_data[drv] = _compact_frame(pos_data[drv], POS_DTYPES, DROP_POS_CHANNELS)
+
+    laps = getattr(session, '_laps', None)
+    if laps is not None:
+        session._laps = laps.astype({col: 'category' for col in LAP_CATEGORIES if col in laps.columns})
+
+    weather = getattr(session, '_weather_data', None)
+    if weather is not None:
+        session._weather_data = _compact_frame(weather, WEATHER_DTYPES)
+
+    after = session_bytes(session)
+    return {'before': before, 'after': after}
+
+
+def format_report(key, report):
+    before, after = report['before']['total'], report['after']['total']
+    saved = 100.0 * (1 - after / before) if before else 0.0
+    return f"🗜️  {key}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({saved:.0f}% saved)"
@@ -0,0 +1,128 @@
+"""
+Corner-level analytics for the F1 Telemetry Dashboard
+Each circuit's corners are indexed once into distance windows; every
+driver's fastest lap is then measured against them in one vectorized pass
+"""
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache
+from sessions import get_fastest_telemetry, per_session_cache, session_id
+
+# A corner's window reaches at most this far either side of its apex marker,
+# and never past the midpoint to the neighbouring corner
+CORNER_WINDOW_M = 250.0
+# Throttle (%) that counts as picking the throttle back up after the apex
+THROTTLE_PICKUP = 95.0
+
+METRIC_COLUMNS = ['EntrySpeed', 'ApexSpeed', 'ExitSpeed', 'BrakeDistance', 'ThrottleDistance']
+
+# One index per circuit and season - shared by all sessions of an event
+corner_index_cache = LRUCache('corner_index', max_entries=32)
+
+
+def build_corner_index(corners):
+    """Distance windows of a circuit's corners from FastF1 circuit info.
+
+    Returns a DataFrame in track order with ``Corner`` (label, e.g. ``9A``),
+    ``Distance`` (apex marker, m from the line), ``Start``/``End`` (window
+    bounds, m), ``X`` and ``Y``.
+    """
+    corners = corners.sort_values('Distance').reset_index(drop=True)
+    distance = corners['Distance'].to_numpy(dtype=np.float64)
+    midpoints = (distance[1:] + distance[:-1]) / 2
+    start = np.maximum(distance - CORNER_WINDOW_M, np.concatenate([[0.0], midpoints]))
+    end = np.minimum(distance + CORNER_WINDOW_M, np.concatenate([midpoints, [np.inf]]))
+    letters = corners['Letter'].fillna('').astype(str) if 'Letter' in corners.columns else ''
+    return pd.DataFrame({
+        'Corner': corners['Number'].astype(int).astype(str) + letters,
+        'Distance': distance,
+        'Start': start,
+        'End': end,
+        'X': corners['X'].to_numpy(dtype=np.float64),
+        'Y': corners['Y'].to_numpy(dtype=np.float64),
+    })
+
+
+def get_corner_index(session):
+    key = session_id(session)[:2]
+    index = corner_index_cache.get(key)
+    if index is None:
+        index = build_corner_index(session.get_circuit_info().corners)
+        corner_index_cache.put(key, index)
+    return index
+
+
+def _first_per_window(mask, window, n_windows):
+    """Index of the first True sample of each window (-1 where there is none)."""
+    first = np.full(n_windows, -1, dtype=np.int64)
+    samples = np.flatnonzero(mask)
+    windows, idx = np.unique(window[samples], return_index=True)
+    first[windows] = samples[idx]
+    return first
+
+
+def corner_metrics(index, distance, speed, throttle, brake):
+    """Entry, apex and exit speed, braking point and throttle pickup at every corner.
+
+    Telemetry arrays are one lap ordered by distance. Brake and throttle
+    distances are metres before / after the corner's apex marker; NaN where
+    the driver never braked or never got back to full throttle in the window.
+    """
+    n = len(index)
+    start, end = index['Start'].to_numpy(), index['End'].to_numpy()
+
+    # Window of every sample (-1 outside all windows)
+    window = np.searchsorted(start, distance, side='right') - 1
+    window[(window >= 0) & (distance >= end[np.clip(window, 0, None)])] = -1
+    inside = window >= 0
+
+    # Apex: slowest sample of each window
+    order = np.flatnonzero(inside)
+    order = order[np.lexsort((speed[order], window[order]))]
+    windows, first = np.unique(window[order], return_index=True)
+    apex = np.full(n, -1, dtype=np.int64)
+    apex[windows] = order[first]
+    has_apex = apex >= 0
+    apex_distance = np.where(has_apex, distance[apex], np.nan)
+    after_apex = inside & (distance >= np.where(has_apex, apex_distance, np.inf)[np.clip(window, 0, None)])
+
+    braking = _first_per_window(inside & brake.astype(bool) & ~after_apex, window, n)
+    pickup = _first_per_window(after_apex & (throttle >= THROTTLE_PICKUP), window, n)
+
+    covered = has_apex & (start >= distance[0]) & (end <= distance[-1])
+    nan = np.float64(np.nan)
+    return pd.DataFrame({
+        'Corner': index['Corner'].to_numpy(),
+        'EntrySpeed': np.where(covered, np.interp(start, distance, speed), nan),
+        'ApexSpeed': np.where(has_apex, speed[apex], nan),
+        'ApexDistance': apex_distance,
+        'ExitSpeed': np.where(covered, np.interp(np.minimum(end, distance[-1]), distance, speed), nan),
+        'BrakeDistance': np.where(braking >= 0, index['Distance'].to_numpy() - distance[braking], nan),
+        'ThrottleDistance': np.where(pickup >= 0, distance[pickup] - index['Distance'].to_numpy(), nan),
+    })
+
+
+@per_session_cache('corner_metrics', max_entries=64)
+def get_corner_metrics(session, driver):
+    telemetry = get_fastest_telemetry(session, driver)
+    if telemetry is None:
+        return None
+    return corner_metrics(
+        get_corner_index(session),
+        telemetry['Distance'].to_numpy(dtype=np.float64),
+        telemetry['Speed'].to_numpy(dtype=np.float64),
+        telemetry['Throttle'].to_numpy(dtype=np.float64),
+        telemetry['Brake'].to_numpy(),
+    )
+
+
+def corner_comparison(session, drivers):
+    """Corner metrics of several drivers, keyed by driver number (drivers without a lap are skipped)."""
+    metrics = {}
+    for driver in drivers:
+        result = get_corner_metrics(session, driver)
+        if result is not None:
+            metrics[driver] = result
+    return metrics
@@ -0,0 +1,195 @@
+"""
+Disk cache management for the FastF1 cache directory
+Quota/age-based LRU eviction by session, inventory, and snapshot/restore
+
+    python disk_cache.py inventory
+    python disk_cache.py prune --quota-mb 2048 --max-age-days 30
+    python disk_cache.py snapshot hot_sessions.tar.gz --top 10
+    python disk_cache.py restore hot_sessions.tar.gz
+"""
+
+import argparse
+import os
+import shutil
+import tarfile
+import time
+
+CACHE_DIR = os.environ.get('FASTF1_CACHE_DIR', '/tmp/fastf1_cache')
+QUOTA_MB = int(os.environ.get('F1_CACHE_QUOTA_MB', '2048'))
+MAX_AGE_DAYS = float(os.environ.get('F1_CACHE_MAX_AGE_DAYS', '0')) or None
+SNAPSHOT_PATH = os.environ.get('F1_CACHE_SNAPSHOT')
+# Serve only what is cached (e.g. a restored snapshot) - no network requests
+OFFLINE = os.environ.get('F1_OFFLINE', '0') == '1'
+
+HTTP_CACHE_FILE = 'fastf1_http_cache.sqlite'
+USED_MARKER = '.last_used'
+
+
+def _dir_size(path):
+    total, files = 0, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                pass
+    return total, files
+
+
+def session_path(session, cache_dir=CACHE_DIR):
+    # FastF1 stores each session's parsed data under its API path minus '/static/'
+    return os.path.join(cache_dir, *session.api_path[len('/static/'):].strip('/').split('/'))
+
+
+def mark_used(session, cache_dir=CACHE_DIR):
+    """Record a session as recently used so eviction keeps it."""
+    path = session_path(session, cache_dir)
+    if os.path.isdir(path):
+        with open(os.path.join(path, USED_MARKER), 'a'):
+            os.utime(os.path.join(path, USED_MARKER))
+
+
+def inventory(cache_dir=CACHE_DIR):
+    """One entry per cached session directory, least recently used first."""
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for year in sorted(os.listdir(cache_dir)):
+        year_path = os.path.join(cache_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_path)):
+            continue
+        for event in sorted(os.listdir(year_path)):
+            event_path = os.path.join(year_path, event)
+            if not os.path.isdir(event_path):
+                continue
+            for session in sorted(os.listdir(event_path)):
+                path = os.path.join(event_path, session)
+                if not os.path.isdir(path):
+                    continue
+                size, files = _dir_size(path)
+                marker = os.path.join(path, USED_MARKER)
+                last_used = os.path.getmtime(marker if os.path.exists(marker) else path)
+                entries.append({
+                    'path': path,
+                    'year': int(year),
+                    'event': event,
+                    'session': session,
+                    'bytes': size,
+                    'files': files,
+                    'last_used': last_used,
+                })
+    entries.sort(key=lambda entry: entry['last_used'])
+    return entries
+
+
+def cache_usage(cache_dir=CACHE_DIR):
+    entries = inventory(cache_dir)
+    http_cache = os.path.join(cache_dir, HTTP_CACHE_FILE)
+    http_bytes = os.path.getsize(http_cache) if os.path.exists(http_cache) else 0
+    return entries, sum(entry['bytes'] for entry in entries) + http_bytes, http_bytes
+
+
+def enforce_quota(cache_dir=CACHE_DIR, quota_mb=QUOTA_MB, max_age_days=MAX_AGE_DAYS, protect=()):
+    """Evict whole sessions (oldest use first) until the cache fits the quota and age limit."""
+    entries, total, _ = cache_usage(cache_dir)
+    quota = quota_mb * 1024 * 1024 if quota_mb else None
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    protect = {os.path.abspath(path) for path in protect}
+    removed = []
+    for entry in entries:
+        too_big = quota is not None and total > quota
+        too_old = cutoff is not None and entry['last_used'] < cutoff
+        if not (too_big or too_old):
+            continue
+        if os.path.abspath(entry['path']) in protect:
+            continue
+        shutil.rmtree(entry['path'], ignore_errors=True)
+        total -= entry['bytes']
+        removed.append(entry)
+    return removed
+
+
+def snapshot(archive_path, cache_dir=CACHE_DIR, top=None, include_http_cache=True):
+    """Bundle the most recently used sessions into one archive for fast rehydration."""
+    entries = list(reversed(inventory(cache_dir)))
+    if top:
+        entries = entries[:top]
+    mode = 'w:gz' if archive_path.endswith('.gz') else 'w'
+    with tarfile.open(archive_path, mode) as archive:
+        if include_http_cache and os.path.exists(os.path.join(cache_dir, HTTP_CACHE_FILE)):
+            archive.add(os.path.join(cache_dir, HTTP_CACHE_FILE), arcname=HTTP_CACHE_FILE)
+        for entry in entries:
+            archive.add(entry['path'], arcname=os.path.relpath(entry['path'], cache_dir))
+    return entries
+
+
+def restore(archive_path, cache_dir=CACHE_DIR):
+    """Unpack a snapshot into the cache directory; existing files are overwritten."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with tarfile.open(archive_path) as archive:
+        if hasattr(tarfile, 'data_filter'):
+            archive.extractall(cache_dir, filter='data')
+        else:
+            archive.extractall(cache_dir)
+    now = time.time()
+    # Restored sessions count as freshly used
+    for entry in inventory(cache_dir):
+        marker = os.path.join(entry['path'], USED_MARKER)
+        with open(marker, 'a'):
+            os.utime(marker, (now, now))
+
+
+def rehydrate(cache_dir=CACHE_DIR, archive_path=SNAPSHOT_PATH):
+    """Restore the boot snapshot into an empty cache directory (e.g. after a redeploy)."""
+    if not archive_path or not os.path.exists(archive_path):
+        return False
+    if inventory(cache_dir):
+        return False
+    restore(archive_path, cache_dir)
+    return True
+
+
+def _fmt_bytes(size):
+    return f"{size / 1e6:8.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the FastF1 disk cache')
+    parser.add_argument('--cache', default=CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('inventory', help='list cached sessions, least recently used first')
+    prune = commands.add_parser('prune', help='evict sessions over the quota or age limit')
+    prune.add_argument('--quota-mb', type=int, default=QUOTA_MB)
+    prune.add_argument('--max-age-days', type=float, default=MAX_AGE_DAYS)
+    snap = commands.add_parser('snapshot', help='bundle hot sessions into one archive')
+    snap.add_argument('archive')
+    snap.add_argument('--top', type=int, help='only the N most recently used sessions')
+    rest = commands.add_parser('restore', help='unpack a snapshot into the cache')
+    rest.add_argument('archive')
+    args = parser.parse_args()
+
+    if args.command == 'inventory':
+        entries, total, http_bytes = cache_usage(args.cache)
+        print(f"\n📦 {args.cache}")
+        for entry in entries:
+            used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))
+            print(f"  {_fmt_bytes(entry['bytes'])}  {used}  {entry['year']}/{entry['event']}/{entry['session']}")
+        print(f"  {_fmt_bytes(http_bytes)}  (http cache)")
+        print(f"  {_fmt_bytes(total)}  total in {len(entries)} sessions (quota {QUOTA_MB} MB)\n")
+    elif args.command == 'prune':
+        removed = enforce_quota(args.cache, args.quota_mb, args.max_age_days)
+        for entry in removed:
+            print(f"  🗑️  {_fmt_bytes(entry['bytes'])}  {entry['year']}/{entry['event']}/{entry['session']}")
+        print(f"Evicted {len(removed)} sessions, freed {sum(e['bytes'] for e in removed) / 1e6:.1f} MB")
+    elif args.command == 'snapshot':
+        entries = snapshot(args.archive, args.cache, args.top)
+        print(f"Snapshot of {len(entries)} sessions -> {args.archive} ({os.path.getsize(args.archive) / 1e6:.1f} MB)")
+    elif args.command == 'restore':
+        start = time.perf_counter()
+        restore(args.archive, args.cache)
+        print(f"Restored {args.archive} -> {args.cache} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,121 +3,215 @@ F1 Telemetry Dashboard - 2025 Season
 Built with Dash/Plotly and FastF1
 """
 
+import functools
+import json
+import math
+import os
+
 import dash
-from dash import dcc, html, Input, Output, State
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import fastf1
-import pandas as pd
+from dash import ALL, Patch, dcc, html, Input, Output, State
+from plotly.utils import PlotlyJSONEncoder
+
+import figures
+from api import api
+from caching import LRUCache
+from figures import COLORS, TEAM_COLORS, YEAR_COLORS, driver_styles, format_laptime
+from memory import ADMIN_TOKEN, admin_authorized, arm_trace, memory_report, trace_allocations
+from sessions import (LOAD_TIMEOUT, fastest_arrays, fastf1_api, get_event_schedule, get_lap_index, get_session,
+                      get_session_within, load_status, prefetch, resolve_session_key, session_id)
 
-# Enable FastF1 cache
-fastf1.Cache.enable_cache('/tmp/fastf1_cache')
+# FastF1, pandas/NumPy and the analytics modules are imported on first use
+# (see preload() for the gunicorn master), keeping worker boot fast
 
 # Initialize Dash app
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 app.title = "F1 Telemetry Dashboard"
 
-# Color scheme - Monochrome base
-COLORS = {
-    'background': '#0a0a0a',
-    'card_bg': '#1a1a1a',
-    'primary': '#ffffff',
-    'accent': '#2a2a2a',
-    'text_primary': '#ffffff',
-    'text_secondary': '#888888',
-    'border': '#333333',
+# Views of a loaded session, selectable under the driver dropdown
+VIEW_LABELS = {
+    'overview': 'Overview',
+    'sectors': 'Sectors & Speed Traps',
+    'corners': 'Corners',
+    'pace': 'Race Pace',
+    'stints': 'Stint Overlay',
+    'heatmap': 'Speed Heatmap',
+    'maps': 'Gear & DRS',
+    'weather': 'Weather',
+    'qualifying': 'Qualifying',
+    'overtakes': 'Overtakes',
+    'strategy': 'Strategy',
 }
+# Admin view of the worker's memory, only offered with F1_ADMIN_TOKEN set
+if ADMIN_TOKEN:
+    VIEW_LABELS['memory'] = 'Memory & Caches'
 
-# F1 Team Colors (2024-2025 season)
-TEAM_COLORS = {
-    'Red Bull Racing': '#3671C6',
-    'Ferrari': '#E8002D',
-    'Mercedes': '#27F4D2',
-    'McLaren': '#FF8000',
-    'Aston Martin': '#229971',
-    'Alpine': '#FF87BC',
-    'Williams': '#64C4FF',
-    'RB': '#6692FF',
-    'Kick Sauber': '#52E252',
-    'Haas F1 Team': '#B6BABD',
-}
+TAB_STYLE = {'backgroundColor': '#1a1a1a', 'color': '#888888', 'border': '1px solid #333', 'padding': '6px', 'fontSize': '11px'}
+TAB_SELECTED_STYLE = {'backgroundColor': '#2a2a2a', 'color': '#ffffff', 'border': '1px solid #333', 'borderTop': '2px solid #ffffff', 'padding': '6px', 'fontSize': '11px'}
 
-# Dashboard Layout
-app.layout = html.Div(style={'backgroundColor': COLORS['background'], 'minHeight': '100vh', 'padding': '10px'}, children=[
-
-    # Header
-    html.Div(className='card', style={'padding': '15px', 'marginBottom': '12px', 'borderBottom': '1px solid #333'}, children=[
-        html.H1('🏎️ F1 Telemetry Dashboard', style={'color': COLORS['text_primary'], 'marginBottom': '4px', 'fontWeight': '300', 'letterSpacing': '1px', 'fontSize': '18px'}),
-        html.P('Formula 1 telemetry data analysis - Season 2021-2025', style={'color': COLORS['text_secondary'], 'fontSize': '11px'})
-    ]),
-
-    # Session Selector
-    html.Div(className='card', style={'padding': '15px', 'paddingBottom': '20px', 'overflow': 'visible'}, children=[
-        html.H3('📊 Session Selector', style={'color': COLORS['text_primary'], 'marginBottom': '12px', 'fontSize': '14px'}),
-        html.Div(style={'display': 'grid', 'gridTemplateColumns': '1fr 1fr 1fr', 'gap': '10px', 'marginBottom': '12px'}, children=[
-            html.Div([
-                html.Label('Year', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
-                dcc.Dropdown(
-                    id='year-dropdown',
-                    options=[{'label': str(year), 'value': year} for year in range(2025, 2021, -1)],
-                    value=2025,
-                    clearable=False,
-                    optionHeight=35
-                )
+# Rendered output cache - identical comparisons (e.g. the default top two
+# drivers) are served straight from memory after the first request
+render_cache = LRUCache('rendered_output', max_entries=256, max_bytes=64 * 1024 * 1024)
+
+# Individual figure dicts, shared across views and driver orderings
+figure_cache = LRUCache('figures', max_entries=512)
+
+
+def order_drivers(selected_drivers, session_data):
+    order = {d['number']: idx for idx, d in enumerate(session_data['drivers'])}
+    return sorted(dict.fromkeys(selected_drivers), key=lambda drv: (order.get(drv, len(order)), str(drv)))
+
+
+# Views draw only the first picks up to these caps
+DRIVER_CAPS = (figures.MAX_TELEMETRY_DRIVERS, figures.MAX_LAP_DRIVERS)
+
+
+def render_key(session_data, selected_drivers, view):
+    """Which drivers a view shows - the selection and its first picks under each cap - regardless of pick order."""
+    shown = tuple(tuple(order_drivers(selected_drivers[:cap], session_data)) for cap in (None,) + DRIVER_CAPS)
+    return (session_data['year'], session_data['race'], session_data['session_type'], shown, view)
+
+
+def serialized(result):
+    return json.dumps(result, cls=PlotlyJSONEncoder)
+
+
+def serialized_size(result):
+    return len(serialized(result))
+
+
+def overview_id(kind, name):
+    # Pattern-matching ids, so update_charts can patch the overview in place
+    return {'type': f'overview-{kind}', 'name': name}
+
+
+# Dashboard Layout - built on the first page request, then reused
+@functools.lru_cache(maxsize=None)
+def serve_layout():
+    return html.Div(style={'backgroundColor': COLORS['background'], 'minHeight': '100vh', 'padding': '10px'}, children=[
+
+        # Header
+        html.Div(className='card', style={'padding': '15px', 'marginBottom': '12px', 'borderBottom': '1px solid #333'}, children=[
+            html.H1('🏎️ F1 Telemetry Dashboard', style={'color': COLORS['text_primary'], 'marginBottom': '4px', 'fontWeight': '300', 'letterSpacing': '1px', 'fontSize': '18px'}),
+            html.P('Formula 1 telemetry data analysis - Season 2021-2025', style={'color': COLORS['text_secondary'], 'fontSize': '11px'})
+        ]),
+
+        # Session Selector
+        html.Div(className='card', style={'padding': '15px', 'paddingBottom': '20px', 'overflow': 'visible'}, children=[
+            html.H3('📊 Session Selector', style={'color': COLORS['text_primary'], 'marginBottom': '12px', 'fontSize': '14px'}),
+            html.Div(style={'display': 'grid', 'gridTemplateColumns': '1fr 1fr 1fr', 'gap': '10px', 'marginBottom': '12px'}, children=[
+                html.Div([
+                    html.Label('Year', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id='year-dropdown',
+                        options=[{'label': str(year), 'value': year} for year in range(2025, 2021, -1)],
+                        value=2025,
+                        clearable=False,
+                        optionHeight=35
+                    )
+                ]),
+                html.Div([
+                    html.Label('Grand Prix', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id='race-dropdown',
+                        value='Abu Dhabi',
+                        clearable=False,
+                        optionHeight=35
+                    )
+                ]),
+                html.Div([
+                    html.Label('Session', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
+                    dcc.Dropdown(
+                        id='session-dropdown',
+                        options=[
+                            {'label': '🏁 Race', 'value': 'R'},
+                            {'label': '🔥 Qualifying', 'value': 'Q'},
+                            {'label': '🔧 Practice 1', 'value': 'FP1'},
+                            {'label': '🔧 Practice 2', 'value': 'FP2'},
+                            {'label': '🔧 Practice 3', 'value': 'FP3'},
+                        ],
+                        value='R',
+                        clearable=False,
+                        optionHeight=35
+                    )
+                ]),
             ]),
-            html.Div([
-                html.Label('Grand Prix', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
-                dcc.Dropdown(
-                    id='race-dropdown',
-                    value='Abu Dhabi',
-                    clearable=False,
-                    optionHeight=35
-                )
+            html.Button('Load Session Data', id='load-button', n_clicks=0, style={
+                'background': '#ffffff',
+                'border': '1px solid #333',
+                'color': '#000',
+                'padding': '6px 16px',
+                'borderRadius': '4px',
+                'fontSize': '12px',
+                'fontWeight': '600',
+                'cursor': 'pointer',
+                'width': '100%',
+                'transition': 'all 0.2s'
+            })
+        ]),
+
+        # Loading indicator
+        dcc.Loading(id="loading", type="default", color=COLORS['primary'], children=[
+
+            html.Div(id='session-info'),
+            html.Div(id='driver-selector-container'),
+
+            # Charts container
+            html.Div(id='charts-container')
+        ]),
+
+        # Cross-year comparison - sessions load concurrently and stream into the figure
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('📆 Cross-Year Comparison', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '12px'}),
+            html.P('Compare one driver at the selected Grand Prix and session across seasons.', style={'color': COLORS['text_secondary'], 'fontSize': '10px', 'marginBottom': '8px'}),
+            html.Div(style={'display': 'grid', 'gridTemplateColumns': '1fr 2fr 1fr', 'gap': '10px', 'alignItems': 'center'}, children=[
+                dcc.Input(id='compare-driver', type='text', value='VER', placeholder='Driver (e.g. VER)', debounce=True,
+                          style={'background': COLORS['card_bg'], 'color': COLORS['text_primary'], 'border': '1px solid #333', 'padding': '6px', 'fontSize': '11px'}),
+                dcc.Checklist(id='compare-years', options=[{'label': f' {year}', 'value': year} for year in range(2025, 2021, -1)],
+                              value=[2025, 2024, 2023, 2022], inline=True,
+                              style={'color': COLORS['text_secondary'], 'fontSize': '11px'}, inputStyle={'marginLeft': '10px'}),
+                html.Button('Compare Seasons', id='compare-button', n_clicks=0, style={
+                    'background': '#ffffff',
+                    'border': '1px solid #333',
+                    'color': '#000',
+                    'padding': '6px 16px',
+                    'borderRadius': '4px',
+                    'fontSize': '12px',
+                    'fontWeight': '600',
+                    'cursor': 'pointer'
+                }),
             ]),
-            html.Div([
-                html.Label('Session', style={'color': COLORS['text_secondary'], 'display': 'block', 'marginBottom': '6px', 'fontSize': '11px', 'fontWeight': '500'}),
-                dcc.Dropdown(
-                    id='session-dropdown',
-                    options=[
-                        {'label': '🏁 Race', 'value': 'R'},
-                        {'label': '🔥 Qualifying', 'value': 'Q'},
-                        {'label': '🔧 Practice 1', 'value': 'FP1'},
-                        {'label': '🔧 Practice 2', 'value': 'FP2'},
-                        {'label': '🔧 Practice 3', 'value': 'FP3'},
-                    ],
-                    value='R',
-                    clearable=False,
-                    optionHeight=35
-                )
+            html.Div(id='compare-container'),
+            dcc.Interval(id='compare-interval', interval=1000, disabled=True),
+        ]),
+
+        # Season overview - answered from the season index, no session loads
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🗓️ Season Overview', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '12px'}),
+            html.Div(style={'display': 'grid', 'gridTemplateColumns': '1fr 1fr', 'gap': '10px', 'alignItems': 'center'}, children=[
+                dcc.RadioItems(id='season-session', options=[{'label': ' Race', 'value': 'R'}, {'label': ' Qualifying', 'value': 'Q'}],
+                               value='R', inline=True, style={'color': COLORS['text_secondary'], 'fontSize': '11px'}, inputStyle={'marginLeft': '10px'}),
+                html.Button('Show Season', id='season-button', n_clicks=0, style={
+                    'background': '#ffffff',
+                    'border': '1px solid #333',
+                    'color': '#000',
+                    'padding': '6px 16px',
+                    'borderRadius': '4px',
+                    'fontSize': '12px',
+                    'fontWeight': '600',
+                    'cursor': 'pointer'
+                }),
             ]),
+            html.Div(id='season-container'),
         ]),
-        html.Button('Load Session Data', id='load-button', n_clicks=0, style={
-            'background': '#ffffff',
-            'border': '1px solid #333',
-            'color': '#000',
-            'padding': '6px 16px',
-            'borderRadius': '4px',
-            'fontSize': '12px',
-            'fontWeight': '600',
-            'cursor': 'pointer',
-            'width': '100%',
-            'transition': 'all 0.2s'
-        })
-    ]),
-
-    # Loading indicator
-    dcc.Loading(id="loading", type="default", color=COLORS['primary'], children=[
-
-        html.Div(id='session-info'),
-        html.Div(id='driver-selector-container'),
-
-        # Charts container
-        html.Div(id='charts-container')
-    ]),
-
-    # Hidden store
-    dcc.Store(id='session-data'),
-])
+
+        # Hidden stores
+        dcc.Store(id='session-data'),
+        dcc.Store(id='compare-data'),
+        dcc.Store(id='rendered-selection'),
+    ])
+
+
+app.layout = serve_layout
 
 # Callback: Update races based on year
 @app.callback(
@@ -126,7 +220,7 @@ app.layout = html.Div(style={'backgroundColor': COLORS['background'], 'minHeight
 )
 def update_races(year):
     try:
-        schedule = fastf1.get_event_schedule(year)
+        schedule = get_event_schedule(year)
         # Reverse order so latest race is at top
         return [{'label': row['EventName'], 'value': row['EventName']} for idx, row in schedule.iloc[::-1].iterrows()]
     except:
@@ -143,8 +237,9 @@ def load_session(n_clicks, year, race, session_type):
         return None, html.Div()
 
     try:
-        session = fastf1.get_session(year, race, session_type)
-        session.load()
+        # Cold loads can take minutes: answer within F1_LOAD_TIMEOUT and let
+        # the load finish in the background instead of tying up the worker
+        session = get_session_within(year, race, session_type)
 
         drivers = session.drivers
         driver_info = []
@@ -162,8 +257,15 @@ def load_session(n_clicks, year, race, session_type):
             html.P(f"📅 {session.event['EventDate']} | {len(drivers)} Drivers", style={'color': COLORS['text_secondary'], 'fontSize': '11px'})
         ])
 
-        return {'year': year, 'race': race, 'session_type': session_type, 'drivers': driver_info}, info_card
+        # The schedule's event name, so later lookups hit the session cache
+        return {'year': year, 'race': session.event['EventName'], 'session_type': session_type, 'drivers': driver_info}, info_card
 
+    except TimeoutError:
+        return None, html.Div(className='card', style={'background': '#1a1a1a', 'marginTop': '10px', 'borderLeft': '2px solid #FFB020'}, children=[
+            html.H3('⏳ Still Loading Session', style={'color': '#FFB020', 'fontSize': '12px'}),
+            html.P(f"Not ready after {LOAD_TIMEOUT:.0f}s - it keeps loading in the background. Click Load Session Data again in a moment.",
+                   style={'color': COLORS['text_secondary'], 'fontSize': '10px'})
+        ])
     except Exception as e:
         return None, html.Div(className='card', style={'background': '#1a1a1a', 'marginTop': '10px', 'borderLeft': '2px solid #FF4444'}, children=[
             html.H3('❌ Error Loading Session', style={'color': '#FF4444', 'fontSize': '12px'}),
@@ -184,384 +286,1201 @@ def create_driver_selector(session_data):
 
     return html.Div(className='card', children=[
         html.H3('👥 Select Drivers to Compare', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '12px'}),
-        dcc.Dropdown(id='driver-selector', options=options, value=default, multi=True, maxHeight=300)
+        dcc.Dropdown(id='driver-selector', options=options, value=default, multi=True, maxHeight=300),
+        dcc.Tabs(id='view-tabs', value='overview', style={'marginTop': '10px', 'height': '32px'}, children=[
+            dcc.Tab(label=label, value=value, style=TAB_STYLE, selected_style=TAB_SELECTED_STYLE)
+            for value, label in VIEW_LABELS.items()
+        ])
     ])
 
 # Callback: Charts
 @app.callback(
-    Output('charts-container', 'children'),
-    [Input('driver-selector', 'value')],
-    [State('session-data', 'data')]
+    [Output('charts-container', 'children'),
+     Output(overview_id('figure', ALL), 'figure'),
+     Output(overview_id('table', ALL), 'children'),
+     Output('rendered-selection', 'data')],
+    [Input('driver-selector', 'value'), Input('view-tabs', 'value')],
+    [State('session-data', 'data'), State('rendered-selection', 'data')]
 )
-def update_charts(selected_drivers, session_data):
+@trace_allocations
+def update_charts(selected_drivers, view, session_data, rendered):
+    outputs = dash.callback_context.outputs_list
+    figure_names = [output['id']['name'] for output in outputs[1]]
+    table_names = [output['id']['name'] for output in outputs[2]]
+    unchanged = [dash.no_update] * len(figure_names), [dash.no_update] * len(table_names)
+
     if not session_data or not selected_drivers:
-        return html.Div()
+        return html.Div(), *unchanged, None
+    view = view if view in VIEW_LABELS else 'overview'
+
+    # Renderers cap the selection in pick order; the cache key only records
+    # which drivers end up shown, so reordered picks share an entry
+    selected_drivers = list(dict.fromkeys(selected_drivers))
+    key = render_key(session_data, selected_drivers, view)
+    selection = {'view': list(key[:3]) + [view], 'drivers': selected_drivers}
+
+    # Same session and view on screen: send only the traces and table
+    # contents of the drivers that were added or removed (a completely new
+    # selection is cheaper as a plain render, and so is a reordering, which
+    # patches would not reproduce)
+    kept = set(rendered['drivers']) & set(selected_drivers) if rendered else set()
+    if (rendered and rendered['view'] == selection['view'] and view in VIEW_PATCHERS and kept
+            and [d for d in rendered['drivers'] if d in kept] == [d for d in selected_drivers if d in kept]):
+        if render_key(session_data, rendered['drivers'], view) == key:
+            return dash.no_update, *unchanged, dash.no_update
+        try:
+            figure_patches, tables = VIEW_PATCHERS[view](rendered['drivers'], selected_drivers, session_data)
+            return (dash.no_update,
+                    [figure_patches.get(name, dash.no_update) for name in figure_names],
+                    [tables.get(name, dash.no_update) for name in table_names],
+                    selection)
+        except Exception:
+            pass  # fall back to a full render
+
+    cached = render_cache.get(key)
+    if cached is not None:
+        # On screen in the order it was rendered in, which later patches start from
+        result, drivers = cached
+        return result, *unchanged, dict(selection, drivers=drivers)
 
     try:
-        session = fastf1.get_session(session_data['year'], session_data['race'], session_data['session_type'])
-        session.load()
-
-        # Get team colors for selected drivers
-        driver_colors = {}
-        for driver_num in selected_drivers:
-            driver_info = next((d for d in session_data['drivers'] if d['number'] == driver_num), None)
-            if driver_info:
-                team_name = driver_info['team']
-                driver_colors[driver_num] = TEAM_COLORS.get(team_name, '#ffffff')
-
-        # LAP TIMES CHART
-        lap_fig = go.Figure()
-
-        # Find overall fastest lap across all selected drivers
-        all_fastest_times = []
-        for driver in selected_drivers[:5]:
-            laps = session.laps.pick_driver(driver)
-            laps = laps[laps['LapTime'].notna()]
-            if not laps.empty:
-                fastest = laps['LapTime'].min()
-                all_fastest_times.append(fastest)
-
-        overall_fastest = min(all_fastest_times) if all_fastest_times else None
-
-        for idx, driver in enumerate(selected_drivers[:5]):
-            laps = session.laps.pick_driver(driver)
-            laps = laps[laps['LapTime'].notna()]
-            lap_times = laps['LapTime'].dt.total_seconds()
-            driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-            driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-            color = driver_colors.get(driver, '#ffffff')
-
-            # Regular lap trace
-            lap_fig.add_trace(go.Scatter(
-                x=laps['LapNumber'], y=lap_times,
-                mode='lines+markers', name=driver_name,
-                line=dict(color=color, width=2),
-                marker=dict(size=4, color=color)
-            ))
+        result = VIEW_RENDERERS[view](selected_drivers, session_data)
+    except Exception as e:
+        return html.Div(className='card', style={'borderLeft': '2px solid #FF4444'}, children=[
+            html.H3('❌ Error', style={'color': '#FF4444', 'fontSize': '12px'}),
+            html.P(str(e), style={'color': COLORS['text_secondary'], 'fontSize': '10px'})
+        ]), *unchanged, None
+
+    render_cache.put(key, (result, selected_drivers), size=serialized_size(result))
+    return result, *unchanged, selection
+
+
+def cached_figure(session, name, drivers, build):
+    # Figures are memoized per session and driver set, independently of the view
+    key = (session_id(session), name, tuple(d['number'] for d in drivers))
+    figure = figure_cache.get(key)
+    if figure is None:
+        figure = build()
+        figure_cache.put(key, figure)
+    return figure
+
+
+def render_overview(selected_drivers, session_data):
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    lap_index = get_lap_index(session)
+    telemetry = fastest_arrays(session, selected_drivers[:figures.MAX_TELEMETRY_DRIVERS])
+
+    lap_fig = cached_figure(session, 'lap_times', drivers, lambda: figures.lap_times_figure(lap_index, drivers))
+    speed_fig = cached_figure(session, 'speed', drivers, lambda: figures.speed_figure(telemetry, drivers))
+    telem_fig = cached_figure(session, 'telemetry', drivers, lambda: figures.telemetry_figure(telemetry, drivers))
+    track_fig = cached_figure(session, 'track', drivers, lambda: figures.track_figure(telemetry, drivers))
+    friction_fig = cached_figure(session, 'friction', drivers, lambda: figures.friction_circle_figure(telemetry, drivers))
+
+    # WEATHER
+    weather = session.weather_data
+    weather_content = html.P("No weather data", style={'color': COLORS['text_secondary'], 'fontSize': '10px'})
+    if not weather.empty:
+        weather_content = html.Div([
+            html.Div(className='metric-card', style={'marginBottom': '8px', 'background': 'linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%)', 'border': 'none', 'padding': '10px'}, children=[
+                html.Div('AIR TEMP', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
+                html.Div(f"{weather['AirTemp'].mean():.1f}°C", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
+            ]),
+            html.Div(className='metric-card', style={'marginBottom': '8px', 'background': 'linear-gradient(135deg, #4ECDC4 0%, #44A08D 100%)', 'border': 'none', 'padding': '10px'}, children=[
+                html.Div('TRACK TEMP', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
+                html.Div(f"{weather['TrackTemp'].mean():.1f}°C", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
+            ]),
+            html.Div(className='metric-card', style={'background': 'linear-gradient(135deg, #667EEA 0%, #764BA2 100%)', 'border': 'none', 'padding': '10px'}, children=[
+                html.Div('HUMIDITY', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
+                html.Div(f"{weather['Humidity'].mean():.1f}%", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
+            ])
+        ])
 
-            # Highlight fastest lap in purple
-            if overall_fastest and not laps.empty:
-                fastest_lap = laps[laps['LapTime'] == overall_fastest]
-                if not fastest_lap.empty:
-                    fastest_lap_time = fastest_lap['LapTime'].dt.total_seconds().iloc[0]
-                    fastest_lap_num = fastest_lap['LapNumber'].iloc[0]
-                    lap_fig.add_trace(go.Scatter(
-                        x=[fastest_lap_num],
-                        y=[fastest_lap_time],
-                        mode='markers',
-                        name=f'{driver_name} FL',
-                        marker=dict(size=12, color='#9b59b6', symbol='star', line=dict(color='white', width=1)),
-                        showlegend=False
-                    ))
-
-        lap_fig.update_layout(
-            template='plotly_dark',
-            paper_bgcolor=COLORS['card_bg'],
-            plot_bgcolor=COLORS['card_bg'],
-            font=dict(color=COLORS['text_primary'], size=10),
-            xaxis_title='Lap Number',
-            yaxis_title='Lap Time (s)',
-            height=175,
-            margin=dict(l=30, r=20, t=10, b=30),
-            autosize=False
-        )
+    return html.Div([
+        # Charts grid
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': 'repeat(auto-fit, minmax(300px, 1fr))', 'gap': '10px', 'marginTop': '10px'}, children=[
+            html.Div(className='card', children=[
+                html.H3('⏱️ Lap Times', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(id=overview_id('figure', 'lap_times'), figure=lap_fig, config={'displayModeBar': False}, style={'height': '175px'})
+            ]),
+            html.Div(className='card', children=[
+                html.H3('🚀 Speed Comparison', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(id=overview_id('figure', 'speed'), figure=speed_fig, config={'displayModeBar': False}, style={'height': '175px'})
+            ]),
+            html.Div(className='card', children=[
+                html.H3('🎯 Friction Circle', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(id=overview_id('figure', 'friction'), figure=friction_fig, config={'displayModeBar': False}, style={'height': '175px'})
+            ]),
+        ]),
 
-        # SPEED CHART
-        speed_fig = go.Figure()
-        for idx, driver in enumerate(selected_drivers[:3]):
-            laps = session.laps.pick_driver(driver)
-            fastest = laps.pick_fastest()
-            if fastest is not None and not fastest.empty:
-                telemetry = fastest.get_telemetry()
-                driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-                driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-                color = driver_colors.get(driver, '#ffffff')
-
-                speed_fig.add_trace(go.Scatter(
-                    x=telemetry['Distance'], y=telemetry['Speed'],
-                    mode='lines', name=driver_name,
-                    line=dict(color=color, width=3)
-                ))
-
-        speed_fig.update_layout(
-            template='plotly_dark',
-            paper_bgcolor=COLORS['card_bg'],
-            plot_bgcolor=COLORS['card_bg'],
-            font=dict(color=COLORS['text_primary'], size=10),
-            xaxis_title='Distance (m)',
-            yaxis_title='Speed (km/h)',
-            height=175,
-            margin=dict(l=30, r=20, t=10, b=30),
-            autosize=False
-        )
+        # Fastest Laps Table
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('⚡ Fastest Laps', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                html.Thead(children=[
+                    html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                        html.Th('Driver', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
+                        html.Th('Lap', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
+                        html.Th('Time', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
+                    ])
+                ]),
+                html.Tbody(id=overview_id('table', 'fastest_laps'), children=fastest_laps_body(lap_index, drivers))
+            ])
+        ]),
 
-        # TELEMETRY CHART
-        telem_fig = make_subplots(rows=4, cols=1, shared_xaxes=True, subplot_titles=('Speed', 'Throttle', 'Brake', 'Gear'), vertical_spacing=0.05)
-
-        for idx, driver in enumerate(selected_drivers[:3]):
-            laps = session.laps.pick_driver(driver)
-            fastest = laps.pick_fastest()
-            if fastest is not None and not fastest.empty:
-                telemetry = fastest.get_telemetry()
-                driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-                driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-                color = driver_colors.get(driver, '#ffffff')
-
-                telem_fig.add_trace(go.Scatter(x=telemetry['Distance'], y=telemetry['Speed'], mode='lines', name=driver_name, line=dict(color=color, width=2)), row=1, col=1)
-                telem_fig.add_trace(go.Scatter(x=telemetry['Distance'], y=telemetry['Throttle'], mode='lines', name=driver_name, line=dict(color=color, width=2), showlegend=False), row=2, col=1)
-                telem_fig.add_trace(go.Scatter(x=telemetry['Distance'], y=telemetry['Brake'], mode='lines', name=driver_name, line=dict(color=color, width=2), showlegend=False), row=3, col=1)
-                telem_fig.add_trace(go.Scatter(x=telemetry['Distance'], y=telemetry['nGear'], mode='lines', name=driver_name, line=dict(color=color, width=2), showlegend=False), row=4, col=1)
-
-        telem_fig.update_layout(
-            template='plotly_dark',
-            paper_bgcolor=COLORS['card_bg'],
-            plot_bgcolor=COLORS['card_bg'],
-            font=dict(color=COLORS['text_primary'], size=9),
-            height=300,
-            margin=dict(l=30, r=20, t=30, b=30),
-            autosize=False
-        )
+        # All Laps Comparison Table
+        html.Div(className='card', style={'marginTop': '10px', 'overflowX': 'auto'}, children=[
+            html.H3('📋 All Laps Comparison', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P('Purple highlight = fastest lap for that lap number. Delta shows difference to fastest.', style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            html.Table(id=overview_id('table', 'all_laps'), style={'width': '100%', 'borderCollapse': 'collapse', 'fontSize': '10px'},
+                       children=all_laps_table(lap_index, drivers))
+        ]),
 
-        # TRACK MAP
-        track_fig = go.Figure()
-        for idx, driver in enumerate(selected_drivers[:3]):
-            laps = session.laps.pick_driver(driver)
-            fastest = laps.pick_fastest()
-            if fastest is not None and not fastest.empty:
-                telemetry = fastest.get_telemetry()
-                driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-                driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-                color = driver_colors.get(driver, '#ffffff')
-
-                track_fig.add_trace(go.Scatter(
-                    x=telemetry['X'], y=telemetry['Y'],
-                    mode='lines', name=driver_name,
-                    line=dict(color=color, width=4)
-                ))
-
-        track_fig.update_layout(
-            template='plotly_dark',
-            paper_bgcolor=COLORS['card_bg'],
-            plot_bgcolor=COLORS['card_bg'],
-            font=dict(color=COLORS['text_primary'], size=9),
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, scaleanchor="x", scaleratio=1),
-            height=250,
-            margin=dict(l=10, r=10, t=10, b=10),
-            autosize=False
-        )
+        # Full width telemetry
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('📡 Detailed Telemetry', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(id=overview_id('figure', 'telemetry'), figure=telem_fig, config={'displayModeBar': False}, style={'height': '420px'})
+        ]),
 
-        # WEATHER
-        weather = session.weather_data
-        weather_content = html.P("No weather data", style={'color': COLORS['text_secondary'], 'fontSize': '10px'})
-        if not weather.empty:
-            weather_content = html.Div([
-                html.Div(className='metric-card', style={'marginBottom': '8px', 'background': 'linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%)', 'border': 'none', 'padding': '10px'}, children=[
-                    html.Div('AIR TEMP', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
-                    html.Div(f"{weather['AirTemp'].mean():.1f}°C", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
-                ]),
-                html.Div(className='metric-card', style={'marginBottom': '8px', 'background': 'linear-gradient(135deg, #4ECDC4 0%, #44A08D 100%)', 'border': 'none', 'padding': '10px'}, children=[
-                    html.Div('TRACK TEMP', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
-                    html.Div(f"{weather['TrackTemp'].mean():.1f}°C", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
-                ]),
-                html.Div(className='metric-card', style={'background': 'linear-gradient(135deg, #667EEA 0%, #764BA2 100%)', 'border': 'none', 'padding': '10px'}, children=[
-                    html.Div('HUMIDITY', className='metric-label', style={'color': '#fff', 'fontSize': '9px'}),
-                    html.Div(f"{weather['Humidity'].mean():.1f}%", className='metric-value', style={'color': '#fff', 'fontSize': '18px'})
-                ])
-            ])
+        # Track map and weather
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': '2fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
+            html.Div(className='card', children=[
+                html.H3('🗺️ Track Map', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(id=overview_id('figure', 'track'), figure=track_fig, config={'displayModeBar': False}, style={'height': '250px'})
+            ]),
+            html.Div(className='card', children=[
+                html.H3('🌤️ Weather', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                weather_content
+            ]),
+        ])
+    ])
 
-        # FASTEST LAPS TABLE
-        fastest_laps_table = []
-        for driver in selected_drivers[:5]:
-            laps = session.laps.pick_driver(driver)
-            laps = laps[laps['LapTime'].notna()]
-            if not laps.empty:
-                driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-                driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-                fastest = laps['LapTime'].min()
-                fastest_lap_num = laps[laps['LapTime'] == fastest]['LapNumber'].iloc[0]
-                color = driver_colors.get(driver, '#ffffff')
-
-                # Check if this is the overall fastest
-                is_fastest_overall = (fastest == overall_fastest)
+
+def fastest_laps_body(lap_index, drivers):
+    rows = []
+    for row in figures.fastest_laps_rows(lap_index, drivers):
+        rows.append(
+            html.Tr(style={'borderBottom': '1px solid #333'}, children=[
+                html.Td(row['name'], style={'padding': '6px 8px', 'color': row['color'], 'fontSize': '11px', 'fontWeight': '600'}),
+                html.Td(f"Lap {row['lap']}", style={'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '10px'}),
+                html.Td(
+                    format_laptime(row['time']),
+                    style={
+                        'padding': '6px 8px',
+                        'fontSize': '11px',
+                        'fontWeight': '700',
+                        'color': '#9b59b6' if row['is_fastest_overall'] else '#ffffff'
+                    }
+                ),
+            ])
+        )
+    return rows
+
+
+def all_laps_cells(lap_index, drivers):
+    """Columns (driver numbers), header cells and per-lap driver cells of the lap-by-lap comparison."""
+    all_laps_data, max_laps = figures.all_laps_by_driver(lap_index, drivers)
+    columns = [d['number'] for d in drivers[:figures.MAX_LAP_DRIVERS] if d['number'] in all_laps_data]
+
+    header = [
+        html.Th(
+            all_laps_data[driver]['name'],
+            style={
+                'padding': '6px 8px',
+                'textAlign': 'center',
+                'color': all_laps_data[driver]['color'],
+                'fontSize': '9px',
+                'fontWeight': '700',
+                'textTransform': 'uppercase'
+            }
+        ) for driver in columns
+    ]
+
+    rows = []
+    for lap_num in range(1, max_laps + 1):
+        # Find fastest time for this lap across all drivers
+        lap_times_this_lap = []
+        for driver_data in all_laps_data.values():
+            if lap_num in driver_data['laps']:
+                lap_times_this_lap.append(driver_data['laps'][lap_num])
+
+        fastest_this_lap = min(lap_times_this_lap) if lap_times_this_lap else None
+
+        row_cells = []
+        for driver in columns:
+            driver_data = all_laps_data[driver]
+            if lap_num in driver_data['laps']:
+                lap_time = driver_data['laps'][lap_num]
+                is_fastest = (lap_time == fastest_this_lap)
 
                 # Format time as MM:SS.mmm
-                total_seconds = fastest.total_seconds()
-                minutes = int(total_seconds // 60)
-                seconds = total_seconds % 60
+                minutes = int(lap_time // 60)
+                seconds = lap_time % 60
                 time_str = f"{minutes}:{seconds:06.3f}"
 
-                fastest_laps_table.append(
-                    html.Tr(style={'borderBottom': '1px solid #333'}, children=[
-                        html.Td(driver_name, style={'padding': '6px 8px', 'color': color, 'fontSize': '11px', 'fontWeight': '600'}),
-                        html.Td(f"Lap {fastest_lap_num}", style={'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '10px'}),
-                        html.Td(
-                            time_str,
-                            style={
-                                'padding': '6px 8px',
-                                'fontSize': '11px',
-                                'fontWeight': '700',
-                                'color': '#9b59b6' if is_fastest_overall else '#ffffff'
-                            }
-                        ),
-                    ])
+                # Calculate delta to fastest
+                delta = lap_time - fastest_this_lap if fastest_this_lap else 0
+                delta_str = f"+{delta:.3f}" if delta > 0 else f"{delta:.3f}" if delta < 0 else ""
+
+                row_cells.append(
+                    html.Td(
+                        html.Div([
+                            html.Div(time_str, style={'fontSize': '10px', 'fontWeight': '700' if is_fastest else '400'}),
+                            html.Div(delta_str, style={'fontSize': '8px', 'color': COLORS['text_secondary']}) if delta_str else None
+                        ]),
+                        style={
+                            'padding': '4px 6px',
+                            'textAlign': 'center',
+                            'backgroundColor': '#9b59b622' if is_fastest else 'transparent',
+                            'color': '#9b59b6' if is_fastest else COLORS['text_primary'],
+                            'borderLeft': f'2px solid {driver_data["color"]}' if is_fastest else 'none'
+                        }
+                    )
                 )
+            else:
+                row_cells.append(html.Td('-', style={'padding': '4px 6px', 'textAlign': 'center', 'fontSize': '10px', 'color': COLORS['text_secondary']}))
+        rows.append(row_cells)
 
-        # ALL LAPS TABLE - Comprehensive lap-by-lap comparison
-        all_laps_data = {}
-        max_laps = 0
-
-        for driver in selected_drivers[:5]:
-            laps = session.laps.pick_driver(driver)
-            laps = laps[laps['LapTime'].notna()].sort_values('LapNumber')
-            if not laps.empty:
-                driver_info = next((d for d in session_data['drivers'] if d['number'] == driver), None)
-                driver_name = driver_info['abbreviation'] if driver_info else str(driver)
-                color = driver_colors.get(driver, '#ffffff')
-
-                lap_dict = {}
-                for _, lap in laps.iterrows():
-                    lap_num = int(lap['LapNumber'])
-                    lap_time = lap['LapTime'].total_seconds()
-                    lap_dict[lap_num] = lap_time
-                    max_laps = max(max_laps, lap_num)
-
-                all_laps_data[driver] = {
-                    'name': driver_name,
-                    'color': color,
-                    'laps': lap_dict
-                }
-
-        # Create table rows for all laps
-        all_laps_rows = []
-        for lap_num in range(1, max_laps + 1):
-            # Find fastest time for this lap across all drivers
-            lap_times_this_lap = []
-            for driver_data in all_laps_data.values():
-                if lap_num in driver_data['laps']:
-                    lap_times_this_lap.append(driver_data['laps'][lap_num])
-
-            fastest_this_lap = min(lap_times_this_lap) if lap_times_this_lap else None
-
-            row_cells = [html.Td(f"Lap {lap_num}", style={'padding': '4px 6px', 'fontSize': '10px', 'fontWeight': '600', 'color': COLORS['text_secondary'], 'position': 'sticky', 'left': '0', 'background': COLORS['card_bg'], 'borderRight': '1px solid #444'})]
-
-            for driver in selected_drivers[:5]:
-                if driver in all_laps_data:
-                    driver_data = all_laps_data[driver]
-                    if lap_num in driver_data['laps']:
-                        lap_time = driver_data['laps'][lap_num]
-                        is_fastest = (lap_time == fastest_this_lap)
-
-                        # Format time as MM:SS.mmm
-                        minutes = int(lap_time // 60)
-                        seconds = lap_time % 60
-                        time_str = f"{minutes}:{seconds:06.3f}"
-
-                        # Calculate delta to fastest
-                        delta = lap_time - fastest_this_lap if fastest_this_lap else 0
-                        delta_str = f"+{delta:.3f}" if delta > 0 else f"{delta:.3f}" if delta < 0 else ""
-
-                        row_cells.append(
-                            html.Td(
-                                html.Div([
-                                    html.Div(time_str, style={'fontSize': '10px', 'fontWeight': '700' if is_fastest else '400'}),
-                                    html.Div(delta_str, style={'fontSize': '8px', 'color': COLORS['text_secondary']}) if delta_str else None
-                                ]),
-                                style={
-                                    'padding': '4px 6px',
-                                    'textAlign': 'center',
-                                    'backgroundColor': '#9b59b622' if is_fastest else 'transparent',
-                                    'color': '#9b59b6' if is_fastest else COLORS['text_primary'],
-                                    'borderLeft': f'2px solid {driver_data["color"]}' if is_fastest else 'none'
-                                }
-                            )
-                        )
-                    else:
-                        row_cells.append(html.Td('-', style={'padding': '4px 6px', 'textAlign': 'center', 'fontSize': '10px', 'color': COLORS['text_secondary']}))
-
-            all_laps_rows.append(html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=row_cells))
-
-        return html.Div([
-            # Charts grid
-            html.Div(style={'display': 'grid', 'gridTemplateColumns': 'repeat(auto-fit, minmax(300px, 1fr))', 'gap': '10px', 'marginTop': '10px'}, children=[
-                html.Div(className='card', children=[
-                    html.H3('⏱️ Lap Times', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                    dcc.Graph(figure=lap_fig, config={'displayModeBar': False}, style={'height': '175px'})
-                ]),
-                html.Div(className='card', children=[
-                    html.H3('🚀 Speed Comparison', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                    dcc.Graph(figure=speed_fig, config={'displayModeBar': False}, style={'height': '175px'})
-                ]),
+    return columns, header, rows
+
+
+def all_laps_row(lap_num, cells):
+    label = html.Td(f"Lap {lap_num}", style={'padding': '4px 6px', 'fontSize': '10px', 'fontWeight': '600', 'color': COLORS['text_secondary'], 'position': 'sticky', 'left': '0', 'background': COLORS['card_bg'], 'borderRight': '1px solid #444'})
+    return html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=[label] + cells)
+
+
+def all_laps_table(lap_index, drivers):
+    """Header and rows of the lap-by-lap comparison - one column per driver."""
+    _, header, rows = all_laps_cells(lap_index, drivers)
+    return [
+        html.Thead(children=[
+            html.Tr(style={'borderBottom': '2px solid #444', 'position': 'sticky', 'top': '0', 'background': COLORS['card_bg'], 'zIndex': '10'}, children=[
+                html.Th('Lap', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase', 'position': 'sticky', 'left': '0', 'background': COLORS['card_bg'], 'borderRight': '1px solid #444'}),
+            ] + header)
+        ]),
+        html.Tbody(children=[all_laps_row(lap_num, cells) for lap_num, cells in enumerate(rows, start=1)])
+    ]
+
+
+def patch_blocks(target, old, new, block_for, per_driver=1, offset=0):
+    """Turn the per-driver blocks of a patched list from the old into the new driver order.
+
+    Only the blocks of drivers that left are deleted and only those of drivers
+    that joined are inserted (block_for(driver) builds one block of per_driver
+    items); the first `offset` items and all other blocks stay on the client.
+    """
+    shown = list(old)
+    for driver in reversed(old):
+        if driver not in new:
+            start = offset + shown.index(driver) * per_driver
+            for idx in reversed(range(start, start + per_driver)):
+                del target[idx]
+            shown.remove(driver)
+    for pos, driver in enumerate(new):
+        if driver not in shown:
+            for idx, item in enumerate(block_for(driver)):
+                target.insert(offset + pos * per_driver + idx, item)
+            shown.insert(pos, driver)
+    return target
+
+
+def patch_traces(old, new, traces_for, per_driver=1):
+    patch = Patch()
+    patch_blocks(patch['data'], old, new, traces_for, per_driver)
+    return patch
+
+
+def patch_all_laps(lap_index, old, new):
+    """Patch of the lap-by-lap table: driver columns added/removed, changed cells reassigned."""
+    old_columns, _, old_rows = all_laps_cells(lap_index, old)
+    columns, header, rows = all_laps_cells(lap_index, new)
+    patch = Patch()
+
+    header_cells = dict(zip(columns, header))
+    patch_blocks(patch[0]['props']['children'][0]['props']['children'], old_columns, columns,
+                 lambda drv: [header_cells[drv]], offset=1)
+
+    body = patch[1]['props']['children']
+    for lap_idx, cells in enumerate(rows):
+        if lap_idx >= len(old_rows):
+            body.append(all_laps_row(lap_idx + 1, cells))
+            continue
+        new_cells = dict(zip(columns, cells))
+        old_cells = dict(zip(old_columns, old_rows[lap_idx]))
+        row = body[lap_idx]['props']['children']
+        patch_blocks(row, old_columns, columns, lambda drv: [new_cells[drv]], offset=1)
+        # Kept columns: only cells whose fastest-lap highlight or delta moved
+        for pos, driver in enumerate(columns):
+            if driver in old_cells and serialized(old_cells[driver]) != serialized(new_cells[driver]):
+                row[1 + pos] = new_cells[driver]
+    for lap_idx in reversed(range(len(rows), len(old_rows))):
+        del body[lap_idx]
+    return patch
+
+
+def patch_overview(old_drivers, new_drivers, session_data):
+    """Patches of the overview figures and the rebuilt tables for a new driver selection."""
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    lap_index = get_lap_index(session)
+    old = driver_styles(old_drivers, session_data['drivers'])
+    new = driver_styles(new_drivers, session_data['drivers'])
+    style = {d['number']: d for d in old + new}
+
+    def numbers(drivers):
+        return [d['number'] for d in drivers]
+
+    # Lap times: one trace per driver, then the fastest-lap marker, which
+    # moves whenever the set changes
+    lap_patch = patch_traces(numbers(old[:figures.MAX_LAP_DRIVERS]), numbers(new[:figures.MAX_LAP_DRIVERS]),
+                             lambda drv: [figures.lap_time_trace(lap_index, style[drv])])
+    lap_patch['data'][len(new[:figures.MAX_LAP_DRIVERS])] = figures.fastest_lap_marker(lap_index, new)
+
+    # Telemetry figures: arrays are only read for the drivers that joined
+    old_tel = numbers(figures.telemetry_drivers(fastest_arrays(session, numbers(old[:figures.MAX_TELEMETRY_DRIVERS])), old))
+    telemetry = fastest_arrays(session, numbers(new[:figures.MAX_TELEMETRY_DRIVERS]))
+    new_tel = numbers(figures.telemetry_drivers(telemetry, new))
+    patches = {
+        'lap_times': lap_patch,
+        'speed': patch_traces(old_tel, new_tel, lambda drv: [figures.speed_trace(telemetry[drv], style[drv])]),
+        'telemetry': patch_traces(old_tel, new_tel, lambda drv: figures.telemetry_traces(telemetry[drv], style[drv]),
+                                  per_driver=len(figures.TELEMETRY_ROWS)),
+        'track': patch_traces(old_tel, new_tel, lambda drv: [figures.track_trace(telemetry[drv], style[drv])]),
+        'friction': patch_traces(old_tel, new_tel, lambda drv: [figures.friction_trace(telemetry[drv], style[drv])]),
+    }
+
+    # The fastest-laps table is a handful of rows and is simply rebuilt
+    tables = {
+        'fastest_laps': fastest_laps_body(lap_index, new),
+        'all_laps': patch_all_laps(lap_index, old, new),
+    }
+    return patches, tables
+
+
+def render_sectors(selected_drivers, session_data):
+    from sectors import SECTOR_COLUMNS, SPEED_TRAP_LABELS, get_sector_matrix, personal_best_mask, sector_summary
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    matrix = get_sector_matrix(session)
+    summary = sector_summary(matrix)
+
+    driver_colors = {d['number']: TEAM_COLORS.get(d['team'], '#ffffff') for d in session_data['drivers']}
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    selected = set(selected_drivers)
+
+    # SECTOR TIMES PER LAP - one slice of the cached matrix per driver, personal-best sectors ringed
+    sector_fig = cached_figure(session, 'sector_times', drivers,
+                               lambda: figures.sector_times_figure(matrix, drivers, personal_best_mask(matrix)))
+
+    # SPEED TRAPS - top speed at each trap for the selected drivers
+    trap_fig = cached_figure(session, 'speed_traps', drivers, lambda: figures.speed_trap_figure(summary, drivers, SPEED_TRAP_LABELS))
+
+    # THEORETICAL BEST RANKING - whole field
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+    ranking_rows = []
+    for _, row in summary.iterrows():
+        driver = row['DriverNumber']
+        color = driver_colors.get(driver, '#ffffff')
+        cells = [
+            html.Td(str(row['IdealRank']), style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(row['Driver'], style={**cell, 'color': color, 'fontWeight': '600', 'textAlign': 'left'}),
+        ]
+        for col in SECTOR_COLUMNS:
+            is_best = bool(row[f'{col}IsFieldBest'])
+            cells.append(html.Td(
+                '-' if math.isnan(row[col]) else f"{row[col]:.3f}",
+                style={**cell, 'color': '#9b59b6' if is_best else COLORS['text_primary'], 'fontWeight': '700' if is_best else '400'}
+            ))
+        cells += [
+            html.Td(format_laptime(row['IdealLap']), style={**cell, 'color': COLORS['text_primary'], 'fontWeight': '700'}),
+            html.Td(format_laptime(row['BestLap']), style={**cell, 'color': COLORS['text_primary']}),
+            html.Td('-' if math.isnan(row['TimeLost']) else f"+{row['TimeLost']:.3f}", style={**cell, 'color': COLORS['text_secondary']}),
+        ]
+        ranking_rows.append(html.Tr(style={
+            'borderBottom': '1px solid #2a2a2a',
+            'backgroundColor': '#ffffff0d' if driver in selected else 'transparent'
+        }, children=cells))
+
+    return html.Div([
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': '2fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
+            html.Div(className='card', children=[
+                html.H3('⏱️ Sector Times', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                html.P("Ringed = the driver's personal-best sector.", style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+                dcc.Graph(figure=sector_fig, config={'displayModeBar': False}, style={'height': '300px'})
             ]),
+            html.Div(className='card', children=[
+                html.H3('🚀 Speed Traps', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(figure=trap_fig, config={'displayModeBar': False}, style={'height': '175px'})
+            ]),
+        ]),
+        html.Div(className='card', style={'marginTop': '10px', 'overflowX': 'auto'}, children=[
+            html.H3('🏆 Theoretical Best Ranking', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P('Ideal lap = sum of best sectors. Purple = fastest sector of the session.', style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                    html.Th(label, style=header) for label in ['#', 'Driver', 'S1', 'S2', 'S3', 'Ideal', 'Best', 'Lost']
+                ])]),
+                html.Tbody(children=ranking_rows)
+            ])
+        ]),
+    ])
 
-            # Fastest Laps Table
-            html.Div(className='card', style={'marginTop': '10px'}, children=[
-                html.H3('⚡ Fastest Laps', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+
+def format_value(value, pattern):
+    return '-' if math.isnan(value) else pattern.format(value)
+
+
+def render_corners(selected_drivers, session_data):
+    from corners import corner_comparison, get_corner_index
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    corners = get_corner_index(session)
+    drivers = driver_styles(selected_drivers, session_data['drivers'])[:figures.MAX_LAP_DRIVERS]
+    metrics = corner_comparison(session, [d['number'] for d in drivers])
+    drivers = [d for d in drivers if d['number'] in metrics]
+    telemetry = fastest_arrays(session, [d['number'] for d in drivers[:figures.MAX_TELEMETRY_DRIVERS]])
+
+    corner_fig = cached_figure(session, 'corner_speed', drivers, lambda: figures.corner_speed_figure(telemetry, drivers, corners, metrics))
+
+    # CORNER TABLE - one row per corner, one column per driver
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+    rows = []
+    for idx, corner in enumerate(corners['Corner']):
+        apex_speeds = [metrics[d['number']]['ApexSpeed'].iloc[idx] for d in drivers]
+        best_apex = max((speed for speed in apex_speeds if not math.isnan(speed)), default=None)
+        cells = [html.Td(f"T{corner}", style={**cell, 'color': COLORS['text_secondary'], 'fontWeight': '600', 'textAlign': 'left'})]
+        for driver, apex_speed in zip(drivers, apex_speeds):
+            row = metrics[driver['number']].iloc[idx]
+            is_best = apex_speed == best_apex
+            cells.append(html.Td(style={**cell, 'color': '#9b59b6' if is_best else COLORS['text_primary']}, children=[
+                html.Div(format_value(apex_speed, '{:.0f} km/h'), style={'fontWeight': '700' if is_best else '400'}),
+                html.Div(f"{format_value(row['EntrySpeed'], '{:.0f}')} › {format_value(row['ExitSpeed'], '{:.0f}')}", style={'fontSize': '8px', 'color': COLORS['text_secondary']}),
+                html.Div(f"brake {format_value(row['BrakeDistance'], '{:.0f}m')} · throttle {format_value(row['ThrottleDistance'], '{:+.0f}m')}", style={'fontSize': '8px', 'color': COLORS['text_secondary']}),
+            ]))
+        rows.append(html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=cells))
+
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🔄 Corner Speeds', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=corner_fig, config={'displayModeBar': False}, style={'height': '260px'})
+        ]),
+        html.Div(className='card', style={'marginTop': '10px', 'overflowX': 'auto'}, children=[
+            html.H3('📐 Corner Analysis', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P('Apex speed (purple = fastest), entry › exit speed, braking point before and full-throttle pickup after the corner marker.',
+                   style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                    html.Th('Corner', style={**header, 'textAlign': 'left'})
+                ] + [
+                    html.Th(d['name'], style={**header, 'textAlign': 'center', 'color': d['color'], 'fontWeight': '700'}) for d in drivers
+                ])]),
+                html.Tbody(children=rows)
+            ])
+        ]),
+    ])
+
+
+def render_pace(selected_drivers, session_data):
+    from pace import ROLLING_LAPS, get_race_pace
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    race_pace = get_race_pace(session)
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    driver_colors = {d['number']: TEAM_COLORS.get(d['team'], '#ffffff') for d in session_data['drivers']}
+    selected = set(selected_drivers)
+
+    rolling_fig = cached_figure(session, 'rolling_pace', drivers, lambda: figures.rolling_pace_figure(race_pace['laps'], drivers))
+    ranking_fig = cached_figure(session, 'pace_ranking', [], lambda: figures.pace_ranking_figure(race_pace['drivers'], driver_colors))
+
+    # TEAM PACE TABLE
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+    team_rows = []
+    for _, row in race_pace['teams'].iterrows():
+        team_rows.append(html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=[
+            html.Td(row['Team'], style={**cell, 'color': TEAM_COLORS.get(row['Team'], '#ffffff'), 'fontWeight': '600', 'textAlign': 'left'}),
+            html.Td(format_laptime(row['P50']), style={**cell, 'color': COLORS['text_primary'], 'fontWeight': '700'}),
+            html.Td(f"{format_laptime(row['P25'])} - {format_laptime(row['P75'])}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(f"+{row['Gap']:.3f}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(str(row['Laps']), style={**cell, 'color': COLORS['text_secondary']}),
+        ]))
+
+    # DRIVER PACE RANKING - whole field
+    driver_rows = []
+    for _, row in race_pace['drivers'].iterrows():
+        driver = row['DriverNumber']
+        driver_rows.append(html.Tr(style={
+            'borderBottom': '1px solid #2a2a2a',
+            'backgroundColor': '#ffffff0d' if driver in selected else 'transparent'
+        }, children=[
+            html.Td(str(row['Rank']), style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(row['Driver'], style={**cell, 'color': driver_colors.get(driver, '#ffffff'), 'fontWeight': '600', 'textAlign': 'left'}),
+            html.Td(format_laptime(row['P50']), style={**cell, 'color': COLORS['text_primary'], 'fontWeight': '700'}),
+            html.Td(f"{format_laptime(row['P10'])} / {format_laptime(row['P90'])}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(f"+{row['Gap']:.3f}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(str(row['Laps']), style={**cell, 'color': COLORS['text_secondary']}),
+        ]))
+
+    return html.Div([
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': '2fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
+            html.Div(className='card', children=[
+                html.H3(f'📉 Rolling Pace ({ROLLING_LAPS}-lap median)', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(figure=rolling_fig, config={'displayModeBar': False}, style={'height': '260px'})
+            ]),
+            html.Div(className='card', children=[
+                html.H3('🏁 Field Pace Spread', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(figure=ranking_fig, config={'displayModeBar': False})
+            ]),
+        ]),
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': '1fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
+            html.Div(className='card', style={'overflowX': 'auto'}, children=[
+                html.H3('🏆 Driver Pace Ranking', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                html.P(f"Green-flag laps only (no in/out laps, no slow laps), fuel-corrected. {race_pace['excluded']} laps excluded.",
+                       style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
                 html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
-                    html.Thead(children=[
-                        html.Tr(style={'borderBottom': '2px solid #444'}, children=[
-                            html.Th('Driver', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
-                            html.Th('Lap', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
-                            html.Th('Time', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}),
-                        ])
-                    ]),
-                    html.Tbody(children=fastest_laps_table)
+                    html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                        html.Th(label, style=header) for label in ['#', 'Driver', 'Median', 'P10 / P90', 'Gap', 'Laps']
+                    ])]),
+                    html.Tbody(children=driver_rows)
                 ])
             ]),
-
-            # All Laps Comparison Table
-            html.Div(className='card', style={'marginTop': '10px', 'overflowX': 'auto'}, children=[
-                html.H3('📋 All Laps Comparison', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                html.P('Purple highlight = fastest lap for that lap number. Delta shows difference to fastest.', style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
-                html.Table(style={'width': '100%', 'borderCollapse': 'collapse', 'fontSize': '10px'}, children=[
-                    html.Thead(children=[
-                        html.Tr(style={'borderBottom': '2px solid #444', 'position': 'sticky', 'top': '0', 'background': COLORS['card_bg'], 'zIndex': '10'}, children=[
-                            html.Th('Lap', style={'padding': '6px 8px', 'textAlign': 'left', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase', 'position': 'sticky', 'left': '0', 'background': COLORS['card_bg'], 'borderRight': '1px solid #444'}),
-                        ] + [
-                            html.Th(
-                                all_laps_data[driver]['name'],
-                                style={
-                                    'padding': '6px 8px',
-                                    'textAlign': 'center',
-                                    'color': all_laps_data[driver]['color'],
-                                    'fontSize': '9px',
-                                    'fontWeight': '700',
-                                    'textTransform': 'uppercase'
-                                }
-                            ) for driver in selected_drivers[:5] if driver in all_laps_data
-                        ])
-                    ]),
-                    html.Tbody(children=all_laps_rows)
+            html.Div(className='card', style={'overflowX': 'auto'}, children=[
+                html.H3('🏎️ Team Pace', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                    html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                        html.Th(label, style=header) for label in ['Team', 'Median', 'P25 - P75', 'Gap', 'Laps']
+                    ])]),
+                    html.Tbody(children=team_rows)
                 ])
             ]),
+        ]),
+    ])
+
+
+def render_stints(selected_drivers, session_data):
+    from stints import get_lap_slices, stint_overlays
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    cards = []
+    for driver in driver_styles(selected_drivers, session_data['drivers'])[:figures.MAX_TELEMETRY_DRIVERS]:
+        # One pass over the driver's session-wide car data - no per-lap FastF1 merges
+        slices = get_lap_slices(session, driver['number'])
+        if slices is None:
+            continue
+        overlay_fig = cached_figure(session, 'stint_overlay', [driver], lambda: figures.stint_overlay_figure(stint_overlays(slices)))
+        cards.append(html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3(f"🔁 {driver['name']} - Every Lap by Stint", style={'color': driver['color'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=overlay_fig, config={'displayModeBar': False}, style={'height': '260px'})
+        ]))
+
+    return html.Div([
+        html.P('Speed over every clean lap (no in/out laps) of each stint, best lap of the stint highlighted.',
+               style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginTop': '10px'}),
+    ] + cards)
+
+
+def render_heatmap(selected_drivers, session_data):
+    from heatmap import get_speed_grid, speed_heatmap
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    grid = get_speed_grid(session)
+    if grid is None:
+        return html.Div("Position data not available for this session",
+                        style={'color': COLORS['text_secondary'], 'padding': '20px', 'fontSize': '12px'})
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    names = ', '.join(d['name'] for d in drivers)
+
+    cards = []
+    for stat, title in [('mean', 'Average Speed'), ('max', 'Top Speed')]:
+        fig = cached_figure(session, f'speed_heatmap_{stat}', drivers,
+                            lambda stat=stat, title=title: figures.speed_heatmap_figure(*speed_heatmap(grid, selected_drivers, stat), title))
+        cards.append(html.Div(className='card', style={'flex': '1', 'minWidth': '320px'}, children=[
+            html.H3(f"🌡️ {title} - All Laps", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=fig, config={'displayModeBar': False}, style={'height': '360px'})
+        ]))
+
+    return html.Div([
+        html.P(f'Every lap of {names}, binned into a track grid.',
+               style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginTop': '10px'}),
+        html.Div(cards, style={'display': 'flex', 'gap': '10px', 'flexWrap': 'wrap'}),
+    ])
+
 
-            # Full width telemetry
-            html.Div(className='card', style={'marginTop': '10px'}, children=[
-                html.H3('📡 Detailed Telemetry', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                dcc.Graph(figure=telem_fig, config={'displayModeBar': False}, style={'height': '300px'})
+def render_track_maps(selected_drivers, session_data):
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    drivers = driver_styles(selected_drivers, session_data['drivers'])[:figures.MAX_TELEMETRY_DRIVERS]
+    telemetry = fastest_arrays(session, [d['number'] for d in drivers])
+
+    rows = []
+    for driver in figures.telemetry_drivers(telemetry, drivers):
+        tel = telemetry[driver['number']]
+        gear_fig = cached_figure(session, 'gear_map', [driver], lambda tel=tel: figures.gear_map_figure(tel))
+        drs_fig = cached_figure(session, 'drs_map', [driver], lambda tel=tel: figures.drs_map_figure(tel))
+        rows.append(html.Div(style={'display': 'flex', 'gap': '10px', 'marginTop': '10px', 'flexWrap': 'wrap'}, children=[
+            html.Div(className='card', style={'flex': '1', 'minWidth': '280px'}, children=[
+                html.H3(f"⚙️ {driver['name']} - Gear Usage", style={'color': driver['color'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(figure=gear_fig, config={'displayModeBar': False}, style={'height': '250px'})
             ]),
+            html.Div(className='card', style={'flex': '1', 'minWidth': '280px'}, children=[
+                html.H3(f"🪽 {driver['name']} - DRS", style={'color': driver['color'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                dcc.Graph(figure=drs_fig, config={'displayModeBar': False}, style={'height': '250px'})
+            ]),
+        ]))
+
+    return html.Div([
+        html.P('Fastest lap of each driver, colored by gear and DRS state.',
+               style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginTop': '10px'}),
+    ] + rows)
+
+
+def render_weather(selected_drivers, session_data):
+    from weather import get_lap_weather
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    lap_weather = get_lap_weather(session)
+    if lap_weather is None:
+        return html.Div("Weather data not available for this session",
+                        style={'color': COLORS['text_secondary'], 'padding': '20px', 'fontSize': '12px'})
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    spans = lap_weather['rain_laps']
+
+    lap_fig = cached_figure(session, 'weather_laps', drivers,
+                            lambda: figures.weather_lap_figure(get_lap_index(session), drivers, lap_weather['by_lap'], spans))
+    timeline_fig = cached_figure(session, 'weather_timeline', [], lambda: figures.weather_timeline_figure(session.weather_data, lap_weather['rain_periods']))
+    rain = ', '.join(f"L{start:.0f}" if start == end else f"L{start:.0f}-{end:.0f}" for start, end in spans) or 'none'
+
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🌦️ Lap Times vs Conditions', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P(f"Track temperature across the field (band = min-max) on the right axis; rainy laps shaded: {rain}.",
+                   style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            dcc.Graph(figure=lap_fig, config={'displayModeBar': False}, style={'height': '260px'})
+        ]),
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🌡️ Weather Timeline', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=timeline_fig, config={'displayModeBar': False}, style={'height': '175px'})
+        ]),
+    ])
 
-            # Track map and weather
-            html.Div(style={'display': 'grid', 'gridTemplateColumns': '2fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
-                html.Div(className='card', children=[
-                    html.H3('🗺️ Track Map', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                    dcc.Graph(figure=track_fig, config={'displayModeBar': False}, style={'height': '250px'})
-                ]),
-                html.Div(className='card', children=[
-                    html.H3('🌤️ Weather', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
-                    weather_content
-                ]),
+
+def render_qualifying(selected_drivers, session_data):
+    from qualifying import SEGMENTS, get_qualifying, pole_deltas
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    qualifying = get_qualifying(session)
+    if qualifying is None:
+        return html.Div("Load a qualifying session to see the Q1/Q2/Q3 breakdown",
+                        style={'color': COLORS['text_secondary'], 'padding': '20px', 'fontSize': '12px'})
+    classification = qualifying['classification']
+    driver_colors = {d['number']: TEAM_COLORS.get(d['team'], '#ffffff') for d in session_data['drivers']}
+    drivers = driver_styles(selected_drivers, session_data['drivers'])[:figures.MAX_TELEMETRY_DRIVERS]
+    pole = qualifying['pole']
+    pole_name = classification['Driver'].iloc[0] if pole is not None else '-'
+
+    segment_cards = []
+    for segment in SEGMENTS:
+        cut = qualifying['cuts'].get(segment)
+        fig = cached_figure(session, f'quali_{segment}', [],
+                            lambda segment=segment, cut=cut: figures.qualifying_segment_figure(classification, segment, cut, driver_colors))
+        note = f" - cut {format_laptime(cut)}" if cut is not None else ''
+        segment_cards.append(html.Div(className='card', style={'flex': '1', 'minWidth': '240px'}, children=[
+            html.H3(f"⏱️ {segment}{note}", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=fig, config={'displayModeBar': False})
+        ]))
+
+    delta_fig = cached_figure(session, 'pole_delta', drivers,
+                              lambda: figures.pole_delta_figure(pole_deltas(session, pole, [d['number'] for d in drivers]), drivers))
+
+    # CLASSIFICATION - knocked-out drivers dimmed by the segment they fell in
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+    selected = set(selected_drivers)
+    rows = []
+    for _, row in classification.iterrows():
+        driver = row['DriverNumber']
+        times = []
+        for segment in SEGMENTS:
+            time = row[segment]
+            is_best = time == classification[segment].min()
+            times.append(html.Td(style={**cell, 'color': '#9b59b6' if is_best else COLORS['text_primary']}, children=[
+                html.Div(format_laptime(time), style={'fontWeight': '700' if is_best else '400'}),
+                html.Div(format_value(row[f'{segment}Gap'], '+{:.3f}'), style={'fontSize': '8px', 'color': COLORS['text_secondary']}),
+            ]))
+        rows.append(html.Tr(style={
+            'borderBottom': '1px solid #2a2a2a',
+            'backgroundColor': '#ffffff0d' if driver in selected else 'transparent',
+            'opacity': 1.0 if row['Reached'] == len(SEGMENTS) else 0.7,
+        }, children=[
+            html.Td(str(row['Position']), style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(row['Driver'], style={**cell, 'color': driver_colors.get(driver, '#ffffff'), 'fontWeight': '600', 'textAlign': 'left'}),
+        ] + times))
+
+    return html.Div([
+        html.Div(segment_cards, style={'display': 'flex', 'gap': '10px', 'flexWrap': 'wrap', 'marginTop': '10px'}),
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3(f"📉 Delta to Pole ({pole_name})", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P("Each selected driver's fastest lap against the pole sitter's over distance; rising = losing time.",
+                   style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            dcc.Graph(figure=delta_fig, config={'displayModeBar': False}, style={'height': '200px'})
+        ]),
+        html.Div(className='card', style={'marginTop': '10px', 'overflowX': 'auto'}, children=[
+            html.H3('🏁 Qualifying Classification', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                    html.Th('Pos', style={**header, 'textAlign': 'center'}),
+                    html.Th('Driver', style={**header, 'textAlign': 'left'}),
+                ] + [html.Th(segment, style={**header, 'textAlign': 'center'}) for segment in SEGMENTS])]),
+                html.Tbody(children=rows)
+            ])
+        ]),
+    ])
+
+
+def render_overtakes(selected_drivers, session_data):
+    from overtakes import get_overtakes
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    events = get_overtakes(session)
+    telemetry = fastest_arrays(session, selected_drivers[:1])
+    if events is None or not telemetry:
+        return html.Div("Position data not available for this session",
+                        style={'color': COLORS['text_secondary'], 'padding': '20px', 'fontSize': '12px'})
+    drivers = driver_styles(selected_drivers, session_data['drivers'])
+    names = {d['number']: d['abbreviation'] for d in session_data['drivers']}
+    selected = set(selected_drivers)
+    involved = events[events['Driver'].isin(selected) | events['Passed'].isin(selected)]
+
+    map_fig = cached_figure(session, 'overtake_map', drivers,
+                            lambda: figures.overtake_map_figure(next(iter(telemetry.values())), involved, names))
+
+    # PASS LIST - selected drivers passing or being passed
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+    colors = {d['number']: d['color'] for d in drivers}
+    rows = []
+    for _, row in involved.iterrows():
+        rows.append(html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=[
+            html.Td(f"L{row['Lap']}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(names.get(row['Driver'], row['Driver']), style={**cell, 'color': colors.get(row['Driver'], COLORS['text_primary']), 'fontWeight': '600'}),
+            html.Td(names.get(row['Passed'], row['Passed']), style={**cell, 'color': colors.get(row['Passed'], COLORS['text_primary'])}),
+            html.Td(f"P{row['Position']}", style={**cell, 'color': COLORS['text_primary']}),
+            html.Td(row['Type'], style={**cell, 'color': figures.OVERTAKE_COLORS[row['Type']]}),
+        ]))
+
+    counts = ', '.join(f"{d['name']} {int((events['Driver'] == d['number']).sum())} made / {int((events['Passed'] == d['number']).sum())} lost"
+                       for d in drivers)
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3(f"⚔️ Overtakes - {len(events)} in the race", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.P(counts, style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+            dcc.Graph(figure=map_fig, config={'displayModeBar': False}, style={'height': '320px'})
+        ]),
+        html.Div(className='card', style={'marginTop': '10px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+            html.H3('📋 Passes', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+                html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                    html.Th(title, style={**header, 'textAlign': 'center'}) for title in ['Lap', 'Driver', 'Passed', 'New Pos', 'Type']
+                ])]),
+                html.Tbody(children=rows)
             ])
+        ]),
+    ])
+
+
+def render_strategy(selected_drivers, session_data):
+    from strategy import UNDERCUT_GAP_S, UNDERCUT_WINDOW_LAPS, get_strategy
+
+    session = get_session(session_data['year'], session_data['race'], session_data['session_type'])
+    strategy = get_strategy(session)
+    names = {d['number']: d['abbreviation'] for d in session_data['drivers']}
+    colors = {d['number']: TEAM_COLORS.get(d['team'], '#ffffff') for d in session_data['drivers']}
+    order = [d['number'] for d in session_data['drivers']]
+    selected = set(selected_drivers)
+
+    timeline_fig = cached_figure(session, 'strategy_timeline', [],
+                                 lambda: figures.strategy_timeline_figure(strategy['stints'], order, names))
+
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+
+    def table(titles, rows):
+        return html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+            html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                html.Th(title, style={**header, 'textAlign': 'center'}) for title in titles
+            ])]),
+            html.Tbody(children=rows)
         ])
 
-    except Exception as e:
-        return html.Div(className='card', style={'borderLeft': '2px solid #FF4444'}, children=[
-            html.H3('❌ Error', style={'color': '#FF4444', 'fontSize': '12px'}),
-            html.P(str(e), style={'color': COLORS['text_secondary'], 'fontSize': '10px'})
+    def driver_cell(driver):
+        return html.Td(names.get(driver, driver), style={**cell, 'color': colors.get(driver, '#ffffff'), 'fontWeight': '600'})
+
+    # PIT STOPS - whole field, selected drivers highlighted
+    stop_rows = []
+    for _, stop in strategy['stops'].iterrows():
+        stop_rows.append(html.Tr(style={
+            'borderBottom': '1px solid #2a2a2a',
+            'backgroundColor': '#ffffff0d' if stop['DriverNumber'] in selected else 'transparent'
+        }, children=[
+            html.Td(f"L{stop['Lap']}", style={**cell, 'color': COLORS['text_secondary']}),
+            driver_cell(stop['DriverNumber']),
+            html.Td(f"{stop['From'].title()} › {stop['To'].title()}", style={**cell, 'color': COLORS['text_primary']}),
+            html.Td(format_value(stop['Lane'], '{:.1f}s'), style={**cell, 'color': COLORS['text_primary'], 'fontWeight': '700'}),
+            html.Td(format_value(stop['Stationary'], '{:.1f}s'), style={**cell, 'color': COLORS['text_secondary']}),
+        ]))
+
+    # UNDERCUTS - pairs involving the selected drivers
+    undercuts = strategy['undercuts']
+    undercuts = undercuts[undercuts['Driver'].isin(selected) | undercuts['Rival'].isin(selected)]
+    result_colors = {'Undercut': '#00cc96', 'Overcut': '#fecb52', 'Held': COLORS['text_secondary']}
+    undercut_rows = []
+    for _, pair in undercuts.iterrows():
+        undercut_rows.append(html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=[
+            driver_cell(pair['Driver']),
+            html.Td(f"L{pair['Lap']}", style={**cell, 'color': COLORS['text_secondary']}),
+            driver_cell(pair['Rival']),
+            html.Td(f"L{pair['RivalLap']}", style={**cell, 'color': COLORS['text_secondary']}),
+            html.Td(f"{pair['GapBefore']:+.1f}s › {pair['GapAfter']:+.1f}s", style={**cell, 'color': COLORS['text_primary']}),
+            html.Td(f"{pair['Gain']:+.1f}s", style={**cell, 'color': COLORS['text_primary'], 'fontWeight': '700'}),
+            html.Td(pair['Result'], style={**cell, 'color': result_colors[pair['Result']], 'fontWeight': '600'}),
+        ]))
+
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🛞 Tire Strategy', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            dcc.Graph(figure=timeline_fig, config={'displayModeBar': False})
+        ]),
+        html.Div(style={'display': 'flex', 'gap': '10px', 'flexWrap': 'wrap', 'marginTop': '10px'}, children=[
+            html.Div(className='card', style={'flex': '1', 'minWidth': '300px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+                html.H3(f"🔧 Pit Stops - {len(strategy['stops'])}", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                table(['Lap', 'Driver', 'Tyres', 'Pit Lane', 'Stationary'], stop_rows),
+            ]),
+            html.Div(className='card', style={'flex': '1', 'minWidth': '300px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+                html.H3('↪️ Undercut / Overcut', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                html.P(f"First stopper vs a car within {UNDERCUT_GAP_S:.1f}s that stopped up to {UNDERCUT_WINDOW_LAPS} laps later; "
+                       "gap (+ = behind) before the first stop and after the rival's out-lap.",
+                       style={'fontSize': '9px', 'color': COLORS['text_secondary'], 'marginBottom': '8px'}),
+                table(['Driver', 'Stop', 'Rival', 'Stop', 'Gap', 'Gain', 'Result'], undercut_rows),
+            ]),
+        ]),
+    ])
+
+
+def memory_panel():
+    report = memory_report(deep=True)
+    cell = {'padding': '4px 6px', 'fontSize': '10px', 'textAlign': 'center'}
+    header = {'padding': '6px 8px', 'color': COLORS['text_secondary'], 'fontSize': '9px', 'fontWeight': '600', 'textTransform': 'uppercase'}
+
+    def megabytes(size):
+        return '-' if size is None else f"{size / 1e6:.1f} MB"
+
+    def table(titles, rows):
+        return html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[
+            html.Thead(children=[html.Tr(style={'borderBottom': '2px solid #444'}, children=[
+                html.Th(title, style={**header, 'textAlign': 'center'}) for title in titles
+            ])]),
+            html.Tbody(children=rows)
+        ])
+
+    def row(*values, bold=None):
+        return html.Tr(style={'borderBottom': '1px solid #2a2a2a'}, children=[
+            html.Td(value, style={**cell, 'color': COLORS['text_primary'] if idx == bold else COLORS['text_secondary'],
+                                  'fontWeight': '700' if idx == bold else '400'})
+            for idx, value in enumerate(values)
         ])
 
-# Expose server for deployment
+    # CACHES - budgets and accounting of every in-process cache
+    cache_rows = [row(cache['name'], f"{cache['entries']} / {cache['max_entries']}", megabytes(cache['bytes']),
+                      megabytes(cache['max_bytes']), f"{cache['hit_rate']:.0%}", cache['hits'], cache['misses'],
+                      cache['evictions'], bold=2)
+                  for cache in report['caches']]
+    total = sum(cache['bytes'] for cache in report['caches'])
+
+    # LARGEST ENTRIES - across all caches
+    entries = sorted(((cache['name'], entry) for cache in report['caches'] for entry in cache['items']),
+                     key=lambda item: item[1]['bytes'], reverse=True)[:20]
+    entry_rows = [row(name, entry['key'], megabytes(entry['bytes']), entry['hits'],
+                      f"{entry['age_s']:.0f}s", f"{entry['idle_s']:.0f}s", bold=2)
+                  for name, entry in entries]
+
+    # SESSIONS - footprint before/after compaction
+    session_rows = [row(' '.join(map(str, session['key'])), megabytes(session['before']['total']),
+                        megabytes(session['after']['total']), megabytes(session['after']['laps']),
+                        megabytes(session['after']['car_data']), megabytes(session['after']['pos_data']), bold=2)
+                    for session in report['sessions']]
+
+    # FIGURE BUILDERS - @timed wall time, slowest total first
+    builder_rows = [row(name, stats['calls'], f"{stats['mean_ms']:.1f} ms", f"{stats['last_ms']:.1f} ms", bold=2)
+                    for name, stats in report['figures'].items()]
+
+    # ALLOCATIONS - traced chart updates, newest first
+    traces = []
+    for trace in reversed(report['tracemalloc']['reports']):
+        traces += [
+            html.P(f"{trace['at']} {trace['call']} - {trace['ms']:.0f} ms, peak {megabytes(trace['peak_bytes'])}, "
+                   f"retained {megabytes(trace['net_bytes'])}",
+                   style={'fontSize': '10px', 'color': COLORS['text_primary'], 'margin': '10px 0 4px'}),
+            table(['Allocation Site', 'Retained', 'Blocks'],
+                  [row(site['site'], megabytes(site['bytes']), site['count'], bold=1) for site in trace['top']]),
+        ]
+
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3(f"🧠 Caches - {megabytes(total)}", style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            table(['Cache', 'Entries', 'Size', 'Budget', 'Hit Rate', 'Hits', 'Misses', 'Evictions'], cache_rows),
+        ]),
+        html.Div(style={'display': 'flex', 'gap': '10px', 'flexWrap': 'wrap', 'marginTop': '10px'}, children=[
+            html.Div(className='card', style={'flex': '2', 'minWidth': '400px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+                html.H3('📦 Largest Entries', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                table(['Cache', 'Key', 'Size', 'Hits', 'Age', 'Idle'], entry_rows),
+            ]),
+            html.Div(className='card', style={'flex': '1', 'minWidth': '300px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+                html.H3('🗜️ Sessions', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                table(['Session', 'Loaded', 'Compacted', 'Laps', 'Car', 'Position'], session_rows),
+            ]),
+            html.Div(className='card', style={'flex': '1', 'minWidth': '300px', 'maxHeight': '400px', 'overflowY': 'auto'}, children=[
+                html.H3('📈 Figure Builders', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+                table(['Builder', 'Calls', 'Mean', 'Last'], builder_rows),
+            ]),
+        ]),
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.H3('🔬 Allocations', style={'color': COLORS['text_primary'], 'marginBottom': '8px', 'fontSize': '11px'}),
+            html.Div(style={'display': 'flex', 'gap': '10px', 'alignItems': 'center'}, children=[
+                html.Button('Trace next 3 updates', id='trace-button', n_clicks=0, style={
+                    'background': '#ffffff',
+                    'border': '1px solid #333',
+                    'color': '#000',
+                    'padding': '6px 16px',
+                    'borderRadius': '4px',
+                    'fontSize': '12px',
+                    'fontWeight': '600',
+                    'cursor': 'pointer'
+                }),
+                html.Span(id='trace-status', style={'fontSize': '10px', 'color': COLORS['text_secondary']},
+                          children=f"{report['tracemalloc']['armed']} update(s) armed"),
+            ]),
+            html.Div(traces or [html.P('No traced updates yet: arm tracing, change drivers or views, then come back here.',
+                                       style={'fontSize': '10px', 'color': COLORS['text_secondary'], 'marginTop': '8px'})]),
+        ]),
+    ])
+
+
+def render_memory(selected_drivers, session_data):
+    # The report is only built once the admin token is entered (show_memory_panel)
+    return html.Div([
+        html.Div(className='card', style={'marginTop': '10px'}, children=[
+            html.Div(style={'display': 'flex', 'gap': '10px', 'alignItems': 'center'}, children=[
+                dcc.Input(id='admin-token', type='password', placeholder='Admin token', persistence=True,
+                          persistence_type='memory', style={'fontSize': '11px', 'padding': '6px'}),
+                html.Button('Show Memory', id='admin-unlock', n_clicks=0, style={
+                    'background': '#ffffff',
+                    'border': '1px solid #333',
+                    'color': '#000',
+                    'padding': '6px 16px',
+                    'borderRadius': '4px',
+                    'fontSize': '12px',
+                    'fontWeight': '600',
+                    'cursor': 'pointer'
+                }),
+            ]),
+        ]),
+        html.Div(id='memory-panel'),
+    ])
+
+
+# Callback: Memory report (memory view, admin token required)
+@app.callback(
+    Output('memory-panel', 'children'),
+    Input('admin-unlock', 'n_clicks'),
+    State('admin-token', 'value'),
+    prevent_initial_call=True
+)
+def show_memory_panel(n_clicks, token):
+    if not admin_authorized(token):
+        return html.P('Wrong admin token.', style={'fontSize': '10px', 'color': '#FF4444', 'marginTop': '8px'})
+    return memory_panel()
+
+
+# Callback: Arm tracemalloc for the next chart updates (memory view, admin token required)
+@app.callback(
+    Output('trace-status', 'children'),
+    Input('trace-button', 'n_clicks'),
+    State('admin-token', 'value'),
+    prevent_initial_call=True
+)
+def arm_allocation_trace(n_clicks, token):
+    if not admin_authorized(token):
+        return 'Wrong admin token.'
+    return f"{arm_trace(3)} update(s) armed"
+
+
+VIEW_RENDERERS = {
+    'overview': render_overview,
+    'sectors': render_sectors,
+    'corners': render_corners,
+    'pace': render_pace,
+    'stints': render_stints,
+    'heatmap': render_heatmap,
+    'maps': render_track_maps,
+    'weather': render_weather,
+    'qualifying': render_qualifying,
+    'overtakes': render_overtakes,
+    'strategy': render_strategy,
+    'memory': render_memory,
+}
+
+# Views that can be updated in place when only the driver selection changes
+VIEW_PATCHERS = {
+    'overview': patch_overview,
+}
+
+def comparison_keys(race, session_type, years):
+    """Session keys of the compared years, and errors of the years the schedule has no such session for."""
+    keys, invalid = [], {}
+    for year in years:
+        try:
+            keys.append(resolve_session_key(year, race, session_type))
+        except Exception as e:
+            invalid[(year, race, session_type)] = str(e)
+    return keys, invalid
+
+# Callback: Start cross-year comparison
+@app.callback(
+    [Output('compare-data', 'data'), Output('compare-interval', 'disabled', allow_duplicate=True)],
+    Input('compare-button', 'n_clicks'),
+    [State('race-dropdown', 'value'), State('session-dropdown', 'value'), State('compare-years', 'value'), State('compare-driver', 'value')],
+    prevent_initial_call=True
+)
+def start_comparison(n_clicks, race, session_type, years, driver):
+    if not years or not driver:
+        return None, True
+    years = sorted(years, reverse=True)
+    prefetch(comparison_keys(race, session_type, years)[0])
+    return {'race': race, 'session_type': session_type, 'years': years, 'driver': driver.strip().upper()}, False
+
+# Callback: Stream loaded sessions into the comparison figure
+@app.callback(
+    [Output('compare-container', 'children'), Output('compare-interval', 'disabled', allow_duplicate=True)],
+    [Input('compare-interval', 'n_intervals'), Input('compare-data', 'data')],
+    prevent_initial_call=True
+)
+def update_comparison(n_intervals, compare_data):
+    if not compare_data:
+        return html.Div(), True
+
+    keys, invalid = comparison_keys(compare_data['race'], compare_data['session_type'], compare_data['years'])
+    loaded, loading, failed = load_status(keys)
+    failed.update(invalid)
+    # Polls may land on a worker that has not started these loads yet
+    prefetch(loading)
+
+    driver = compare_data['driver']
+    laps_by_year = {}
+    best_rows = []
+    for key in keys:
+        if key not in loaded:
+            continue
+        year = key[0]
+        laps = loaded[key].laps.pick_driver(driver)
+        laps = laps[laps['LapTime'].notna()]
+        if laps.empty:
+            failed[key] = f'No laps for {driver}'
+            continue
+        lap_times = laps['LapTime'].dt.total_seconds().to_numpy()
+        laps_by_year[year] = (laps['LapNumber'].to_numpy(), lap_times)
+        best_rows.append(html.Tr(style={'borderBottom': '1px solid #333'}, children=[
+            html.Td(str(year), style={'padding': '6px 8px', 'color': YEAR_COLORS.get(year, '#ffffff'), 'fontSize': '11px', 'fontWeight': '600'}),
+            html.Td(format_laptime(lap_times.min()), style={'padding': '6px 8px', 'color': COLORS['text_primary'], 'fontSize': '11px'}),
+        ]))
+    lap_fig = figures.cross_year_figure(laps_by_year)
+
+    status = f"{len(loaded)}/{len(keys)} sessions loaded"
+    if loading:
+        status += f" - loading {', '.join(str(key[0]) for key in loading)}..."
+    if failed:
+        status += ' - ' + '; '.join(f"{key[0]}: {error}" for key, error in failed.items())
+
+    return html.Div(style={'marginTop': '10px'}, children=[
+        html.P(status, style={'color': COLORS['text_secondary'], 'fontSize': '10px', 'marginBottom': '8px'}),
+        html.Div(style={'display': 'grid', 'gridTemplateColumns': '3fr 1fr', 'gap': '10px'}, children=[
+            dcc.Graph(figure=lap_fig, config={'displayModeBar': False}, style={'height': '220px'}),
+            html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[html.Tbody(children=best_rows)]),
+        ])
+    ]), not loading
+
+# Callback: Season overview
+@app.callback(
+    Output('season-container', 'children'),
+    Input('season-button', 'n_clicks'),
+    [State('year-dropdown', 'value'), State('season-session', 'value')],
+    prevent_initial_call=True
+)
+def update_season_overview(n_clicks, year, session_type):
+    from season_index import fastest_laps_by_race, gap_to_best, load_season_table
+
+    table = load_season_table(year)
+    if table is None:
+        return html.P(f"No season index for {year} yet - build it with: python season_index.py {year}",
+                      style={'color': COLORS['text_secondary'], 'fontSize': '10px', 'marginTop': '8px'})
+
+    pivot = fastest_laps_by_race(table, session_type)
+    if pivot.empty:
+        return html.P(f"No {session_type} sessions indexed for {year}", style={'color': COLORS['text_secondary'], 'fontSize': '10px', 'marginTop': '8px'})
+
+    gaps = gap_to_best(pivot)
+    # Order drivers by their median gap over the season
+    gaps = gaps.loc[gaps.median(axis=1).sort_values().index]
+
+    heatmap = figures.season_heatmap_figure(gaps)
+
+    fastest_rows = []
+    for race in pivot.columns:
+        driver = pivot[race].idxmin()
+        best = pivot[race].min()
+        fastest_rows.append(html.Tr(style={'borderBottom': '1px solid #333'}, children=[
+            html.Td(race, style={'padding': '4px 8px', 'color': COLORS['text_secondary'], 'fontSize': '10px'}),
+            html.Td(driver, style={'padding': '4px 8px', 'color': COLORS['text_primary'], 'fontSize': '10px', 'fontWeight': '600'}),
+            html.Td(format_laptime(best), style={'padding': '4px 8px', 'color': '#9b59b6', 'fontSize': '10px', 'fontWeight': '700'}),
+        ]))
+
+    return html.Div(style={'display': 'grid', 'gridTemplateColumns': '3fr 1fr', 'gap': '10px', 'marginTop': '10px'}, children=[
+        dcc.Graph(figure=heatmap, config={'displayModeBar': False}),
+        html.Table(style={'width': '100%', 'borderCollapse': 'collapse'}, children=[html.Tbody(children=fastest_rows)]),
+    ])
+
+
+def preload():
+    """Import the heavy dependencies once, e.g. in the gunicorn master before forking.
+
+    Sessions listed in F1_PRELOAD_SESSIONS ("2024:Abu Dhabi:R;2024:Abu Dhabi:Q")
+    are loaded here as well, so every worker starts with them cached.
+    """
+    fastf1_api()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import season_index  # noqa: F401
+    import corners  # noqa: F401
+    import heatmap  # noqa: F401
+    import overtakes  # noqa: F401
+    import pace  # noqa: F401
+    import qualifying  # noqa: F401
+    import sectors  # noqa: F401
+    import stints  # noqa: F401
+    import strategy  # noqa: F401
+    import weather  # noqa: F401
+    serve_layout()
+
+    for spec in filter(None, os.environ.get('F1_PRELOAD_SESSIONS', '').split(';')):
+        try:
+            year, race, session_type = spec.split(':')
+            get_session(int(year), race.strip(), session_type.strip())
+        except Exception as e:
+            print(f"⚠️  Could not preload session {spec!r}: {e}")
+
+
+# Expose server for deployment, with the read-only data API next to the dashboard
 server = app.server
+server.register_blueprint(api)
 
 if __name__ == '__main__':
     print("\n" + "="*60)
@@ -0,0 +1,760 @@
+"""
+Figure builders for the F1 Telemetry Dashboard
+Pure functions from compact session data (lap index, telemetry arrays) to
+Plotly figure dicts - no Dash, no FastF1 - shared by the dashboard
+callbacks, batch reports and benchmarks
+"""
+
+import base64
+import functools
+import math
+import threading
+import time
+
+# Color scheme - Monochrome base
+COLORS = {
+    'background': '#0a0a0a',
+    'card_bg': '#1a1a1a',
+    'primary': '#ffffff',
+    'accent': '#2a2a2a',
+    'text_primary': '#ffffff',
+    'text_secondary': '#888888',
+    'border': '#333333',
+}
+
+# F1 Team Colors (2024-2025 season)
+TEAM_COLORS = {
+    'Red Bull Racing': '#3671C6',
+    'Ferrari': '#E8002D',
+    'Mercedes': '#27F4D2',
+    'McLaren': '#FF8000',
+    'Aston Martin': '#229971',
+    'Alpine': '#FF87BC',
+    'Williams': '#64C4FF',
+    'RB': '#6692FF',
+    'Kick Sauber': '#52E252',
+    'Haas F1 Team': '#B6BABD',
+}
+
+# Per-season colors for cross-year comparisons
+YEAR_COLORS = {
+    2025: '#E8002D',
+    2024: '#FF8000',
+    2023: '#27F4D2',
+    2022: '#3671C6',
+}
+
+# Pirelli compound colors
+COMPOUND_COLORS = {
+    'SOFT': '#DA291C',
+    'MEDIUM': '#FFD12E',
+    'HARD': '#F0F0EC',
+    'INTERMEDIATE': '#43B02A',
+    'WET': '#0067AD',
+}
+
+FASTEST_COLOR = '#9b59b6'
+PERSONAL_BEST_COLOR = '#00cc96'
+MAX_LAP_DRIVERS = 5
+MAX_TELEMETRY_DRIVERS = 3
+
+# Compact dark template - only what the charts use, instead of embedding
+# the full plotly_dark template in every figure
+_AXIS = {'gridcolor': '#283442', 'linecolor': '#506784', 'zerolinecolor': '#283442', 'zerolinewidth': 2, 'automargin': True}
+TEMPLATE = {
+    'layout': {
+        'paper_bgcolor': COLORS['card_bg'],
+        'plot_bgcolor': COLORS['card_bg'],
+        'font': {'color': COLORS['text_primary']},
+        'hoverlabel': {'align': 'left'},
+        'xaxis': _AXIS,
+        'yaxis': _AXIS,
+    }
+}
+
+# Builder timings, name -> {'calls', 'total_ms', 'last_ms'}
+FIGURE_TIMINGS = {}
+_timings_lock = threading.Lock()
+
+
+def timed(fn):
+    """Record the wall time of every call of a figure builder."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with _timings_lock:
+                stats = FIGURE_TIMINGS.setdefault(fn.__name__, {'calls': 0, 'total_ms': 0.0, 'last_ms': 0.0})
+                stats['calls'] += 1
+                stats['total_ms'] += elapsed
+                stats['last_ms'] = elapsed
+    return wrapper
+
+
+def figure_timings():
+    """Snapshot of FIGURE_TIMINGS with each builder's mean_ms, slowest total first."""
+    with _timings_lock:
+        timings = {name: dict(stats, mean_ms=stats['total_ms'] / stats['calls']) for name, stats in FIGURE_TIMINGS.items()}
+    return dict(sorted(timings.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+
+def base_layout(height, font_size=10, margin=(30, 20, 10, 30), x_title=None, y_title=None, **layout):
+    """Layout dict on the shared template; keyword args are added on top."""
+    left, right, top, bottom = margin
+    result = {
+        'template': TEMPLATE,
+        'font': {'color': COLORS['text_primary'], 'size': font_size},
+        'height': height,
+        'margin': {'l': left, 'r': right, 't': top, 'b': bottom},
+        'autosize': False,
+        **layout,
+    }
+    if x_title:
+        result['xaxis'] = {**result.get('xaxis', {}), 'title': {'text': x_title}}
+    if y_title:
+        result['yaxis'] = {**result.get('yaxis', {}), 'title': {'text': y_title}}
+    return result
+
+
+def stacked_layout(titles, height, spacing=0.05, font_size=9, margin=(30, 20, 30, 30), **layout):
+    """Layout of len(titles) rows sharing one x axis (make_subplots without the overhead)."""
+    rows = len(titles)
+    step = (1.0 - spacing * (rows - 1)) / rows
+    axes, annotations = {}, []
+    for row in range(rows):
+        top = 1.0 - row * (step + spacing)
+        suffix = '' if row == 0 else str(row + 1)
+        axes[f'yaxis{suffix}'] = {'domain': [max(0.0, round(top - step, 6)), round(top, 6)], 'anchor': f'x{suffix}'}
+        axes[f'xaxis{suffix}'] = {'anchor': f'y{suffix}', 'domain': [0.0, 1.0]}
+        if row < rows - 1:
+            axes[f'xaxis{suffix}'].update({'matches': f'x{rows}', 'showticklabels': False})
+        annotations.append({
+            'text': titles[row], 'x': 0.5, 'y': top, 'xref': 'paper', 'yref': 'paper',
+            'xanchor': 'center', 'yanchor': 'bottom', 'showarrow': False, 'font': {'size': font_size + 3},
+        })
+    return base_layout(height, font_size=font_size, margin=margin, annotations=annotations, **axes, **layout)
+
+
+def typed_array(values):
+    """Encode a numeric array as a plotly.js typed array (base64), float32 for floats.
+
+    Much smaller than JSON number lists and decoded natively by the browser.
+    """
+    import numpy as np  # deferred with the rest of the data stack
+
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'b':
+        arr = arr.astype(np.uint8)
+    if arr.dtype.kind == 'f':
+        arr, dtype = arr.astype('<f4'), 'f4'
+    elif arr.dtype.kind == 'u' and arr.dtype.itemsize == 1:
+        dtype = 'u1'
+    elif arr.dtype.kind in 'iu':
+        arr, dtype = arr.astype('<i4'), 'i4'
+    else:
+        return arr
+    encoded = {'dtype': dtype, 'bdata': base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode('ascii')}
+    if arr.ndim > 1:
+        encoded['shape'] = ', '.join(str(n) for n in arr.shape)
+    return encoded
+
+
+def axis_ref(row):
+    return ('x', 'y') if row == 1 else (f'x{row}', f'y{row}')
+
+
+def driver_styles(selected_drivers, session_drivers):
+    """Name and team color of each selected driver, in selection order."""
+    info = {d['number']: d for d in session_drivers}
+    styles = []
+    for driver in selected_drivers:
+        d = info.get(driver)
+        styles.append({
+            'number': driver,
+            'name': d['abbreviation'] if d else str(driver),
+            'color': TEAM_COLORS.get(d['team'], '#ffffff') if d else '#ffffff',
+        })
+    return styles
+
+
+def format_laptime(seconds):
+    if seconds is None or math.isnan(seconds):
+        return '-'
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def _driver_laps(lap_index, driver):
+    laps = lap_index[(lap_index['DriverNumber'] == driver) & lap_index['LapTime'].notna()]
+    return laps.sort_values('LapNumber')
+
+
+def overall_fastest_lap(lap_index, drivers):
+    # Find overall fastest lap across all selected drivers
+    laps = lap_index[lap_index['DriverNumber'].isin([d['number'] for d in drivers[:MAX_LAP_DRIVERS]])]
+    fastest = laps['LapTime'].min()
+    return None if math.isnan(fastest) else fastest
+
+
+def lap_time_trace(lap_index, driver):
+    laps = _driver_laps(lap_index, driver['number'])
+    color = driver['color']
+    return {
+        'type': 'scatter', 'x': typed_array(laps['LapNumber'].to_numpy()), 'y': typed_array(laps['LapTime'].to_numpy()),
+        'mode': 'lines+markers', 'name': driver['name'],
+        'line': {'color': color, 'width': 2},
+        'marker': {'size': 4, 'color': color},
+    }
+
+
+def fastest_lap_marker(lap_index, drivers):
+    """Purple star on the overall fastest lap; always present (possibly empty) as the last lap trace."""
+    overall_fastest = overall_fastest_lap(lap_index, drivers)
+    names = {d['number']: d['name'] for d in drivers[:MAX_LAP_DRIVERS]}
+    fastest = lap_index.iloc[0:0] if overall_fastest is None else lap_index[
+        lap_index['DriverNumber'].isin(list(names)) & (lap_index['LapTime'] == overall_fastest)]
+    return {
+        'type': 'scatter', 'x': fastest['LapNumber'].tolist(), 'y': fastest['LapTime'].tolist(),
+        'text': [f"{names[drv]} FL" for drv in fastest['DriverNumber']],
+        'mode': 'markers', 'name': 'Fastest Lap', 'hoverinfo': 'x+y+text',
+        'marker': {'size': 12, 'color': FASTEST_COLOR, 'symbol': 'star', 'line': {'color': 'white', 'width': 1}},
+        'showlegend': False,
+    }
+
+
+@timed
+def lap_times_figure(lap_index, drivers):
+    # One trace per driver, in order, then the fastest-lap marker - the
+    # dashboard patches these by position when the selection changes
+    traces = [lap_time_trace(lap_index, driver) for driver in drivers[:MAX_LAP_DRIVERS]]
+    traces.append(fastest_lap_marker(lap_index, drivers))
+    return {'data': traces, 'layout': base_layout(175, x_title='Lap Number', y_title='Lap Time (s)')}
+
+
+def telemetry_drivers(telemetry, drivers):
+    """Drivers drawn on the telemetry-based figures, in order."""
+    return [driver for driver in drivers[:MAX_TELEMETRY_DRIVERS] if driver['number'] in telemetry]
+
+
+def speed_trace(tel, driver):
+    return {
+        'type': 'scatter', 'x': typed_array(tel['Distance']), 'y': typed_array(tel['Speed']),
+        'mode': 'lines', 'name': driver['name'],
+        'line': {'color': driver['color'], 'width': 3},
+    }
+
+
+@timed
+def speed_figure(telemetry, drivers):
+    traces = [speed_trace(telemetry[d['number']], d) for d in telemetry_drivers(telemetry, drivers)]
+    return {'data': traces, 'layout': base_layout(175, x_title='Distance (m)', y_title='Speed (km/h)')}
+
+
+TELEMETRY_ROWS = [('Speed', 'Speed'), ('Throttle', 'Throttle'), ('Brake', 'Brake'), ('Gear', 'nGear'),
+                  ('Longitudinal G', 'AccLong'), ('Lateral G', 'AccLat')]
+
+
+def telemetry_traces(tel, driver):
+    """One trace per TELEMETRY_ROWS row for a driver."""
+    traces = []
+    for row, (_, channel) in enumerate(TELEMETRY_ROWS, start=1):
+        xref, yref = axis_ref(row)
+        traces.append({
+            'type': 'scatter', 'x': typed_array(tel['Distance']), 'y': typed_array(tel[channel]),
+            'mode': 'lines', 'name': driver['name'], 'xaxis': xref, 'yaxis': yref,
+            'line': {'color': driver['color'], 'width': 2}, 'showlegend': row == 1,
+        })
+    return traces
+
+
+@timed
+def telemetry_figure(telemetry, drivers):
+    traces = []
+    for driver in telemetry_drivers(telemetry, drivers):
+        traces += telemetry_traces(telemetry[driver['number']], driver)
+    return {'data': traces, 'layout': stacked_layout([title for title, _ in TELEMETRY_ROWS], 420)}
+
+
+def friction_trace(tel, driver):
+    return {
+        'type': 'scatter', 'x': typed_array(tel['AccLat']), 'y': typed_array(tel['AccLong']),
+        'mode': 'markers', 'name': driver['name'],
+        'marker': {'size': 3, 'color': driver['color'], 'opacity': 0.6},
+    }
+
+
+@timed
+def friction_circle_figure(telemetry, drivers):
+    """Lateral vs longitudinal G of each driver's fastest lap, with 1-5 g reference rings."""
+    traces = [friction_trace(telemetry[d['number']], d) for d in telemetry_drivers(telemetry, drivers)]
+    rings = [{
+        'type': 'circle', 'x0': -g, 'x1': g, 'y0': -g, 'y1': g, 'xref': 'x', 'yref': 'y',
+        'line': {'color': COLORS['border'], 'width': 1, 'dash': 'dot'},
+    } for g in range(1, 6)]
+    return {'data': traces, 'layout': base_layout(
+        175, x_title='Lateral (g)', y_title='Longitudinal (g)', shapes=rings,
+        xaxis={'range': [-5.5, 5.5], 'zeroline': False}, yaxis={'scaleanchor': 'x', 'scaleratio': 1, 'zeroline': False},
+    )}
+
+
+def track_trace(tel, driver):
+    return {
+        'type': 'scatter', 'x': typed_array(tel['X']), 'y': typed_array(tel['Y']),
+        'mode': 'lines', 'name': driver['name'],
+        'line': {'color': driver['color'], 'width': 4},
+    }
+
+
+@timed
+def track_figure(telemetry, drivers):
+    traces = [track_trace(telemetry[d['number']], d) for d in telemetry_drivers(telemetry, drivers)]
+    hidden = {'showgrid': False, 'showticklabels': False, 'zeroline': False}
+    return {'data': traces, 'layout': base_layout(
+        250, font_size=9, margin=(10, 10, 10, 10),
+        xaxis=hidden, yaxis={**hidden, 'scaleanchor': 'x', 'scaleratio': 1},
+    )}
+
+
+def fastest_laps_rows(lap_index, drivers):
+    overall_fastest = overall_fastest_lap(lap_index, drivers)
+    rows = []
+    for driver in drivers[:MAX_LAP_DRIVERS]:
+        laps = _driver_laps(lap_index, driver['number'])
+        if laps.empty:
+            continue
+        best = laps.loc[laps['LapTime'].idxmin()]
+        rows.append({
+            'driver': driver['number'],
+            'name': driver['name'],
+            'color': driver['color'],
+            'lap': int(best['LapNumber']),
+            'time': float(best['LapTime']),
+            # Check if this is the overall fastest
+            'is_fastest_overall': bool(best['LapTime'] == overall_fastest),
+        })
+    return rows
+
+
+def all_laps_by_driver(lap_index, drivers):
+    all_laps_data = {}
+    max_laps = 0
+    for driver in drivers[:MAX_LAP_DRIVERS]:
+        laps = _driver_laps(lap_index, driver['number'])
+        if laps.empty:
+            continue
+        lap_dict = dict(zip(laps['LapNumber'].astype(int).tolist(), laps['LapTime'].tolist()))
+        max_laps = max(max_laps, max(lap_dict))
+        all_laps_data[driver['number']] = {'name': driver['name'], 'color': driver['color'], 'laps': lap_dict}
+    return all_laps_data, max_laps
+
+
+@timed
+def sector_times_figure(matrix, drivers, personal_best=None, sector_labels=('Sector 1', 'Sector 2', 'Sector 3')):
+    """Sector times per lap, one row per sector; personal_best (D x L x 3 mask) rings each driver's best sectors."""
+    traces = []
+    for driver in drivers[:MAX_LAP_DRIVERS]:
+        if driver['number'] not in matrix['drivers']:
+            continue
+        row_idx = matrix['drivers'].index(driver['number'])
+        sectors = matrix['sectors'][row_idx]
+        lap_numbers = list(range(1, len(sectors) + 1))
+        for row in range(1, len(sector_labels) + 1):
+            xref, yref = axis_ref(row)
+            marker = {'size': 3, 'color': driver['color']}
+            if personal_best is not None:
+                best = personal_best[row_idx, :, row - 1]
+                marker.update(size=[8 if pb else 3 for pb in best],
+                              line={'color': PERSONAL_BEST_COLOR, 'width': [2 if pb else 0 for pb in best]})
+            traces.append({
+                'type': 'scatter', 'x': lap_numbers, 'y': typed_array(sectors[:, row - 1]),
+                'mode': 'lines+markers', 'name': driver['name'], 'xaxis': xref, 'yaxis': yref,
+                'line': {'color': driver['color'], 'width': 2}, 'marker': marker,
+                'showlegend': row == 1,
+            })
+
+    return {'data': traces, 'layout': stacked_layout(list(sector_labels), 300, spacing=0.08)}
+
+
+@timed
+def speed_trap_figure(summary, drivers, trap_labels):
+    top = summary.set_index('DriverNumber')
+    traces = []
+    for driver in drivers[:MAX_LAP_DRIVERS]:
+        if driver['number'] not in top.index:
+            continue
+        traces.append({
+            'type': 'bar', 'x': list(trap_labels),
+            'y': [top.loc[driver['number'], f'Speed{label}'] for label in trap_labels],
+            'name': driver['name'], 'marker': {'color': driver['color']},
+        })
+
+    return {'data': traces, 'layout': base_layout(175, y_title='Top Speed (km/h)', barmode='group')}
+
+
+@timed
+def season_heatmap_figure(gaps):
+    trace = {
+        'type': 'heatmap', 'z': gaps.values, 'x': list(gaps.columns), 'y': list(gaps.index),
+        'colorscale': 'Viridis', 'reversescale': True, 'zmin': 0, 'zmax': 3,
+        'colorbar': {'title': {'text': 'Gap %'}},
+        'hovertemplate': '%{y} @ %{x}<br>+%{z:.2f}%<extra></extra>',
+    }
+    return {'data': [trace], 'layout': base_layout(max(250, 18 * len(gaps.index)), font_size=9, margin=(40, 20, 10, 80))}
+
+
+@timed
+def cross_year_figure(laps_by_year):
+    """Lap times of one driver per season; laps_by_year maps year -> (lap numbers, lap seconds)."""
+    traces = []
+    for year, (lap_numbers, lap_times) in laps_by_year.items():
+        color = YEAR_COLORS.get(year, '#ffffff')
+        traces.append({
+            'type': 'scatter', 'x': typed_array(lap_numbers), 'y': typed_array(lap_times),
+            'mode': 'lines+markers', 'name': str(year),
+            'line': {'color': color, 'width': 2}, 'marker': {'size': 4, 'color': color},
+        })
+
+    return {'data': traces, 'layout': base_layout(220, x_title='Lap Number', y_title='Lap Time (s)')}
+
+
+@timed
+def corner_speed_figure(telemetry, drivers, corners, metrics):
+    """Speed traces with every corner marked and each driver's apex annotated.
+
+    corners is the circuit's corner index, metrics maps driver number to its
+    corner metrics (see corners.corner_metrics).
+    """
+    traces = []
+    for driver in telemetry_drivers(telemetry, drivers):
+        traces.append(speed_trace(telemetry[driver['number']], driver))
+        result = metrics.get(driver['number'])
+        if result is None:
+            continue
+        apexes = result[result['ApexSpeed'].notna()]
+        traces.append({
+            'type': 'scatter', 'x': typed_array(apexes['ApexDistance'].to_numpy()), 'y': typed_array(apexes['ApexSpeed'].to_numpy()),
+            'text': [f"T{corner}" for corner in apexes['Corner']], 'mode': 'markers', 'name': f"{driver['name']} apex",
+            'hovertemplate': '%{text}: %{y:.0f} km/h @ %{x:.0f} m<extra>' + driver['name'] + '</extra>',
+            'marker': {'size': 7, 'color': driver['color'], 'symbol': 'triangle-up', 'line': {'color': 'white', 'width': 1}},
+            'showlegend': False,
+        })
+
+    shapes, annotations = [], []
+    for corner, distance in zip(corners['Corner'], corners['Distance']):
+        shapes.append({
+            'type': 'line', 'x0': distance, 'x1': distance, 'y0': 0, 'y1': 1, 'xref': 'x', 'yref': 'paper',
+            'line': {'color': COLORS['border'], 'width': 1, 'dash': 'dot'},
+        })
+        annotations.append({
+            'text': f"T{corner}", 'x': distance, 'y': 1, 'xref': 'x', 'yref': 'paper',
+            'yanchor': 'bottom', 'showarrow': False, 'font': {'size': 8, 'color': COLORS['text_secondary']},
+        })
+
+    return {'data': traces, 'layout': base_layout(
+        260, margin=(30, 20, 25, 30), x_title='Distance (m)', y_title='Speed (km/h)', shapes=shapes, annotations=annotations,
+    )}
+
+
+@timed
+def rolling_pace_figure(pace_laps, drivers):
+    """Fuel-corrected representative laps (markers) and rolling pace (line) per driver."""
+    traces = []
+    for driver in drivers[:MAX_LAP_DRIVERS]:
+        laps = pace_laps[pace_laps['DriverNumber'] == driver['number']]
+        color = driver['color']
+        traces.append({
+            'type': 'scatter', 'x': typed_array(laps['LapNumber'].to_numpy()), 'y': typed_array(laps['Corrected'].to_numpy()),
+            'mode': 'markers', 'name': driver['name'], 'legendgroup': driver['number'], 'showlegend': False,
+            'marker': {'size': 4, 'color': color, 'opacity': 0.4},
+        })
+        traces.append({
+            'type': 'scatter', 'x': typed_array(laps['LapNumber'].to_numpy()), 'y': typed_array(laps['Rolling'].to_numpy()),
+            'mode': 'lines', 'name': driver['name'], 'legendgroup': driver['number'],
+            'line': {'color': color, 'width': 2},
+        })
+
+    return {'data': traces, 'layout': base_layout(260, x_title='Lap Number', y_title='Fuel-corrected (s)')}
+
+
+@timed
+def pace_ranking_figure(summary, driver_colors):
+    """Whole-field pace spread: P25-P75 bar and median marker per driver, fastest on top."""
+    colors = [driver_colors.get(driver, '#ffffff') for driver in summary['DriverNumber']]
+    labels = summary['Driver'].tolist()
+    traces = [
+        {
+            'type': 'bar', 'orientation': 'h', 'y': labels, 'base': typed_array(summary['P25'].to_numpy()),
+            'x': typed_array((summary['P75'] - summary['P25']).to_numpy()), 'name': 'P25-P75',
+            'marker': {'color': colors, 'opacity': 0.5}, 'hoverinfo': 'skip', 'showlegend': False,
+        },
+        {
+            'type': 'scatter', 'y': labels, 'x': typed_array(summary['P50'].to_numpy()), 'mode': 'markers', 'name': 'Median',
+            'marker': {'size': 7, 'color': colors, 'line': {'color': 'white', 'width': 1}}, 'showlegend': False,
+            'hovertemplate': '%{y}: %{x:.3f}s<extra></extra>',
+        },
+    ]
+    return {'data': traces, 'layout': base_layout(
+        max(260, 16 * len(labels)), font_size=9, margin=(40, 20, 10, 30), x_title='Fuel-corrected lap (s)',
+        yaxis={'autorange': 'reversed'},
+    )}
+
+
+@timed
+def stint_overlay_figure(overlays):
+    """All clean laps of each stint as one NaN-separated trace, with the stint's best lap on top.
+
+    overlays is the output of stints.stint_overlays (distance/values per stint).
+    """
+    traces = []
+    for overlay in overlays:
+        color = COMPOUND_COLORS.get(overlay['compound'], '#ffffff')
+        label = f"Stint {overlay['stint']} · {overlay['compound'].title()}"
+        traces.append({
+            'type': 'scatter', 'x': typed_array(overlay['distance']), 'y': typed_array(overlay['values']),
+            'mode': 'lines', 'name': f"{label} ({overlay['laps']} laps)", 'legendgroup': str(overlay['stint']),
+            'line': {'color': color, 'width': 1}, 'opacity': 0.35, 'connectgaps': False, 'hoverinfo': 'skip',
+        })
+        if overlay['best'] is not None:
+            traces.append({
+                'type': 'scatter', 'x': typed_array(overlay['best_distance']), 'y': typed_array(overlay['best_values']),
+                'mode': 'lines', 'name': f"{label} best (L{overlay['best']})", 'legendgroup': str(overlay['stint']),
+                'line': {'color': color, 'width': 2.5},
+            })
+
+    return {'data': traces, 'layout': base_layout(260, x_title='Distance (m)', y_title='Speed (km/h)')}
+
+
+@timed
+def speed_heatmap_figure(z, x, y, title):
+    """One heatmap trace over the track grid (see heatmap.speed_heatmap); size independent of laps."""
+    hidden = {'showgrid': False, 'showticklabels': False, 'zeroline': False}
+    trace = {
+        'type': 'heatmap', 'z': typed_array(z), 'x': typed_array(x), 'y': typed_array(y),
+        'colorscale': 'Turbo', 'hoverongaps': False, 'name': title,
+        'colorbar': {'title': {'text': 'km/h'}, 'thickness': 10},
+        'hovertemplate': f'{title}: %{{z:.0f}} km/h<extra></extra>',
+    }
+    return {'data': [trace], 'layout': base_layout(
+        360, font_size=9, margin=(10, 10, 10, 10),
+        xaxis=hidden, yaxis={**hidden, 'scaleanchor': 'x', 'scaleratio': 1},
+    )}
+
+
+GEAR_COLORS = ['#636efa', '#00cc96', '#19d3f3', '#b6e880', '#fecb52', '#ffa15a', '#ef553b', '#ff6692']
+DRS_STATES = [('DRS closed', '#555555'), ('DRS available', '#fecb52'), ('DRS open', '#00cc96')]
+
+
+def state_runs(x, y, state):
+    """(x, y) of every run of consecutive equal states, grouped by state with NaN breaks between runs.
+
+    Each run also takes the first sample of the next run so the colored
+    segments join up. Returns {state: (x, y)} in ascending state order.
+    """
+    import numpy as np
+
+    state = np.asarray(state)
+    n = len(state)
+    if not n:
+        return {}
+    starts = np.flatnonzero(np.concatenate([[True], state[1:] != state[:-1]]))
+    lengths = np.concatenate([starts[1:] + 1, [n]]) - starts
+    run_states = state[starts]
+
+    runs = {}
+    for value in np.unique(run_states):
+        run_starts, run_lengths = starts[run_states == value], lengths[run_states == value]
+        total = int(run_lengths.sum())
+        # Sample i of run k goes after the previous runs plus one NaN gap per run
+        within = np.arange(total) - np.repeat(np.cumsum(run_lengths) - run_lengths, run_lengths)
+        source = np.repeat(run_starts, run_lengths) + within
+        target = np.repeat(np.cumsum(run_lengths + 1) - (run_lengths + 1), run_lengths) + within
+        xs = np.full(total + len(run_starts), np.nan, dtype=np.float32)
+        ys = np.full(total + len(run_starts), np.nan, dtype=np.float32)
+        xs[target], ys[target] = x[source], y[source]
+        runs[value.item()] = (xs, ys)
+    return runs
+
+
+def _state_map(tel, state, labels, colors):
+    traces = [{
+        'type': 'scatter', 'x': typed_array(xs), 'y': typed_array(ys),
+        'mode': 'lines', 'name': labels[value], 'connectgaps': False,
+        'line': {'color': colors[value % len(colors)], 'width': 4},
+    } for value, (xs, ys) in state_runs(tel['X'], tel['Y'], state).items()]
+    hidden = {'showgrid': False, 'showticklabels': False, 'zeroline': False}
+    return {'data': traces, 'layout': base_layout(
+        250, font_size=9, margin=(10, 10, 10, 10),
+        xaxis=hidden, yaxis={**hidden, 'scaleanchor': 'x', 'scaleratio': 1},
+    )}
+
+
+@timed
+def gear_map_figure(tel):
+    """Track map of a lap colored by gear: one trace per gear, not per segment."""
+    import numpy as np
+
+    gear = np.clip(np.nan_to_num(np.asarray(tel['nGear'], dtype=np.float64)), 0, 8).astype(np.int64)
+    labels = ['N'] + [f'Gear {g}' for g in range(1, 9)]
+    return _state_map(tel, gear, labels, ['#888888'] + GEAR_COLORS)
+
+
+@timed
+def drs_map_figure(tel):
+    """Track map of a lap colored by DRS state (FastF1: 8 = available, 10/12/14 = open)."""
+    import numpy as np
+
+    drs = np.nan_to_num(np.asarray(tel['DRS'], dtype=np.float64))
+    state = np.where(drs >= 10, 2, np.where(drs == 8, 1, 0))
+    labels, colors = zip(*DRS_STATES)
+    return _state_map(tel, state, labels, colors)
+
+
+RAIN_COLOR = 'rgba(66, 135, 245, 0.18)'
+TRACK_TEMP_COLOR = '#FF8E53'
+
+
+def rain_shapes(spans, pad=0.0):
+    """Shaded vertical bands over (start, end) spans of rain, widened by pad on both sides."""
+    return [{
+        'type': 'rect', 'xref': 'x', 'yref': 'paper', 'x0': start - pad, 'x1': end + pad, 'y0': 0, 'y1': 1,
+        'fillcolor': RAIN_COLOR, 'line': {'width': 0}, 'layer': 'below',
+    } for start, end in spans]
+
+
+@timed
+def weather_lap_figure(lap_index, drivers, conditions, spans):
+    """Lap times with the field's track-temperature band (right axis) and rainy laps shaded.
+
+    conditions is weather.conditions_by_lap, spans weather.rain_spans.
+    """
+    laps = typed_array(conditions['LapNumber'].to_numpy())
+    traces = [
+        {
+            'type': 'scatter', 'x': laps, 'y': typed_array(conditions['TrackTempMin'].to_numpy()), 'yaxis': 'y2',
+            'mode': 'lines', 'line': {'width': 0}, 'hoverinfo': 'skip', 'showlegend': False,
+        },
+        {
+            'type': 'scatter', 'x': laps, 'y': typed_array(conditions['TrackTempMax'].to_numpy()), 'yaxis': 'y2',
+            'mode': 'lines', 'line': {'width': 0}, 'fill': 'tonexty', 'fillcolor': 'rgba(255, 142, 83, 0.15)',
+            'hoverinfo': 'skip', 'showlegend': False,
+        },
+        {
+            'type': 'scatter', 'x': laps, 'y': typed_array(conditions['TrackTemp'].to_numpy()), 'yaxis': 'y2',
+            'mode': 'lines', 'name': 'Track temp', 'line': {'color': TRACK_TEMP_COLOR, 'width': 1, 'dash': 'dot'},
+        },
+    ]
+    traces += [lap_time_trace(lap_index, driver) for driver in drivers[:MAX_LAP_DRIVERS]]
+    return {'data': traces, 'layout': base_layout(
+        260, margin=(40, 40, 10, 30), x_title='Lap Number', y_title='Lap Time (s)', shapes=rain_shapes(spans, pad=0.5),
+        yaxis2={'title': {'text': 'Track (°C)'}, 'overlaying': 'y', 'side': 'right', 'showgrid': False},
+    )}
+
+
+@timed
+def weather_timeline_figure(weather, spans):
+    """Air and track temperature over the session (minutes), humidity on the right axis, rain spans shaded."""
+    minutes = weather['Time'].dt.total_seconds().to_numpy() / 60.0
+    traces = [
+        {'type': 'scatter', 'x': typed_array(minutes), 'y': typed_array(weather['TrackTemp'].to_numpy()),
+         'mode': 'lines', 'name': 'Track', 'line': {'color': TRACK_TEMP_COLOR, 'width': 2}},
+        {'type': 'scatter', 'x': typed_array(minutes), 'y': typed_array(weather['AirTemp'].to_numpy()),
+         'mode': 'lines', 'name': 'Air', 'line': {'color': '#FF6B6B', 'width': 2}},
+        {'type': 'scatter', 'x': typed_array(minutes), 'y': typed_array(weather['Humidity'].to_numpy()), 'yaxis': 'y2',
+         'mode': 'lines', 'name': 'Humidity', 'line': {'color': '#667EEA', 'width': 1, 'dash': 'dot'}},
+    ]
+    return {'data': traces, 'layout': base_layout(
+        175, margin=(40, 40, 10, 30), x_title='Session time (min)', y_title='°C', shapes=rain_shapes(spans),
+        yaxis2={'title': {'text': 'Humidity (%)'}, 'overlaying': 'y', 'side': 'right', 'showgrid': False},
+    )}
+
+
+@timed
+def qualifying_segment_figure(classification, segment, cut, driver_colors):
+    """Gap to the segment's fastest lap per driver, fastest on top, with the elimination cut line."""
+    ranked = classification[classification[segment].notna()].sort_values(segment)
+    gaps = ranked[f'{segment}Gap'].to_numpy()
+    labels = ranked['Driver'].tolist()
+    traces = [{
+        'type': 'bar', 'orientation': 'h', 'y': labels, 'x': typed_array(gaps), 'name': segment,
+        'marker': {'color': [driver_colors.get(driver, '#ffffff') for driver in ranked['DriverNumber']]},
+        'hovertemplate': '%{y}: +%{x:.3f}s<extra></extra>', 'showlegend': False,
+    }]
+    shapes = []
+    if cut is not None and len(ranked):
+        cut_gap = cut - ranked[segment].min()
+        shapes.append({
+            'type': 'line', 'xref': 'x', 'yref': 'paper', 'x0': cut_gap, 'x1': cut_gap, 'y0': 0, 'y1': 1,
+            'line': {'color': '#e74c3c', 'width': 1, 'dash': 'dash'},
+        })
+    return {'data': traces, 'layout': base_layout(
+        max(200, 14 * len(labels)), font_size=9, margin=(40, 10, 10, 30), x_title='Gap (s)', shapes=shapes,
+        yaxis={'autorange': 'reversed'},
+    )}
+
+
+@timed
+def pole_delta_figure(deltas, drivers):
+    """Time lost to the pole sitter's fastest lap over distance, one line per driver (+ = behind)."""
+    traces = []
+    for driver in drivers:
+        if driver['number'] in deltas:
+            distance, delta = deltas[driver['number']]
+            traces.append({
+                'type': 'scatter', 'x': typed_array(distance), 'y': typed_array(delta),
+                'mode': 'lines', 'name': driver['name'], 'line': {'color': driver['color'], 'width': 2},
+            })
+    return {'data': traces, 'layout': base_layout(
+        200, x_title='Distance (m)', y_title='Delta to pole (s)', yaxis={'zeroline': True, 'zerolinecolor': '#888888'},
+    )}
+
+
+OVERTAKE_COLORS = {'On track': '#00cc96', 'DRS': '#fecb52', 'Pit': '#888888'}
+
+
+@timed
+def overtake_map_figure(outline, events, names):
+    """Track outline with one marker trace per pass type; hover shows who passed whom on which lap.
+
+    outline is a lap's telemetry arrays (X/Y), events an overtakes table.
+    """
+    traces = [{
+        'type': 'scatter', 'x': typed_array(outline['X']), 'y': typed_array(outline['Y']),
+        'mode': 'lines', 'line': {'color': COLORS['border'], 'width': 6}, 'hoverinfo': 'skip', 'showlegend': False,
+    }]
+    for kind, color in OVERTAKE_COLORS.items():
+        passes = events[events['Type'] == kind]
+        traces.append({
+            'type': 'scatter', 'x': typed_array(passes['X'].to_numpy()), 'y': typed_array(passes['Y'].to_numpy()),
+            'mode': 'markers', 'name': f"{kind} ({len(passes)})",
+            'text': [f"{names.get(a, a)} passes {names.get(b, b)} · L{lap}"
+                     for a, b, lap in zip(passes['Driver'], passes['Passed'], passes['Lap'])],
+            'hoverinfo': 'text', 'marker': {'size': 8, 'color': color, 'line': {'color': 'white', 'width': 1}},
+        })
+    hidden = {'showgrid': False, 'showticklabels': False, 'zeroline': False}
+    return {'data': traces, 'layout': base_layout(
+        320, font_size=9, margin=(10, 10, 10, 10),
+        xaxis=hidden, yaxis={**hidden, 'scaleanchor': 'x', 'scaleratio': 1},
+    )}
+
+
+@timed
+def strategy_timeline_figure(stints, order, names):
+    """Stint bars for the whole field, one bar trace per compound, drivers in `order` top to bottom."""
+    rank = {driver: idx for idx, driver in enumerate(order)}
+    stints = stints[stints['DriverNumber'].isin(rank)]
+    traces = []
+    for compound, group in stints.groupby('Compound', sort=False):
+        traces.append({
+            'type': 'bar', 'orientation': 'h', 'name': compound.title(),
+            'y': [names.get(driver, driver) for driver in group['DriverNumber']],
+            'base': typed_array(group['StartLap'].to_numpy() - 1), 'x': typed_array(group['Laps'].to_numpy()),
+            'marker': {'color': COMPOUND_COLORS.get(compound, '#9b87f5'), 'line': {'color': COLORS['card_bg'], 'width': 1}},
+            'hovertemplate': f"%{{y}} {compound.title()}: %{{x}} laps<extra></extra>",
+        })
+    labels = [names.get(driver, driver) for driver in order]
+    return {'data': traces, 'layout': base_layout(
+        max(260, 16 * len(labels)), font_size=9, margin=(40, 20, 10, 30), x_title='Lap', barmode='overlay',
+        yaxis={'categoryorder': 'array', 'categoryarray': labels, 'autorange': 'reversed'},
+    )}
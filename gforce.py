@@ -0,0 +1,69 @@
+"""
+Derived acceleration channels for the F1 Telemetry Dashboard
+Longitudinal and lateral G from Speed, Distance and the X/Y position trace,
+with moving-average smoothing and central differences over distance
+"""
+
+import numpy as np
+
+G = 9.80665
+# Samples in the centered moving average applied before differentiating
+SMOOTHING_SAMPLES = 9
+# FastF1 positions are in 1/10 m
+POSITION_SCALE = 0.1
+# Anything beyond this is differentiation noise, not an F1 car
+MAX_G = 6.0
+
+
+def smooth(values, window=SMOOTHING_SAMPLES):
+    """Centered moving average, edges padded with the end values."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return values
+    half = window // 2
+    padded = np.pad(values, (half, window - 1 - half), mode='edge')
+    return np.convolve(padded, np.ones(window) / window, mode='valid')
+
+
+def derivative(values, coords):
+    """d(values)/d(coords) by central differences; repeated coords are interpolated over."""
+    dv = np.gradient(values)
+    dc = np.gradient(coords)
+    valid = np.abs(dc) > 1e-6
+    result = np.full(len(values), np.nan)
+    result[valid] = dv[valid] / dc[valid]
+    if valid.any() and not valid.all():
+        idx = np.arange(len(values))
+        result[~valid] = np.interp(idx[~valid], idx[valid], result[valid])
+    return result
+
+
+def acceleration_channels(distance, speed, x, y):
+    """Longitudinal (+ = accelerating) and lateral (+ = turning left) acceleration in g."""
+    if len(distance) < 3:
+        nan = np.full(len(distance), np.nan)
+        return nan, nan.copy()
+    v = smooth(speed) / 3.6
+    s = np.asarray(distance, dtype=np.float64)
+    longitudinal = v * derivative(v, s) / G
+
+    # Lateral: v^2 * curvature, curvature = change of heading per metre of path
+    px, py = smooth(x) * POSITION_SCALE, smooth(y) * POSITION_SCALE
+    path = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(px), np.diff(py)))])
+    heading = np.unwrap(np.arctan2(np.gradient(py), np.gradient(px)))
+    lateral = v ** 2 * smooth(derivative(heading, path)) / G
+
+    return np.clip(longitudinal, -MAX_G, MAX_G), np.clip(lateral, -MAX_G, MAX_G)
+
+
+def add_acceleration_channels(telemetry):
+    """Add AccLong/AccLat (g, float32) to a merged telemetry frame in place."""
+    longitudinal, lateral = acceleration_channels(
+        telemetry['Distance'].to_numpy(dtype=np.float64),
+        telemetry['Speed'].to_numpy(dtype=np.float64),
+        telemetry['X'].to_numpy(dtype=np.float64),
+        telemetry['Y'].to_numpy(dtype=np.float64),
+    )
+    telemetry['AccLong'] = longitudinal.astype(np.float32)
+    telemetry['AccLat'] = lateral.astype(np.float32)
+    return telemetry
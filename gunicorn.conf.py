@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for the F1 Telemetry Dashboard
+
+The app is imported once in the master (preload_app) and its heavy
+dependencies - and optionally some sessions - are warmed there too, so
+forked workers start instantly and share those pages copy-on-write.
+
+Requests are I/O bound (a cold session.load() waits on the network for
+tens of seconds), so each worker serves many requests concurrently with
+threads (gthread, the default) or greenlets (gevent, if installed) instead
+of blocking on one load.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+preload_app = True
+
+# Worker model: gthread | gevent | sync
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '100'))
+
+# Timeout policy: gthread and gevent workers heartbeat from their main loop,
+# so this only recycles a genuinely stuck worker; a slow session load is
+# bounded in the app instead (F1_LOAD_TIMEOUT) and keeps loading in the background
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers fork
+    import f1_dashboard
+    f1_dashboard.preload()
+    server.log.info(f"F1 dashboard dependencies preloaded ({worker_class} workers, {threads} threads)")
+
+
+def post_worker_init(worker):
+    # Every worker starts the ingest thread, but only the holder of the ingest
+    # lock loads sessions; the others pick them up from the warmed disk cache
+    # and one of them takes over if the holder exits
+    if os.environ.get('F1_INGEST', '0') == '1':
+        import ingest
+        ingest.start_daemon()
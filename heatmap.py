@@ -0,0 +1,105 @@
+"""
+Whole-session speed heatmaps for the F1 Telemetry Dashboard
+Every position sample of every lap is binned into a fixed track grid with
+bincount once per session; any driver selection is then a sum of grids,
+so the figure size does not depend on the number of laps
+"""
+
+import numpy as np
+
+from sessions import per_session_cache
+
+# Cells along the longer side of the track's bounding box
+GRID_CELLS = 160
+# Cells need this many samples to be drawn
+MIN_SAMPLES = 2
+
+
+def track_grid(positions):
+    """Square-cell grid covering every (x, y) array in `positions`.
+
+    Returns a dict with ``x0``/``y0`` (lower-left corner), ``cell`` (size)
+    and ``shape`` (rows, columns).
+    """
+    x = np.concatenate([p[0] for p in positions])
+    y = np.concatenate([p[1] for p in positions])
+    x0, y0 = float(np.nanmin(x)), float(np.nanmin(y))
+    cell = max(float(np.nanmax(x)) - x0, float(np.nanmax(y)) - y0) / GRID_CELLS or 1.0
+    shape = (int((np.nanmax(y) - y0) // cell) + 1, int((np.nanmax(x) - x0) // cell) + 1)
+    return {'x0': x0, 'y0': y0, 'cell': cell, 'shape': shape}
+
+
+def bin_speed(grid, x, y, speed):
+    """Sample count, speed sum and max speed per grid cell (flat arrays)."""
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(speed)
+    rows = ((y[valid] - grid['y0']) // grid['cell']).astype(np.int64)
+    cols = ((x[valid] - grid['x0']) // grid['cell']).astype(np.int64)
+    cells = np.ravel_multi_index((rows, cols), grid['shape'], mode='clip')
+    size = grid['shape'][0] * grid['shape'][1]
+    count = np.bincount(cells, minlength=size)
+    total = np.bincount(cells, weights=speed[valid], minlength=size)
+    peak = np.full(size, -np.inf)
+    np.maximum.at(peak, cells, speed[valid])
+    return count, total, peak
+
+
+def lap_samples(car_data, pos_data, laps):
+    """Position samples inside the driver's laps with speed interpolated from the car data."""
+    pos_time = pos_data['SessionTime'].dt.total_seconds().to_numpy()
+    car_time = car_data['SessionTime'].dt.total_seconds().to_numpy()
+    speed = np.interp(pos_time, car_time, car_data['Speed'].to_numpy(dtype=np.float64),
+                      left=np.nan, right=np.nan)
+
+    # A sample is on a lap when it falls between some lap's start and end
+    start = laps['LapStartTime'].dt.total_seconds().to_numpy()
+    end = laps['Time'].dt.total_seconds().to_numpy()
+    order = np.argsort(start)
+    lap = np.searchsorted(start[order], pos_time, side='right') - 1
+    on_lap = (lap >= 0) & (pos_time <= end[order][np.maximum(lap, 0)])
+    return (pos_data['X'].to_numpy(dtype=np.float64)[on_lap],
+            pos_data['Y'].to_numpy(dtype=np.float64)[on_lap],
+            speed[on_lap])
+
+
+def build_speed_grid(samples):
+    """Grid and per-driver (count, sum, max) cells from {driver: (x, y, speed)}."""
+    grid = track_grid(list(samples.values()))
+    grid['drivers'] = {driver: bin_speed(grid, *values) for driver, values in samples.items()}
+    return grid
+
+
+@per_session_cache('speed_grid', max_entries=16)
+def get_speed_grid(session):
+    samples = {}
+    for driver in session.drivers:
+        laps = session.laps.pick_driver(driver)
+        laps = laps[laps['LapStartTime'].notna() & laps['Time'].notna()]
+        if laps.empty or driver not in session.car_data or driver not in session.pos_data:
+            continue
+        samples[driver] = lap_samples(session.car_data[driver], session.pos_data[driver], laps)
+    if not samples:
+        return None
+    return build_speed_grid(samples)
+
+
+def speed_heatmap(grid, drivers, stat='mean'):
+    """Mean or max speed per cell over the selected drivers' laps.
+
+    Returns (z, x, y): a rows x columns float32 array (NaN for cells with
+    fewer than MIN_SAMPLES samples) and the cell-center coordinates.
+    """
+    size = grid['shape'][0] * grid['shape'][1]
+    count, total, peak = np.zeros(size, dtype=np.int64), np.zeros(size), np.full(size, -np.inf)
+    for driver in drivers:
+        if driver in grid['drivers']:
+            driver_count, driver_total, driver_peak = grid['drivers'][driver]
+            count += driver_count
+            total += driver_total
+            np.maximum(peak, driver_peak, out=peak)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = total / count if stat == 'mean' else peak
+    z = np.where(count >= MIN_SAMPLES, values, np.nan).astype(np.float32).reshape(grid['shape'])
+    x = grid['x0'] + (np.arange(grid['shape'][1]) + 0.5) * grid['cell']
+    y = grid['y0'] + (np.arange(grid['shape'][0]) + 0.5) * grid['cell']
+    return z, x, y
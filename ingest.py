@@ -0,0 +1,250 @@
+"""
+Ingest scheduler for the F1 Telemetry Dashboard
+Watches the event schedule for sessions that have just finished, loads them
+in the background (retrying with exponential backoff until the data is
+published), compacts them and runs the per-session precompute stages, so
+the first user after a session does not pay the cold load
+
+    python ingest.py --once                          # ingest what is due now and exit
+    python ingest.py --now 2024-12-08T16:30 --once   # pretend it is that time
+    python load_test.py 2024 "Abu Dhabi" R --make-snapshot fixtures/abu_dhabi.tar.gz   # once, with network
+    F1_OFFLINE=1 F1_INGEST_SESSIONS=R F1_CACHE_SNAPSHOT=fixtures/abu_dhabi.tar.gz python ingest.py --now 2024-12-08T16:30 --once
+
+In the server (F1_INGEST=1, see gunicorn.conf.py) every worker starts a
+daemon thread, but only the one holding the ingest file lock polls and
+loads; the others stand by to take over and serve new sessions from the
+disk cache it warms.
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from disk_cache import CACHE_DIR, inventory
+from sessions import SESSION_CODES, get_event_schedule, get_session, memory_reports, session_cache, session_key
+
+INGEST_SESSIONS = os.environ.get('F1_INGEST_SESSIONS', 'Q,R').split(',')
+# Data is published some time after a session starts; don't try before this
+INGEST_DELAY = timedelta(minutes=float(os.environ.get('F1_INGEST_DELAY_MIN', '120')))
+# Sessions older than this are left to on-demand loading
+INGEST_LOOKBACK = timedelta(days=float(os.environ.get('F1_INGEST_LOOKBACK_DAYS', '3')))
+POLL_S = float(os.environ.get('F1_INGEST_POLL_S', '600'))
+RETRY_S = float(os.environ.get('F1_INGEST_RETRY_S', '60'))
+MAX_BACKOFF_S = float(os.environ.get('F1_INGEST_MAX_BACKOFF_S', '1800'))
+MAX_ATTEMPTS = int(os.environ.get('F1_INGEST_MAX_ATTEMPTS', '10'))
+# One process per cache directory ingests; the lock is released when it exits
+LOCK_PATH = os.environ.get('F1_INGEST_LOCK', os.path.join(CACHE_DIR, '.ingest.lock'))
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def due_sessions(schedule, now, session_codes=INGEST_SESSIONS):
+    """Sessions of the schedule whose data should be out by `now`, within INGEST_LOOKBACK.
+
+    Returns dicts with ``key`` (dashboard session key), ``name`` and
+    ``start`` (UTC, naive), oldest first.
+    """
+    due = []
+    for _, event in schedule.iterrows():
+        for slot in range(1, 6):
+            name, start = event.get(f'Session{slot}'), event.get(f'Session{slot}DateUtc')
+            code = SESSION_CODES.get(name)
+            if code not in session_codes or start is None or start != start:
+                continue
+            start = start.to_pydatetime().replace(tzinfo=None)
+            if start + INGEST_DELAY <= now <= start + INGEST_LOOKBACK:
+                due.append({'key': session_key(start.year, event['EventName'], code), 'name': name, 'start': start})
+    return sorted(due, key=lambda session: session['start'])
+
+
+def on_disk(entries, year, event_name, session_name):
+    """Whether the FastF1 disk cache already has this session (directories are <date>_<Name_With_Underscores>)."""
+    event_suffix, session_suffix = event_name.replace(' ', '_'), session_name.replace(' ', '_')
+    return any(entry['year'] == year and entry['event'].endswith(event_suffix)
+               and entry['session'].endswith(session_suffix) for entry in entries)
+
+
+def precompute(session, session_type, log=print):
+    """Fill the per-session caches the dashboard views read first."""
+    from corners import get_corner_index
+    from pace import get_race_pace
+    from qualifying import get_qualifying
+    from sessions import fastest_arrays, get_lap_index
+    from strategy import get_strategy
+    from weather import get_lap_weather
+
+    stages = [
+        ('lap index', get_lap_index),
+        ('fastest laps', lambda s: fastest_arrays(s, list(s.drivers))),
+        ('corner index', get_corner_index),
+        ('weather', get_lap_weather),
+    ]
+    if session_type in ('R', 'S'):
+        stages += [('race pace', get_race_pace), ('strategy', get_strategy)]
+    if session_type in ('Q', 'SQ', 'SS'):
+        stages += [('qualifying', get_qualifying)]
+    for name, stage in stages:
+        start = time.perf_counter()
+        try:
+            stage(session)
+        except Exception as e:
+            # A missing channel must not cost the rest of the warm-up
+            log(f"   ⚠️  {name}: {e}")
+            continue
+        log(f"   ✓ {name} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts` (1-based): exponential, capped, with jitter."""
+    return min(RETRY_S * 2 ** (attempts - 1), MAX_BACKOFF_S) * random.uniform(0.8, 1.2)
+
+
+class IngestScheduler:
+    """Polls the schedule and ingests due sessions; clock, schedule and loader are injectable for tests."""
+
+    def __init__(self, now=utc_now, schedule=get_event_schedule, load=get_session, log=print):
+        self.now = now
+        self.schedule = schedule
+        self.load = load
+        self.log = log
+        self.attempts = {}
+        self.retry_at = {}
+        self.ingested = set()
+        self.stop = threading.Event()
+
+    def pending(self):
+        """Due sessions that are not hot in memory yet, with whether FastF1 has them on disk."""
+        now = self.now()
+        try:
+            due = due_sessions(self.schedule(now.year), now)
+        except Exception as e:
+            self.log(f"⚠️  Schedule unavailable: {e}")
+            return []
+        entries = inventory()
+        pending = []
+        for session in due:
+            if session['key'] in session_cache or self.attempts.get(session['key'], 0) >= MAX_ATTEMPTS:
+                continue
+            session['on_disk'] = on_disk(entries, *session['key'][:2], session['name'])
+            pending.append(session)
+        return pending
+
+    def ingest(self, session):
+        """Load, verify, compact (in get_session) and precompute one session; False to retry later."""
+        key = session['key']
+        source = 'disk cache' if session['on_disk'] else 'live timing'
+        self.log(f"📥 Ingesting {key[0]} {key[1]} {key[2]} from {source}")
+        start = time.perf_counter()
+        try:
+            loaded = self.load(*key)
+            if loaded.laps.empty:
+                raise ValueError('no laps published yet')
+        except Exception as e:
+            # Never leave a half-published session where users would get it
+            session_cache.pop(key)
+            memory_reports.pop(key, None)
+            attempts = self.attempts[key] = self.attempts.get(key, 0) + 1
+            delay = backoff(attempts)
+            self.retry_at[key] = time.monotonic() + delay
+            self.log(f"   ⏳ not ready ({e}); attempt {attempts}/{MAX_ATTEMPTS}, retrying in {delay:.0f}s")
+            return False
+        self.log(f"   loaded in {time.perf_counter() - start:.1f}s")
+        precompute(loaded, key[2], self.log)
+        self.attempts.pop(key, None)
+        self.retry_at.pop(key, None)
+        self.ingested.add(key)
+        return True
+
+    def run_once(self):
+        """Ingest every pending session whose backoff has elapsed; returns the number ingested."""
+        ingested = 0
+        for session in self.pending():
+            if self.stop.is_set():
+                break
+            if self.retry_at.get(session['key'], 0) > time.monotonic():
+                continue
+            ingested += self.ingest(session)
+        return ingested
+
+    def next_wake(self):
+        """Seconds until the next poll or the earliest retry, whichever comes first."""
+        retries = [at - time.monotonic() for at in self.retry_at.values()]
+        return max(1.0, min([POLL_S] + retries))
+
+    def run(self):
+        while not self.stop.is_set():
+            self.run_once()
+            self.stop.wait(self.next_wake())
+
+
+def acquire_lock(path=LOCK_PATH):
+    """Take the ingest lock without blocking; returns the open lock file to keep, or None if another process has it."""
+    import fcntl
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def run_exclusive(scheduler, lock_path=LOCK_PATH):
+    """Run the scheduler once this process holds the ingest lock, checking again every POLL_S until then."""
+    while not scheduler.stop.is_set():
+        scheduler.lock = acquire_lock(lock_path)
+        if scheduler.lock is not None:
+            print(f"📥 Session ingest running in pid {os.getpid()} ({', '.join(INGEST_SESSIONS)}, polling every {POLL_S:.0f}s)")
+            scheduler.run()
+            return
+        scheduler.stop.wait(POLL_S)
+
+
+_daemon = None
+
+
+def start_daemon(lock_path=LOCK_PATH, **kwargs):
+    """Start the scheduler in a daemon thread (once per process); it ingests only while holding the lock."""
+    global _daemon
+    if _daemon is None:
+        _daemon = IngestScheduler(**kwargs)
+        threading.Thread(target=run_exclusive, args=(_daemon, lock_path), name='session-ingest', daemon=True).start()
+    return _daemon
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest newly published sessions into the session cache')
+    parser.add_argument('--once', action='store_true', help='ingest what is due now (with retries) and exit')
+    parser.add_argument('--now', type=datetime.fromisoformat, help='UTC time to pretend it is, e.g. 2024-12-08T16:30')
+    args = parser.parse_args()
+
+    now = utc_now
+    if args.now:
+        # Shift the pretend clock along with real time so backoff still works
+        offset = args.now - utc_now()
+        now = lambda: utc_now() + offset  # noqa: E731
+    scheduler = IngestScheduler(now=now)
+    if not args.once:
+        scheduler.run()
+        return
+
+    pending = scheduler.pending()
+    print(f"\n🗓️  {len(pending)} session(s) due at {scheduler.now():%Y-%m-%d %H:%M} UTC")
+    while pending:
+        scheduler.run_once()
+        # Done once everything due is hot or out of attempts
+        pending = scheduler.pending()
+        if pending:
+            scheduler.stop.wait(scheduler.next_wake())
+    print(f"\n✅ {len(scheduler.ingested)} session(s) hot: {sorted(scheduler.ingested)}")
+
+
+if __name__ == '__main__':
+    main()
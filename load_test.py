@@ -0,0 +1,324 @@
+"""
+Load test for the F1 Telemetry Dashboard
+Simulated users replay the browser's callback sequence (update_races,
+load_session, create_driver_selector, update_charts with driver toggles)
+against the real Dash callback endpoint; reports latency percentiles,
+throughput and error rates per callback
+
+    python load_test.py 2024 "Abu Dhabi" R --users 50 --duration 30
+    python load_test.py 2024 "Abu Dhabi" R --serve --worker-class gthread --threads 8
+    python load_test.py 2024 "Abu Dhabi" R --make-snapshot fixtures/abu_dhabi.tar.gz
+    python load_test.py 2024 "Abu Dhabi" R --serve --offline fixtures/abu_dhabi.tar.gz
+
+--offline needs a disk_cache snapshot of the session; --make-snapshot builds
+one (once, with network access) by loading the session into a fresh FastF1
+cache directory and archiving it, HTTP cache included, with disk_cache.snapshot.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from bench_startup import HERE, free_port, wait_for
+
+
+class DashClient:
+    """Minimal client for a Dash app's callback endpoint, driven by /_dash-dependencies."""
+
+    def __init__(self, url, timeout=120):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.callbacks = self.get_json('/_dash-dependencies')
+
+    def request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        req = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return response.status, response.read()
+
+    def get_json(self, path):
+        return json.loads(self.request(path)[1])
+
+    def spec(self, output):
+        """Callback spec whose outputs include `output` ("component-id.property")."""
+        for spec in self.callbacks:
+            if output in spec['output'].strip('.').split('...'):
+                return spec
+        raise KeyError(output)
+
+    @staticmethod
+    def _outputs(spec, pattern_ids):
+        outputs = []
+        for part in spec['output'].strip('.').split('...'):
+            component, prop = part.rsplit('.', 1)
+            if component.startswith('{'):
+                # ALL wildcard: the concrete ids currently on the page
+                pattern = json.loads(component)
+                outputs.append([{'id': {'type': pattern['type'], 'name': name}, 'property': prop}
+                                for name in pattern_ids.get(pattern['type'], [])])
+            else:
+                outputs.append({'id': component, 'property': prop})
+        return outputs if spec['output'].startswith('..') else outputs[0]
+
+    def call(self, output, values, changed, pattern_ids=None):
+        """Fire the callback producing `output`; values maps "id.property" to the current value.
+
+        Returns the response dict ({component id: {property: value}}), empty
+        when the server sent no update.
+        """
+        spec = self.spec(output)
+
+        def fill(deps):
+            return [{**dep, 'value': values.get(f"{dep['id']}.{dep['property']}")} for dep in deps]
+
+        body = {
+            'output': spec['output'],
+            'outputs': self._outputs(spec, pattern_ids or {}),
+            'inputs': fill(spec['inputs']),
+            'state': fill(spec['state']),
+            'changedPropIds': changed,
+        }
+        status, payload = self.request('/_dash-update-component', body)
+        if status == 204 or not payload:
+            return {}
+        return json.loads(payload)['response']
+
+
+def find_pattern_ids(tree, found=None):
+    """Pattern-matching ids (type -> names) inside a rendered component tree."""
+    found = {} if found is None else found
+    if isinstance(tree, dict):
+        component_id = tree.get('props', {}).get('id') if 'props' in tree else None
+        if isinstance(component_id, dict):
+            found.setdefault(component_id['type'], []).append(component_id['name'])
+        for value in tree.values():
+            find_pattern_ids(value, found)
+    elif isinstance(tree, list):
+        for value in tree:
+            find_pattern_ids(value, found)
+    return found
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind, fn):
+        start = time.perf_counter()
+        try:
+            return fn()
+        except (OSError, ValueError, KeyError) as e:
+            with self.lock:
+                self.errors.setdefault(kind, []).append(str(e))
+            return None
+        finally:
+            with self.lock:
+                self.latencies.setdefault(kind, []).append((time.perf_counter() - start) * 1000.0)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def find_component(tree, component_id):
+    """Props of the component with `component_id` inside a rendered component tree (None if absent)."""
+    if isinstance(tree, dict):
+        props = tree.get('props')
+        if isinstance(props, dict) and props.get('id') == component_id:
+            return props
+        tree = list(tree.values())
+    if isinstance(tree, list):
+        for value in tree:
+            found = find_component(value, component_id)
+            if found is not None:
+                return found
+    return None
+
+
+def journey(client, args, stats, stop):
+    """One user visit, replaying the callbacks the browser fires in order.
+
+    update_races -> load_session -> create_driver_selector -> update_charts,
+    then --toggles driver additions/removals on the rendered comparison.
+    """
+    def callback(name, output, values, changed, pattern_ids=None):
+        return stats.record(name, lambda: client.call(output, values, changed, pattern_ids))
+
+    stats.record('page', lambda: client.request('/'))
+    values = {'year-dropdown.value': args.year}
+    if callback('update_races', 'race-dropdown.options', values, ['year-dropdown.value']) is None:
+        return
+
+    values.update({'load-button.n_clicks': 1, 'race-dropdown.value': args.race, 'session-dropdown.value': args.session_type})
+
+    def load():
+        response = client.call('session-data.data', values, ['load-button.n_clicks'])
+        if not (response.get('session-data') or {}).get('data'):
+            raise ValueError('session did not load (still loading or failed)')
+        return response
+    response = stats.record('load_session', load)
+    if response is None:
+        return
+    values['session-data.data'] = session_data = response['session-data']['data']
+
+    response = callback('create_driver_selector', 'driver-selector-container.children', values, ['session-data.data'])
+    selector = find_component((response or {}).get('driver-selector-container'), 'driver-selector')
+    if selector is None:
+        return
+    values.update({'driver-selector.value': selector['value'], 'view-tabs.value': 'overview', 'rendered-selection.data': None})
+
+    drivers = [d['number'] for d in session_data['drivers']]
+    default = list(selector['value'])
+    extra = [drv for drv in drivers if drv not in default]
+    pattern_ids = {}
+    for toggle in range(args.toggles + 1):
+        if stop.is_set():
+            return
+        if toggle:
+            # Odd toggles add one more driver, even toggles go back to the default pair
+            values['driver-selector.value'] = default + [extra[(toggle // 2) % len(extra)]] if toggle % 2 and extra else default
+        response = callback('update_charts', 'charts-container.children', values, ['driver-selector.value'], pattern_ids)
+        if response:
+            charts = (response.get('charts-container') or {}).get('children')
+            if charts is not None:
+                pattern_ids = find_pattern_ids(charts)
+            values['rendered-selection.data'] = (response.get('rendered-selection') or {}).get('data')
+
+
+def user(client, args, stats, stop, journeys):
+    while not stop.is_set():
+        journey(client, args, stats, stop)
+        with stats.lock:
+            journeys.append(time.perf_counter())
+
+
+def make_snapshot(year, race, session_type, archive):
+    """Load one session into an empty FastF1 cache and archive it for --offline runs."""
+    archive = os.path.abspath(archive)
+    os.makedirs(os.path.dirname(archive), exist_ok=True)
+    env = dict(os.environ, FASTF1_CACHE_DIR=tempfile.mkdtemp(prefix='f1_snapshot_'), F1_OFFLINE='0')
+    env.pop('F1_CACHE_SNAPSHOT', None)
+    code = ('import sys, disk_cache, sessions; '
+            'sessions.get_session(int(sys.argv[1]), sys.argv[2], sys.argv[3]); '
+            'disk_cache.snapshot(sys.argv[4])')
+    if subprocess.run([sys.executable, '-c', code, str(year), race, session_type, archive], cwd=HERE, env=env).returncode:
+        raise SystemExit("Could not load the session for the snapshot (it needs network access)")
+    return archive
+
+
+def serve(worker_class, threads, workers, offline=None):
+    """Start gunicorn with gunicorn.conf.py on a free port; returns (process, base url).
+
+    With `offline` (a disk_cache snapshot), the server gets a fresh cache
+    directory rehydrated from it and FastF1 runs in offline mode.
+    """
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_THREADS=str(threads), WEB_CONCURRENCY=str(workers))
+    if offline:
+        env.update({'F1_OFFLINE': '1', 'F1_CACHE_SNAPSHOT': os.path.abspath(offline),
+                    'FASTF1_CACHE_DIR': tempfile.mkdtemp(prefix='f1_load_test_')})
+    cmd = [sys.executable, '-m', 'gunicorn', 'f1_dashboard:server', '--config', 'gunicorn.conf.py']
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    if not wait_for(url + '/_dash-dependencies', time.perf_counter() + 60):
+        proc.terminate()
+        raise SystemExit("gunicorn did not start")
+    return proc, url
+
+
+def report(stats, elapsed, journeys):
+    total = sum(len(values) for values in stats.latencies.values())
+    print("\n" + "=" * 78)
+    print(f"{'callback':<24}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'req/s':>7}{'errors':>10}")
+    for kind, values in stats.latencies.items():
+        errors = len(stats.errors.get(kind, []))
+        print(f"{kind:<24}{len(values):>7}{percentile(values, 50):>9.1f}{percentile(values, 95):>9.1f}"
+              f"{percentile(values, 99):>9.1f}{max(values):>9.1f}{len(values) / elapsed:>7.1f}"
+              f"{100.0 * errors / len(values):>9.1f}%")
+    print(f"\n✅ {total} requests, {len(journeys)} user journeys in {elapsed:.1f}s: "
+          f"{total / elapsed:.1f} req/s, {len(journeys) / elapsed:.2f} journeys/s")
+    for kind, errors in stats.errors.items():
+        print(f"  ✗ {kind}: {len(errors)} x {errors[0]}")
+    print("=" * 78 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay user sessions against the dashboard with simulated users')
+    parser.add_argument('year', type=int)
+    parser.add_argument('race')
+    parser.add_argument('session_type', nargs='?', default='R')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of load')
+    parser.add_argument('--toggles', type=int, default=6, help='driver additions/removals per user journey')
+    parser.add_argument('--cold', action='store_true', help='do not load the session before the users start')
+    parser.add_argument('--serve', action='store_true', help='start gunicorn (gunicorn.conf.py) instead of using --url')
+    parser.add_argument('--offline', metavar='SNAPSHOT', help='with --serve: serve only this disk_cache snapshot, no network')
+    parser.add_argument('--make-snapshot', metavar='SNAPSHOT', help='write a snapshot of the session for --offline and exit')
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.make_snapshot:
+        print(f"\n📦 Snapshotting {args.year} {args.race} {args.session_type}")
+        start = time.perf_counter()
+        archive = make_snapshot(args.year, args.race, args.session_type, args.make_snapshot)
+        print(f"  {archive} ({os.path.getsize(archive) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s\n")
+        return
+    if args.offline and not os.path.exists(args.offline):
+        raise SystemExit(f"No snapshot at {args.offline} - build it with --make-snapshot {args.offline}")
+
+    proc = None
+    if args.serve:
+        proc, args.url = serve(args.worker_class, args.threads, args.workers, args.offline)
+    try:
+        client = DashClient(args.url)
+
+        if not args.cold:
+            # Warm the session once so the run measures the steady state, not one cold load
+            print(f"\n🏎️  Loading {args.year} {args.race} {args.session_type} via {args.url}")
+            start = time.perf_counter()
+            response = client.call('session-data.data', {
+                'load-button.n_clicks': 1, 'year-dropdown.value': args.year,
+                'race-dropdown.value': args.race, 'session-dropdown.value': args.session_type,
+            }, ['load-button.n_clicks'])
+            session_data = (response.get('session-data') or {}).get('data')
+            if not session_data:
+                raise SystemExit("Session did not load (still loading or failed) - try again")
+            print(f"  loaded in {time.perf_counter() - start:.1f}s, {len(session_data['drivers'])} drivers")
+
+        stats = Stats()
+        stop = threading.Event()
+        journeys = []
+        users = [threading.Thread(target=user, args=(client, args, stats, stop, journeys), daemon=True)
+                 for _ in range(args.users)]
+        print(f"\n👥 {args.users} users for {args.duration:.0f}s, {args.toggles} driver toggles per visit")
+        start = time.perf_counter()
+        for thread in users:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in users:
+            thread.join(timeout=60)
+        elapsed = time.perf_counter() - start
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report(stats, elapsed, journeys)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Memory introspection for the F1 Telemetry Dashboard
+Per-cache entry sizes, hit/miss/eviction counts and ages, session
+compaction reports, and on-demand tracemalloc snapshots of the top
+allocators of the next few chart updates
+
+tracemalloc is process-wide: a traced call also counts what other threads
+of the worker allocate meanwhile, so trace on a quiet worker (or with
+GUNICORN_THREADS=1) for clean numbers. Only one call is traced at a time.
+"""
+
+import functools
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from caching import CACHES, cache_stats
+from figures import figure_timings
+from sessions import memory_reports
+
+# Allocation sites kept per traced call
+TRACE_TOP = 15
+# Frames recorded per allocation; more is slower but points past pandas internals
+TRACE_FRAMES = 8
+# Upper bound on armed traces - tracing slows every traced call down
+MAX_ARMED = 20
+# Traced calls kept, newest last
+allocation_reports = deque(maxlen=8)
+# Admin endpoints and the memory view are off unless this is set
+ADMIN_TOKEN = os.environ.get('F1_ADMIN_TOKEN')
+
+_trace_lock = threading.Lock()
+_trace_armed = 0
+_tracing = False
+# Whether tracemalloc was started here (and so is stopped here), not e.g. by PYTHONTRACEMALLOC
+_started_tracemalloc = False
+
+
+def admin_authorized(token):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(str(token or ''), ADMIN_TOKEN)
+
+
+def deep_sizeof(value, _seen=None):
+    """Deep byte size of a cached value: DataFrames/Series deep, arrays by buffer, containers recursively."""
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(deep_sizeof(item, _seen) for item in value)
+    return sys.getsizeof(value)
+
+
+def cache_report(deep=False):
+    """Stats and entries (``items``) of every registered cache.
+
+    Entry sizes are what the cache accounted on insert; with ``deep`` the
+    entries it did not size (count-bounded caches) are deep-sized now,
+    which walks every cached frame and can take a moment.
+    """
+    now = time.time()
+    report = []
+    for name, stats in sorted(cache_stats().items()):
+        entries = []
+        for entry in CACHES[name].entries():
+            size = entry['size'] or (deep_sizeof(entry['value']) if deep else 0)
+            entries.append({
+                'key': repr(entry['key'])[:120],
+                'bytes': size,
+                'hits': entry['hits'],
+                'age_s': round(now - entry['created'], 1),
+                'idle_s': round(now - entry['last_access'], 1),
+            })
+        if deep:
+            stats['bytes'] = sum(entry['bytes'] for entry in entries)
+        report.append(dict(stats, items=entries))
+    return report
+
+
+def memory_report(deep=False):
+    """Everything the admin endpoint and view show (caches, sessions, figure builder timings, traces), as plain JSON-able data."""
+    return {
+        'caches': cache_report(deep),
+        'sessions': [{'key': list(key), **report} for key, report in memory_reports.items()],
+        'figures': figure_timings(),
+        'tracemalloc': trace_report(),
+    }
+
+
+def trace_report():
+    return {'armed': _trace_armed, 'reports': list(allocation_reports)}
+
+
+def arm_trace(calls=1):
+    """Trace allocations of the next `calls` traced calls (e.g. chart updates), up to MAX_ARMED in total; returns how many are armed."""
+    global _trace_armed
+    with _trace_lock:
+        _trace_armed = min(_trace_armed + max(0, int(calls)), MAX_ARMED)
+        return _trace_armed
+
+
+def _begin_trace():
+    """Claim an armed trace and start tracemalloc, unless another call is being traced."""
+    global _trace_armed, _tracing, _started_tracemalloc
+    with _trace_lock:
+        if _trace_armed <= 0 or _tracing:
+            return False
+        _trace_armed -= 1
+        _tracing = True
+        _started_tracemalloc = not tracemalloc.is_tracing()
+        if _started_tracemalloc:
+            tracemalloc.start(TRACE_FRAMES)
+        return True
+
+
+def _end_trace():
+    global _tracing
+    with _trace_lock:
+        if _started_tracemalloc:
+            tracemalloc.stop()
+        _tracing = False
+
+
+def trace_allocations(fn):
+    """Record the top allocation sites of a call while tracing is armed (free otherwise)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _begin_trace():
+            return fn(*args, **kwargs)
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            _end_trace()
+            # Leave out tracemalloc's own bookkeeping
+            own = tracemalloc.Filter(False, tracemalloc.__file__)
+            diff = after.filter_traces([own]).compare_to(before.filter_traces([own]), 'lineno')
+            allocation_reports.append({
+                'call': fn.__name__,
+                'at': time.strftime('%H:%M:%S'),
+                'ms': round(elapsed * 1000, 1),
+                'peak_bytes': peak - base,
+                'net_bytes': sum(stat.size_diff for stat in diff),
+                'top': [{
+                    'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'bytes': stat.size_diff,
+                    'count': stat.count_diff,
+                } for stat in diff[:TRACE_TOP]],
+            })
+    return wrapper
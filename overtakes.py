@@ -0,0 +1,185 @@
+"""
+Overtake detection for the F1 Telemetry Dashboard
+Every car's position data is projected onto a reference lap and resampled
+once onto a shared timebase as race progress (laps); passes are the order
+flips between consecutive time steps for all pairs of cars at once
+"""
+
+import numpy as np
+import pandas as pd
+
+from heatmap import track_grid
+from sessions import get_fastest_telemetry, get_lap_index, per_session_cache
+
+# Shared timebase step (s)
+RESAMPLE_S = 0.5
+# A pass must hold this long to count - filters side-by-side jitter
+HOLD_S = 4.0
+# DRS open on the passing car this long before the pass makes it a DRS pass
+DRS_WINDOW_S = 8.0
+# Rows of reference-lap points compared per chunk when building the lookup grid
+_CHUNK = 2048
+
+
+def reference_lookup(x, y, distance):
+    """Grid over the reference lap mapping every cell to the lap distance of its nearest reference point."""
+    grid = track_grid([(x, y)])
+    rows, cols = grid['shape']
+    cx = grid['x0'] + (np.arange(cols) + 0.5) * grid['cell']
+    cy = grid['y0'] + (np.arange(rows) + 0.5) * grid['cell']
+    centers_x, centers_y = (values.ravel() for values in np.meshgrid(cx, cy))
+    nearest = np.empty(len(centers_x), dtype=np.int64)
+    for start in range(0, len(centers_x), _CHUNK):
+        stop = start + _CHUNK
+        d2 = (centers_x[start:stop, None] - x[None]) ** 2 + (centers_y[start:stop, None] - y[None]) ** 2
+        nearest[start:stop] = d2.argmin(axis=1)
+    grid['distance'] = distance[nearest]
+    grid['length'] = float(distance[-1])
+    return grid
+
+
+def lap_fraction(lookup, x, y):
+    """Fraction of the lap (0-1) at each (x, y), from the nearest reference point."""
+    rows = np.clip(((y - lookup['y0']) // lookup['cell']).astype(np.int64), 0, lookup['shape'][0] - 1)
+    cols = np.clip(((x - lookup['x0']) // lookup['cell']).astype(np.int64), 0, lookup['shape'][1] - 1)
+    return lookup['distance'][rows * lookup['shape'][1] + cols] / lookup['length']
+
+
+def race_progress(lookup, pos_time, x, y, lap_end):
+    """Monotonic race progress in laps (completed laps + fraction) at each position sample.
+
+    The lap fraction is unwrapped at the line and aligned with the timing
+    data's completed-lap count, so cars that start either side of the line
+    agree.
+    """
+    fraction = lap_fraction(lookup, x, y)
+    step = np.diff(fraction, prepend=fraction[:1])
+    wraps = np.cumsum((step < -0.5).astype(np.int64) - (step > 0.5).astype(np.int64))
+    completed = np.searchsorted(np.sort(lap_end), pos_time, side='right')
+    offset = np.round(np.median(completed - wraps)) if len(completed) else 0.0
+    return fraction + wraps + offset
+
+
+def pit_mask(timebase, laps):
+    """True at every timebase step a driver spends between a pit entry and the following pit exit."""
+    pit_in = np.sort(laps['PitInTime'].dropna().dt.total_seconds().to_numpy())
+    pit_out = np.sort(laps['PitOutTime'].dropna().dt.total_seconds().to_numpy())
+    entries = np.searchsorted(pit_in, timebase, side='right')
+    exits = np.searchsorted(pit_out, timebase, side='right')
+    # Inside the pit lane when the last pit entry is later than the last pit exit
+    last_in = np.where(entries > 0, pit_in[np.maximum(entries - 1, 0)], -np.inf)
+    last_out = np.where(exits > 0, pit_out[np.maximum(exits - 1, 0)], -np.inf)
+    return last_in > last_out
+
+
+def detect_passes(progress, running, hold_steps):
+    """(step, passer, passed) of every pass that holds for hold_steps steps.
+
+    progress is a steps x cars array; a pass is car i going from behind car
+    j to ahead of it between two consecutive steps while both are running.
+    Ties, and steps where either car is not running, keep the last known
+    order, so cars level within the position resolution do not flicker.
+    """
+    both = running[:, :, None] & running[:, None, :]
+    order = np.where(both, np.sign(progress[:, :, None] - progress[:, None, :]), 0).astype(np.int8)
+    last = np.where(order != 0, np.arange(len(order), dtype=np.int32)[:, None, None], np.int32(0))
+    np.maximum.accumulate(last, axis=0, out=last)
+    order = np.take_along_axis(order, last, axis=0)
+
+    step, passer, passed = np.nonzero((order[1:] > 0) & (order[:-1] < 0) & both[1:])
+    step += 1
+
+    # Debounce: the passer has to stay ahead for the whole hold window
+    window = np.minimum(step[:, None] + np.arange(hold_steps), len(progress) - 1)
+    held = (order[window, passer[:, None], passed[:, None]] > 0).all(axis=1)
+    return step[held], passer[held], passed[held]
+
+
+def build_overtakes(timebase, progress, running, in_pit, drs_open, x, y, drivers):
+    """Event table of the passes on a shared timebase.
+
+    All arrays are steps x cars in `drivers` order. Returns a DataFrame
+    with Time (s), Lap, Driver, Passed (driver numbers), Position (the
+    passer's new place among running cars), Type ('DRS', 'Pit' or
+    'On track'), X and Y, in time order.
+    """
+    step, passer, passed = detect_passes(progress, running, max(1, int(HOLD_S / RESAMPLE_S)))
+
+    window = max(1, int(DRS_WINDOW_S / RESAMPLE_S))
+    drs_count = np.concatenate([np.zeros((1, drs_open.shape[1]), dtype=np.int64), np.cumsum(drs_open, axis=0)])
+    recent_drs = drs_count[step + 1, passer] - drs_count[np.maximum(step + 1 - window, 0), passer] > 0
+    pit = in_pit[step, passer] | in_pit[step, passed]
+
+    # Place among running cars: 1 + cars further along at that step
+    valid = np.where(running, progress, -np.inf)
+    position = 1 + (valid[step] > valid[step, passer][:, None]).sum(axis=1)
+
+    drivers = np.asarray(drivers)
+    return pd.DataFrame({
+        'Time': timebase[step],
+        'Lap': np.floor(progress[step, passer]).astype(np.int64) + 1,
+        'Driver': drivers[passer],
+        'Passed': drivers[passed],
+        'Position': position,
+        'Type': np.where(pit, 'Pit', np.where(recent_drs, 'DRS', 'On track')),
+        'X': x[step, passer],
+        'Y': y[step, passer],
+    }).sort_values('Time', kind='stable', ignore_index=True)
+
+
+def on_track(pos):
+    """Position samples of a car while on track; parked or off-track samples would fake passes."""
+    if 'Status' not in pos.columns:
+        raise ValueError("position data has no Status channel (compaction must keep it)")
+    return pos[pos['Status'] == 'OnTrack']
+
+
+@per_session_cache('overtakes')
+def get_overtakes(session):
+    """Cached overtake events of a session (None without position data)."""
+    lap_index = get_lap_index(session)
+    timed = lap_index[lap_index['LapTime'].notna()]
+    if timed.empty:
+        return None
+    reference = get_fastest_telemetry(session, timed.loc[timed['LapTime'].idxmin(), 'DriverNumber'])
+    if reference is None:
+        return None
+    lookup = reference_lookup(reference['X'].to_numpy(dtype=np.float64), reference['Y'].to_numpy(dtype=np.float64),
+                              reference['Distance'].to_numpy(dtype=np.float64))
+
+    tracks = {}
+    for driver in session.drivers:
+        laps = session.laps.pick_driver(driver)
+        laps = laps[laps['LapStartTime'].notna() & laps['Time'].notna()]
+        if laps.empty or driver not in session.pos_data:
+            continue
+        tracks[driver] = (laps, on_track(session.pos_data[driver]))
+    if len(tracks) < 2:
+        return None
+
+    # One shared timebase from the first lap start to the last lap end of the field
+    start = min(laps['LapStartTime'].min() for laps, _ in tracks.values()).total_seconds()
+    end = max(laps['Time'].max() for laps, _ in tracks.values()).total_seconds()
+    timebase = np.arange(start, end, RESAMPLE_S)
+    shape = (len(timebase), len(tracks))
+    progress, x, y = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+    running, in_pit, drs_open = np.zeros(shape, bool), np.zeros(shape, bool), np.zeros(shape, bool)
+
+    for col, (driver, (laps, pos)) in enumerate(tracks.items()):
+        pos_time = pos['SessionTime'].dt.total_seconds().to_numpy()
+        pos_x, pos_y = pos['X'].to_numpy(dtype=np.float64), pos['Y'].to_numpy(dtype=np.float64)
+        lap_end = laps['Time'].dt.total_seconds().to_numpy()
+        driver_progress = race_progress(lookup, pos_time, pos_x, pos_y, lap_end)
+        progress[:, col] = np.interp(timebase, pos_time, driver_progress)
+        x[:, col] = np.interp(timebase, pos_time, pos_x)
+        y[:, col] = np.interp(timebase, pos_time, pos_y)
+        running[:, col] = ((timebase >= laps['LapStartTime'].min().total_seconds())
+                           & (timebase <= lap_end.max()))
+        in_pit[:, col] = pit_mask(timebase, laps)
+        if driver in session.car_data and 'DRS' in session.car_data[driver].columns:
+            car = session.car_data[driver]
+            car_time = car['SessionTime'].dt.total_seconds().to_numpy()
+            nearest = np.clip(np.searchsorted(car_time, timebase), 0, len(car_time) - 1)
+            drs_open[:, col] = car['DRS'].to_numpy()[nearest] >= 10
+
+    return build_overtakes(timebase, progress, running, in_pit, drs_open, x, y, list(tracks))
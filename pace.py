@@ -0,0 +1,95 @@
+"""
+Race-pace analytics for the F1 Telemetry Dashboard
+Representative-lap filtering, fuel correction and rolling-pace percentiles
+for the whole field, computed over the full laps table in one pass
+"""
+
+import numpy as np
+import pandas as pd
+
+from sessions import per_session_cache
+
+# Fuel correction: lap times are corrected to an empty-tank equivalent
+FUEL_START_KG = 100.0
+FUEL_EFFECT_S_PER_KG = 0.03
+# Laps slower than this fraction of the driver's median green lap are traffic/incidents
+SLOW_LAP_FACTOR = 1.07
+ROLLING_LAPS = 5
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+PERCENTILE_COLUMNS = ['P10', 'P25', 'P50', 'P75', 'P90']
+
+
+def representative_laps(laps):
+    """Boolean mask of laps fit for pace analysis.
+
+    Drops laps without a time, the opening lap, in/out laps, laps with
+    anything but green track status, laps FastF1 flags as inaccurate and
+    laps slower than SLOW_LAP_FACTOR x the driver's median green lap.
+    """
+    lap_time = laps['LapTime'].dt.total_seconds()
+    mask = lap_time.notna() & (laps['LapNumber'] > 1)
+    mask &= laps['PitInTime'].isna() & laps['PitOutTime'].isna()
+    if 'TrackStatus' in laps.columns:
+        mask &= laps['TrackStatus'].astype(str) == '1'
+    if 'IsAccurate' in laps.columns:
+        mask &= laps['IsAccurate'].fillna(False).astype(bool)
+    driver_median = lap_time.where(mask).groupby(laps['DriverNumber'].astype(str)).transform('median')
+    return mask & (lap_time <= driver_median * SLOW_LAP_FACTOR)
+
+
+def fuel_corrected(lap_time, lap_number, total_laps):
+    """Lap time (s) minus the time cost of the fuel still on board at the start of the lap."""
+    fuel_kg = FUEL_START_KG * (1.0 - (lap_number - 1) / max(total_laps, 1))
+    return lap_time - FUEL_EFFECT_S_PER_KG * np.clip(fuel_kg, 0.0, None)
+
+
+def _percentiles(values, groups):
+    table = values.groupby(groups).quantile(PERCENTILES).unstack()
+    table.columns = PERCENTILE_COLUMNS
+    return table
+
+
+def build_race_pace(laps):
+    """Representative laps with fuel-corrected and rolling pace, plus driver and team percentiles.
+
+    Returns a dict with ``laps`` (DriverNumber, Driver, Team, LapNumber,
+    LapTime, Corrected, Rolling seconds), ``drivers`` (per-driver
+    percentiles of the corrected pace, ranked by median, with Gap to the
+    best median) and ``teams`` (percentiles over both cars' laps).
+    """
+    laps = laps[laps['LapNumber'].notna()]
+    total_laps = int(laps['LapNumber'].max()) if len(laps) else 0
+    mask = representative_laps(laps)
+    clean = laps[mask]
+
+    pace = pd.DataFrame({
+        'DriverNumber': clean['DriverNumber'].astype(str).to_numpy(),
+        'Driver': clean['Driver'].astype(str).to_numpy(),
+        'Team': clean['Team'].astype(str).to_numpy(),
+        'LapNumber': clean['LapNumber'].to_numpy(dtype=np.float64),
+        'LapTime': clean['LapTime'].dt.total_seconds().to_numpy(),
+    }).sort_values(['DriverNumber', 'LapNumber'], kind='stable', ignore_index=True)
+    pace['Corrected'] = fuel_corrected(pace['LapTime'].to_numpy(), pace['LapNumber'].to_numpy(), total_laps)
+    pace['Rolling'] = (pace.groupby('DriverNumber')['Corrected']
+                       .rolling(ROLLING_LAPS, min_periods=1).median()
+                       .reset_index(level=0, drop=True))
+
+    drivers = _percentiles(pace['Corrected'], pace['DriverNumber'])
+    first = pace.groupby('DriverNumber')[['Driver', 'Team']].first()
+    drivers = first.join(drivers)
+    drivers['Laps'] = pace.groupby('DriverNumber').size()
+    drivers = drivers.sort_values('P50').reset_index()
+    drivers['Rank'] = np.arange(1, len(drivers) + 1)
+    drivers['Gap'] = drivers['P50'] - drivers['P50'].min()
+
+    teams = _percentiles(pace['Corrected'], pace['Team'])
+    teams['Laps'] = pace.groupby('Team').size()
+    teams = teams.sort_values('P50').reset_index()
+    teams['Gap'] = teams['P50'] - teams['P50'].min()
+
+    return {'laps': pace, 'drivers': drivers, 'teams': teams, 'excluded': int((~mask).sum())}
+
+
+@per_session_cache('race_pace')
+def get_race_pace(session):
+    return build_race_pace(session.laps)
@@ -0,0 +1,115 @@
+"""
+Qualifying analytics for the F1 Telemetry Dashboard
+Laps are split into Q1/Q2/Q3 once per session into a cached segment index;
+best laps, elimination cut lines and gaps to pole are then computed for the
+whole field in one pivot
+"""
+
+import numpy as np
+import pandas as pd
+
+from sessions import get_fastest_telemetry, per_session_cache
+
+SEGMENTS = ['Q1', 'Q2', 'Q3']
+
+
+def build_segment_index(laps, parts):
+    """Segment number of every lap (1-3; 0 = outside any segment) from FastF1's split laps."""
+    segment = pd.Series(np.zeros(len(laps), dtype=np.int8), index=laps.index)
+    for number, part in enumerate(parts, start=1):
+        if part is not None:
+            segment.loc[part.index] = number
+    return segment
+
+
+@per_session_cache('quali_segments')
+def get_segment_index(session):
+    """Cached segment index of a qualifying session (None for other sessions or without status data)."""
+    try:
+        parts = session.laps.split_qualifying_sessions()
+    except (ValueError, AttributeError):
+        return None
+    return build_segment_index(session.laps, parts)
+
+
+def build_qualifying(laps, segment):
+    """Classification, per-segment best laps, gaps to the segment's fastest and cut lines.
+
+    Returns a dict with ``classification`` (Position, DriverNumber, Driver,
+    Team, Reached, then the Q1-Q3 best lap and Q1Gap-Q3Gap in seconds,
+    ordered by the deepest segment reached and the time set in it),
+    ``cuts`` (segment -> slowest time that advanced, None if unknown) and
+    ``pole`` (driver number).
+    """
+    table = pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'Segment': segment.to_numpy(),
+        'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+    })
+    table = table[(table['Segment'] > 0) & table['LapTime'].notna()]
+    best = (table.pivot_table(index='DriverNumber', columns='Segment', values='LapTime', aggfunc='min')
+            .reindex(columns=range(1, len(SEGMENTS) + 1)))
+    best.columns = SEGMENTS
+    times = best.to_numpy()
+
+    # Deepest segment with a time, then the time set in it
+    timed = ~np.isnan(times)
+    reached = len(SEGMENTS) - 1 - np.argmax(timed[:, ::-1], axis=1)
+    final = times[np.arange(len(times)), reached]
+    order = np.lexsort((final, -reached))
+
+    names = pd.DataFrame({
+        'Driver': laps['Driver'].astype(str).to_numpy(),
+        'Team': laps['Team'].astype(str).to_numpy(),
+    }, index=laps['DriverNumber'].astype(str).to_numpy())
+    names = names[~names.index.duplicated()]
+    classification = best.iloc[order].reset_index()
+    classification.insert(0, 'Position', np.arange(1, len(classification) + 1))
+    classification.insert(2, 'Driver', names['Driver'].reindex(classification['DriverNumber']).to_numpy())
+    classification.insert(3, 'Team', names['Team'].reindex(classification['DriverNumber']).to_numpy())
+    classification.insert(4, 'Reached', reached[order] + 1)
+    for column in SEGMENTS:
+        classification[f'{column}Gap'] = classification[column] - classification[column].min()
+
+    # Cut line of a segment: the slowest time among the drivers who made the next one
+    cuts = {}
+    for idx, column in enumerate(SEGMENTS[:-1]):
+        advanced = times[reached > idx, idx]
+        advanced = advanced[~np.isnan(advanced)]
+        cuts[column] = float(advanced.max()) if len(advanced) else None
+
+    return {
+        'classification': classification,
+        'cuts': cuts,
+        'pole': classification['DriverNumber'].iloc[0] if len(classification) else None,
+    }
+
+
+@per_session_cache('qualifying')
+def get_qualifying(session):
+    segment = get_segment_index(session)
+    if segment is None:
+        return None
+    return build_qualifying(session.laps, segment)
+
+
+def lap_delta(reference, comparison):
+    """Time (s) the comparison lap is behind the reference lap at each reference distance sample."""
+    ref_distance = np.maximum.accumulate(reference['Distance'].to_numpy(dtype=np.float64))
+    ref_time = reference['Time'].dt.total_seconds().to_numpy()
+    cmp_distance = np.maximum.accumulate(comparison['Distance'].to_numpy(dtype=np.float64))
+    cmp_time = comparison['Time'].dt.total_seconds().to_numpy()
+    return ref_distance, np.interp(ref_distance, cmp_distance, cmp_time) - ref_time
+
+
+def pole_deltas(session, pole, drivers):
+    """{driver: (distance, delta)} of each driver's fastest lap against the pole sitter's, from the telemetry cache."""
+    reference = get_fastest_telemetry(session, pole)
+    if reference is None:
+        return {}
+    deltas = {}
+    for driver in drivers:
+        telemetry = get_fastest_telemetry(session, driver)
+        if driver != pole and telemetry is not None:
+            deltas[driver] = lap_delta(reference, telemetry)
+    return deltas
@@ -0,0 +1,152 @@
+"""
+Season-wide lap index for the F1 Telemetry Dashboard
+Compact per-lap summaries for every session of a season in one columnar table
+
+Build (or update) an index from the command line:
+    python season_index.py 2024 --sessions R Q
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache
+from disk_cache import CACHE_DIR
+from sessions import SESSION_CODES, fastf1_api
+
+INDEX_DIR = os.environ.get('F1_SEASON_INDEX_DIR', '/tmp/f1_season_index')
+DEFAULT_SESSIONS = ('R', 'Q')
+# Timing data is only complete a while after a session starts
+PUBLISH_DELAY = pd.Timedelta(hours=3)
+
+TIME_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time']
+SPEED_COLUMNS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+CATEGORY_COLUMNS = ['EventName', 'SessionType', 'Driver', 'Team', 'Compound']
+
+season_cache = LRUCache('season_index', max_entries=4)
+
+
+def index_path(year):
+    return os.path.join(INDEX_DIR, f'season_{year}.pkl')
+
+
+def summarize_laps(laps, year, round_number, event_name, session_type):
+    """Reduce a session's laps to the compact columns the season table keeps."""
+    table = pd.DataFrame({
+        'Year': np.int16(year),
+        'RoundNumber': np.int8(round_number),
+        'EventName': event_name,
+        'SessionType': session_type,
+        'Driver': laps['Driver'].astype(str).values,
+        'Team': laps['Team'].astype(str).values,
+        'LapNumber': laps['LapNumber'].astype('float32').values,
+        'Compound': laps['Compound'].fillna('UNKNOWN').astype(str).values,
+        'TyreLife': laps['TyreLife'].astype('float32').values,
+    })
+    for col in TIME_COLUMNS:
+        table[col] = laps[col].dt.total_seconds().astype('float32').values
+    for col in SPEED_COLUMNS:
+        table[col] = laps[col].astype('float32').values
+    return table
+
+
+def _finalize(table):
+    for col in CATEGORY_COLUMNS:
+        table[col] = table[col].astype('category')
+    return table.reset_index(drop=True)
+
+
+def load_season_table(year):
+    """Return the indexed season table (cached in memory), or None if not built."""
+    table = season_cache.get(year)
+    if table is not None:
+        return table
+    path = index_path(year)
+    if not os.path.exists(path):
+        return None
+    table = pd.read_pickle(path)
+    season_cache.put(year, table)
+    return table
+
+
+def build_season_index(year, session_types=DEFAULT_SESSIONS, log=print):
+    """Walk the season schedule and index every completed session not indexed yet."""
+    existing = load_season_table(year)
+    done = set()
+    if existing is not None:
+        done = set(zip(existing['RoundNumber'].astype(int), existing['SessionType'].astype(str)))
+
+    fastf1 = fastf1_api()
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    frames = [] if existing is None else [existing.astype({col: str for col in CATEGORY_COLUMNS})]
+    added = 0
+
+    for _, event in schedule.iterrows():
+        # Per session, so Saturday's qualifying is indexed before Sunday's race
+        starts = {SESSION_CODES.get(event.get(f'Session{slot}')): event.get(f'Session{slot}DateUtc') for slot in range(1, 6)}
+        for session_type in session_types:
+            if (int(event['RoundNumber']), session_type) in done:
+                continue
+            session_start = starts.get(session_type)
+            if session_start is None or pd.isna(session_start) or session_start + PUBLISH_DELAY > now:
+                continue
+            start = time.perf_counter()
+            try:
+                session = fastf1.get_session(year, int(event['RoundNumber']), session_type)
+                # Lap timing only - the index never touches raw telemetry
+                session.load(laps=True, telemetry=False, weather=False, messages=False)
+                frames.append(summarize_laps(session.laps, year, event['RoundNumber'], event['EventName'], session_type))
+                added += 1
+                log(f"  ✓ {event['EventName']} {session_type}: {len(session.laps)} laps ({time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                log(f"  ✗ {event['EventName']} {session_type}: {e}")
+
+    if not frames:
+        return None
+    table = _finalize(pd.concat(frames, ignore_index=True))
+    if added:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        table.to_pickle(index_path(year))
+    season_cache.put(year, table)
+    return table
+
+
+def fastest_laps_by_race(table, session_type='R'):
+    """Driver x race matrix of each driver's fastest lap time (seconds)."""
+    laps = table[table['SessionType'] == session_type]
+    pivot = laps.pivot_table(index='Driver', columns='RoundNumber', values='LapTime', aggfunc='min', observed=True)
+    names = laps.groupby('RoundNumber', observed=True)['EventName'].first().astype(str)
+    pivot.columns = [names[rnd] for rnd in pivot.columns]
+    return pivot
+
+
+def gap_to_best(pivot):
+    """Percentage gap of every entry to the fastest lap of its race."""
+    return (pivot / pivot.min(axis=0) - 1.0) * 100.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the season-wide lap index')
+    parser.add_argument('years', type=int, nargs='+')
+    parser.add_argument('--sessions', nargs='+', default=list(DEFAULT_SESSIONS))
+    parser.add_argument('--cache', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    # The shared accessor sets up the configured cache, snapshot restore and offline mode
+    fastf1 = fastf1_api()
+    if args.cache != CACHE_DIR:
+        os.makedirs(args.cache, exist_ok=True)
+        fastf1.Cache.enable_cache(args.cache)
+    for year in args.years:
+        print(f"📚 Indexing {year} ({', '.join(args.sessions)})")
+        table = build_season_index(year, args.sessions)
+        rows = 0 if table is None else len(table)
+        print(f"   {rows} laps indexed -> {index_path(year)}")
+
+
+if __name__ == '__main__':
+    main()
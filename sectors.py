@@ -0,0 +1,91 @@
+"""
+Sector-time and speed-trap analytics for the F1 Telemetry Dashboard
+Each session is packed once into dense (drivers x laps x sectors) arrays
+"""
+
+import numpy as np
+import pandas as pd
+
+from sessions import per_session_cache
+
+SECTOR_COLUMNS = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+SPEED_TRAP_COLUMNS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+SPEED_TRAP_LABELS = ['I1', 'I2', 'FL', 'ST']
+
+
+def build_sector_matrix(laps):
+    """Pack lap, sector and speed-trap data into NaN-padded dense arrays.
+
+    Returns a dict with ``drivers`` (driver numbers, one per row),
+    ``abbreviations``, ``sectors`` (D x L x 3 seconds), ``lap_times``
+    (D x L seconds) and ``speeds`` (D x L x 4 km/h), where lap index ``i``
+    is lap number ``i + 1``.
+    """
+    laps = laps[laps['LapNumber'].notna()]
+    codes, drivers = pd.factorize(laps['DriverNumber'].astype(str))
+    lap_idx = laps['LapNumber'].to_numpy(dtype=np.int64) - 1
+    n_laps = int(lap_idx.max()) + 1 if len(lap_idx) else 0
+    shape = (len(drivers), n_laps)
+
+    sectors = np.full(shape + (len(SECTOR_COLUMNS),), np.nan, dtype=np.float32)
+    sectors[codes, lap_idx] = np.column_stack([laps[col].dt.total_seconds().to_numpy() for col in SECTOR_COLUMNS])
+
+    lap_times = np.full(shape, np.nan, dtype=np.float32)
+    lap_times[codes, lap_idx] = laps['LapTime'].dt.total_seconds().to_numpy()
+
+    speeds = np.full(shape + (len(SPEED_TRAP_COLUMNS),), np.nan, dtype=np.float32)
+    speeds[codes, lap_idx] = laps[SPEED_TRAP_COLUMNS].to_numpy(dtype=np.float64)
+
+    abbreviations = laps.groupby(codes)['Driver'].first().astype(str).to_numpy()
+    return {
+        'drivers': list(drivers),
+        'abbreviations': list(abbreviations),
+        'sectors': sectors,
+        'lap_times': lap_times,
+        'speeds': speeds,
+    }
+
+
+@per_session_cache('sector_matrix')
+def get_sector_matrix(session):
+    return build_sector_matrix(session.laps)
+
+
+def _nanmin(values, axis):
+    # All-NaN slices (e.g. a driver who never set a sector) stay NaN without warnings
+    filled = np.where(np.isnan(values), np.inf, values)
+    result = filled.min(axis=axis)
+    return np.where(np.isinf(result), np.nan, result)
+
+
+def sector_summary(matrix):
+    """Per-driver best sectors, ideal lap and theoretical-best ranking for the whole field."""
+    best_sectors = _nanmin(matrix['sectors'], axis=1)              # D x 3
+    best_laps = _nanmin(matrix['lap_times'], axis=1)               # D
+    ideal = best_sectors.sum(axis=1)                                # NaN if any sector missing
+    field_best = _nanmin(best_sectors, axis=0)                      # 3
+    top_speeds = np.where(np.isnan(matrix['speeds']), -np.inf, matrix['speeds']).max(axis=1)
+    top_speeds = np.where(np.isinf(top_speeds), np.nan, top_speeds)  # D x 4
+
+    summary = pd.DataFrame({
+        'DriverNumber': matrix['drivers'],
+        'Driver': matrix['abbreviations'],
+        'BestLap': best_laps,
+        'IdealLap': ideal,
+        'TimeLost': best_laps - ideal,
+    })
+    for idx, col in enumerate(SECTOR_COLUMNS):
+        summary[col] = best_sectors[:, idx]
+        summary[f'{col}IsFieldBest'] = best_sectors[:, idx] == field_best[idx]
+    for idx, label in enumerate(SPEED_TRAP_LABELS):
+        summary[f'Speed{label}'] = top_speeds[:, idx]
+
+    summary = summary.sort_values(['IdealLap', 'BestLap'], na_position='last').reset_index(drop=True)
+    summary['IdealRank'] = np.arange(1, len(summary) + 1)
+    return summary
+
+
+def personal_best_mask(matrix):
+    """Boolean D x L x 3 mask of each driver's personal-best sectors."""
+    best = _nanmin(matrix['sectors'], axis=1)
+    return matrix['sectors'] == best[:, None, :]
@@ -0,0 +1,293 @@
+"""
+Session loading for the F1 Telemetry Dashboard
+Shared cache of loaded FastF1 sessions plus concurrent background loading
+"""
+
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from caching import LRUCache
+from compaction import compact_session, format_report, session_bytes
+from disk_cache import CACHE_DIR, OFFLINE, enforce_quota, mark_used, rehydrate, session_path
+COMPACT_SESSIONS = os.environ.get('F1_COMPACT_SESSIONS', '1') != '0'
+
+# Loaded sessions are large: bound the cache by their (compacted) memory footprint
+session_cache = LRUCache('sessions', max_entries=12,
+                         max_bytes=int(os.environ.get('F1_SESSION_CACHE_MB', '1500')) * 1024 * 1024)
+
+# Per-session memory before/after compaction, keyed like session_cache
+memory_reports = {}
+
+# session.load() is dominated by network and cache I/O, so a small thread
+# pool gives near-perfect overlap without copying sessions between processes
+MAX_LOAD_WORKERS = 4
+# How long a request waits for a cold load before answering "still loading"
+LOAD_TIMEOUT = float(os.environ.get('F1_LOAD_TIMEOUT', '25'))
+_executor = ThreadPoolExecutor(max_workers=MAX_LOAD_WORKERS, thread_name_prefix='session-loader')
+
+# Load failures kept for load_status, oldest dropped first
+MAX_FAILURES = 64
+
+_inflight = {}
+_failures = {}
+_key_locks = {}
+_guard = threading.Lock()
+_fastf1 = None
+
+
+def fastf1_api():
+    """Import FastF1 and enable its cache on first use.
+
+    FastF1 (and pandas with it) is the slowest import of the app, so it is
+    deferred until a callback actually needs data, or done once up front by
+    preload() in the gunicorn master.
+    """
+    global _fastf1
+    if _fastf1 is None:
+        with _guard:
+            if _fastf1 is None:
+                import fastf1
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                # A fresh disk (e.g. after a redeploy) starts from the boot snapshot
+                if rehydrate(CACHE_DIR):
+                    print(f"📦 FastF1 cache rehydrated from snapshot into {CACHE_DIR}")
+                fastf1.Cache.enable_cache(CACHE_DIR)
+                if OFFLINE:
+                    fastf1.Cache.offline_mode(True)
+                    print(f"🔌 FastF1 offline: serving only cached data from {CACHE_DIR}")
+                _fastf1 = fastf1
+    return _fastf1
+
+
+# Schedule session names -> the dashboard's session codes
+SESSION_CODES = {
+    'Practice 1': 'FP1',
+    'Practice 2': 'FP2',
+    'Practice 3': 'FP3',
+    'Sprint Qualifying': 'SQ',
+    'Sprint Shootout': 'SS',
+    'Sprint': 'S',
+    'Qualifying': 'Q',
+    'Race': 'R',
+}
+
+
+def get_event_schedule(year):
+    return fastf1_api().get_event_schedule(year)
+
+
+def session_key(year, race, session_type):
+    return (int(year), race, session_type)
+
+
+# FastF1 has timing data from this season on
+FIRST_SEASON = 2018
+schedule_cache = LRUCache('schedules', max_entries=8)
+
+
+def resolve_session_key(year, race, session_type):
+    """Canonical key of a user-supplied session, checked against the season schedule.
+
+    The race is matched the way FastF1 matches it (fuzzy, on event name,
+    location and country), so keys only ever name scheduled sessions.
+    Raises ValueError for a season or session the schedule does not have.
+    """
+    year = int(year)
+    if not FIRST_SEASON <= year <= datetime.now().year:
+        raise ValueError(f"No data for {year} (seasons {FIRST_SEASON} onwards)")
+    schedule = schedule_cache.get(year)
+    if schedule is None:
+        schedule = get_event_schedule(year)
+        schedule_cache.put(year, schedule)
+    event = schedule.get_event_by_name(str(race))
+    if session_type not in {SESSION_CODES.get(event.get(f'Session{slot}')) for slot in range(1, 6)}:
+        raise ValueError(f"{event['EventName']} {year} has no {session_type} session")
+    return session_key(year, event['EventName'], session_type)
+
+
+def session_id(session):
+    """Stable identity of a loaded session, used to key per-session caches."""
+    return (int(session.event.year), session.event['EventName'], session.name)
+
+
+# Cache lookups' "absent" marker, so None can be a cached value
+_MISSING = object()
+
+
+def per_session_cache(name, max_entries=8):
+    """Memoize a function of (session, *args) in a named per-session cache.
+
+    Thread-safe: concurrent callers of the same key wait for a single computation.
+    None results (e.g. no timed lap) are cached like any other value.
+    """
+    cache = LRUCache(name, max_entries=max_entries)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(session, *args):
+            key = (session_id(session),) + args
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                with _key_locked((name,) + key):
+                    # Filled while waiting for the lock: serve it without counting a second miss
+                    value = cache.get(key, _MISSING) if key in cache else _MISSING
+                    if value is _MISSING:
+                        value = fn(session, *args)
+                        cache.put(key, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def _key_locked(key):
+    """Hold the lock of one key; the lock is dropped again once nobody holds or waits for it."""
+    with _guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+def get_session(year, race, session_type):
+    """Return a loaded session, loading it at most once per process."""
+    key = session_key(year, race, session_type)
+    session = session_cache.get(key)
+    if session is not None:
+        return session
+
+    # Concurrent requests for the same session wait for a single load
+    with _key_locked(key):
+        if key in session_cache:
+            return session_cache.get(key)
+        session = fastf1_api().get_session(year, race, session_type)
+        session.load()
+        if COMPACT_SESSIONS:
+            report = compact_session(session)
+            print(format_report(key, report))
+        else:
+            sizes = session_bytes(session)
+            report = {'before': sizes, 'after': sizes}
+        memory_reports[key] = report
+        _manage_disk(session)
+        session_cache.put(key, session, size=report['after']['total'])
+        return session
+
+
+def get_session_within(year, race, session_type, timeout=None):
+    """Like get_session for user input, but wait at most `timeout` seconds (F1_LOAD_TIMEOUT).
+
+    The key is resolved against the schedule first (ValueError if it names
+    no scheduled session). Raises TimeoutError if the load takes longer; it
+    carries on in the background, so a retry picks up the loaded session.
+    """
+    key = resolve_session_key(year, race, session_type)
+    session = session_cache.get(key)
+    if session is not None:
+        return session
+    future = prefetch([key]).get(key)
+    if future is None:
+        # Finished loading between the two checks
+        return get_session(*key)
+    return future.result(timeout=LOAD_TIMEOUT if timeout is None else timeout)
+
+
+def _manage_disk(session):
+    # Housekeeping must never fail a load
+    try:
+        mark_used(session)
+        enforce_quota(protect=[session_path(session)])
+    except (OSError, AttributeError):
+        pass
+
+
+def _on_done(key, future):
+    with _guard:
+        _inflight.pop(key, None)
+        error = future.exception()
+        if error is not None:
+            _failures[key] = str(error)
+            while len(_failures) > MAX_FAILURES:
+                del _failures[next(iter(_failures))]
+
+
+def prefetch(keys):
+    """Start background loads for any sessions not cached or already loading."""
+    futures, started = {}, []
+    with _guard:
+        for key in keys:
+            if key in session_cache:
+                continue
+            future = _inflight.get(key)
+            if future is None:
+                _failures.pop(key, None)
+                future = _executor.submit(get_session, *key)
+                _inflight[key] = future
+                started.append(key)
+            futures[key] = future
+    # Outside _guard: a future that is already done runs _on_done inline, which takes _guard
+    for key in started:
+        futures[key].add_done_callback(lambda f, key=key: _on_done(key, f))
+    return futures
+
+
+def load_status(keys):
+    """Split keys into loaded sessions, still-loading keys and failures."""
+    loaded, loading, failed = {}, [], {}
+    for key in keys:
+        session = session_cache.get(key)
+        if session is not None:
+            loaded[key] = session
+        elif key in _failures:
+            failed[key] = _failures[key]
+        else:
+            loading.append(key)
+    return loaded, loading, failed
+
+
+@per_session_cache('fastest_telemetry', max_entries=64)
+def get_fastest_telemetry(session, driver):
+    """Merged car/position telemetry of a driver's fastest lap with derived G channels (None if no timed lap)."""
+    from gforce import add_acceleration_channels
+
+    fastest = session.laps.pick_driver(driver).pick_fastest()
+    if fastest is None or fastest.empty:
+        return None
+    return add_acceleration_channels(fastest.get_telemetry())
+
+
+@per_session_cache('lap_index')
+def get_lap_index(session):
+    """Compact lap table shared by the figure builders: driver, lap number, lap time (s)."""
+    import pandas as pd
+
+    laps = session.laps
+    return pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype='float64'),
+        'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+    })
+
+
+TELEMETRY_CHANNELS = ['Distance', 'Speed', 'Throttle', 'Brake', 'nGear', 'DRS', 'X', 'Y', 'AccLong', 'AccLat']
+
+
+def fastest_arrays(session, drivers):
+    """Channel arrays of each driver's fastest-lap telemetry (views of the cached frames)."""
+    arrays = {}
+    for driver in drivers:
+        telemetry = get_fastest_telemetry(session, driver)
+        if telemetry is not None:
+            arrays[driver] = {ch: telemetry[ch].to_numpy() for ch in TELEMETRY_CHANNELS if ch in telemetry.columns}
+    return arrays
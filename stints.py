@@ -0,0 +1,113 @@
+"""
+Per-lap telemetry for whole stints in the F1 Telemetry Dashboard
+A driver's car data is cut into laps with one searchsorted over the lap
+boundary times; every lap is a zero-copy view of the session-wide arrays
+"""
+
+import numpy as np
+
+from sessions import per_session_cache
+
+SLICE_CHANNELS = ['Speed', 'Throttle', 'Brake', 'nGear', 'DRS']
+
+
+def build_lap_slices(car_data, laps):
+    """Session-wide channel arrays of one driver plus the sample range of each lap.
+
+    Returns a dict with ``channels`` (name -> array over the whole session,
+    including ``Time`` in session seconds and ``Travelled`` metres since the
+    first sample), ``start``/``stop`` (sample index range per lap) and the
+    laps' ``LapNumber``, ``Stint``, ``Compound``, ``LapTime`` (s) and
+    ``Clean`` (no pit in/out, timed, has car samples) arrays, in lap order.
+    """
+    laps = laps[laps['LapStartTime'].notna() & laps['Time'].notna()].sort_values('LapNumber')
+    time = car_data['SessionTime'].dt.total_seconds().to_numpy()
+    speed = car_data['Speed'].to_numpy(dtype=np.float64)
+
+    # One searchsorted for every lap start and end at once
+    lap_start = laps['LapStartTime'].dt.total_seconds().to_numpy()
+    lap_end = laps['Time'].dt.total_seconds().to_numpy()
+    bounds = np.searchsorted(time, np.concatenate([lap_start, lap_end]))
+    start, stop = bounds[:len(laps)], bounds[len(laps):]
+
+    # Distance by integrating speed over the whole session in one pass;
+    # a lap's distance is its view minus the value at its first sample
+    dt = np.diff(time, prepend=time[:1])
+    travelled = np.cumsum(speed / 3.6 * dt)
+
+    channels = {name: car_data[name].to_numpy() for name in SLICE_CHANNELS if name in car_data.columns}
+    channels['Time'] = time
+    channels['Travelled'] = travelled
+    return {
+        'channels': channels,
+        'start': start,
+        'stop': stop,
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=np.int64),
+        'Stint': laps['Stint'].fillna(0).to_numpy(dtype=np.int64),
+        'Compound': laps['Compound'].astype(str).to_numpy(),
+        'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+        # Laps outside the car data (e.g. after its last sample) have no samples to gather
+        'Clean': (laps['PitInTime'].isna() & laps['PitOutTime'].isna() & laps['LapTime'].notna()).to_numpy()
+                 & (stop > start) & (start < len(time)),
+    }
+
+
+def lap_view(slices, idx):
+    """Channels of the idx-th lap as views into the session arrays, plus its Distance."""
+    start, stop = slices['start'][idx], slices['stop'][idx]
+    view = {name: values[start:stop] for name, values in slices['channels'].items()}
+    travelled = view['Travelled']
+    view['Distance'] = travelled - travelled[0] if len(travelled) else travelled
+    return view
+
+
+@per_session_cache('lap_slices', max_entries=32)
+def get_lap_slices(session, driver):
+    laps = session.laps.pick_driver(driver)
+    if laps.empty or driver not in session.car_data:
+        return None
+    return build_lap_slices(session.car_data[driver], laps)
+
+
+def stint_overlays(slices, channel='Speed'):
+    """Every clean lap of each stint joined into one NaN-separated (distance, value) series.
+
+    Returns a list of dicts with ``stint``, ``compound``, ``laps`` (count),
+    ``distance``/``values`` (float32, NaN between laps) and the stint's
+    ``best`` lap number with its ``best_distance``/``best_values``, in
+    stint order.
+    """
+    overlays = []
+    for stint in np.unique(slices['Stint']):
+        lap_idx = np.flatnonzero((slices['Stint'] == stint) & slices['Clean'])
+        if not len(lap_idx):
+            continue
+        starts = slices['start'][lap_idx]
+        lengths = slices['stop'][lap_idx] - starts
+        samples = int(lengths.sum())
+        distance = np.full(samples + len(lap_idx), np.nan, dtype=np.float32)
+        values = np.full(samples + len(lap_idx), np.nan, dtype=np.float32)
+
+        # Sample i of lap k: read from starts[k] + i, written after the
+        # previous laps plus one NaN gap per lap
+        within = np.arange(samples) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        source = np.repeat(starts, lengths) + within
+        target = np.repeat(np.cumsum(lengths + 1) - (lengths + 1), lengths) + within
+        travelled = slices['channels']['Travelled']
+        distance[target] = travelled[source] - np.repeat(travelled[starts], lengths)
+        values[target] = slices['channels'][channel][source]
+
+        lap_times = slices['LapTime'][lap_idx]
+        best = lap_idx[np.nanargmin(lap_times)] if np.isfinite(lap_times).any() else None
+        best_view = lap_view(slices, best) if best is not None else None
+        overlays.append({
+            'stint': int(stint),
+            'compound': slices['Compound'][lap_idx[0]],
+            'laps': len(lap_idx),
+            'distance': distance,
+            'values': values,
+            'best': None if best is None else int(slices['LapNumber'][best]),
+            'best_distance': None if best is None else best_view['Distance'],
+            'best_values': None if best is None else best_view[channel],
+        })
+    return overlays
@@ -0,0 +1,163 @@
+"""
+Pit-stop and strategy analytics for the F1 Telemetry Dashboard
+Stints, pit stops and undercut/overcut outcomes for the whole field are
+derived from the laps table in one pass and cached per session
+"""
+
+import numpy as np
+import pandas as pd
+
+from sessions import per_session_cache
+
+# Cars this close (s) before the first of two stops were racing each other
+UNDERCUT_GAP_S = 3.5
+# The rival has to stop within this many laps of the first stopper
+UNDERCUT_WINDOW_LAPS = 5
+# Below this speed (km/h) in the pit lane the car counts as stationary
+STATIONARY_KMH = 1.0
+
+
+def build_stint_table(laps):
+    """One row per driver stint: Driver, Team, Stint, Compound, StartLap, EndLap, Laps, TyreLife (at start), Median (s)."""
+    table = pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'Driver': laps['Driver'].astype(str).to_numpy(),
+        'Team': laps['Team'].astype(str).to_numpy(),
+        'Stint': laps['Stint'].to_numpy(dtype=np.float64),
+        'Compound': laps['Compound'].astype(str).to_numpy(),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=np.float64),
+        'TyreLife': laps['TyreLife'].to_numpy(dtype=np.float64),
+        'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+    })
+    table = table[table['Stint'].notna() & table['LapNumber'].notna()]
+    stints = table.sort_values('LapNumber').groupby(['DriverNumber', 'Stint'], sort=True).agg(
+        Driver=('Driver', 'first'), Team=('Team', 'first'), Compound=('Compound', 'first'),
+        StartLap=('LapNumber', 'min'), EndLap=('LapNumber', 'max'), Laps=('LapNumber', 'size'),
+        TyreLife=('TyreLife', 'first'), Median=('LapTime', 'median'),
+    ).reset_index()
+    stints['Stint'] = stints['Stint'].astype(int)
+    return stints
+
+
+def build_pit_stops(laps):
+    """Every pit stop: in-lap, out-lap, pit-lane time and the compounds either side.
+
+    A stop pairs a lap's PitInTime with the same driver's next lap's
+    PitOutTime. Returns a DataFrame with DriverNumber, Driver, Lap (in-lap),
+    PitIn/PitOut (session s), Lane (s), From and To (compounds), in time
+    order.
+    """
+    table = pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'Driver': laps['Driver'].astype(str).to_numpy(),
+        'Lap': laps['LapNumber'].to_numpy(dtype=np.float64),
+        'PitIn': laps['PitInTime'].dt.total_seconds().to_numpy(),
+        'PitOut': laps['PitOutTime'].dt.total_seconds().to_numpy(),
+        'Compound': laps['Compound'].astype(str).to_numpy(),
+    }).sort_values(['DriverNumber', 'Lap'], ignore_index=True)
+    following = table.groupby('DriverNumber')[['PitOut', 'Compound', 'Lap']].shift(-1)
+    stops = table[table['PitIn'].notna() & following['PitOut'].notna() & (following['Lap'] == table['Lap'] + 1)]
+    following = following.loc[stops.index]
+    stops = pd.DataFrame({
+        'DriverNumber': stops['DriverNumber'].to_numpy(),
+        'Driver': stops['Driver'].to_numpy(),
+        'Lap': stops['Lap'].astype(int).to_numpy(),
+        'PitIn': stops['PitIn'].to_numpy(),
+        'PitOut': following['PitOut'].to_numpy(),
+        'From': stops['Compound'].to_numpy(),
+        'To': following['Compound'].to_numpy(),
+    })
+    stops['Lane'] = stops['PitOut'] - stops['PitIn']
+    return stops.sort_values('PitIn', ignore_index=True)
+
+
+def stationary_times(stops, car_data):
+    """Seconds spent below STATIONARY_KMH between pit entry and exit for each stop (NaN without car data)."""
+    stationary = np.full(len(stops), np.nan)
+    for driver, rows in stops.groupby('DriverNumber').groups.items():
+        if driver not in car_data:
+            continue
+        car = car_data[driver]
+        time = car['SessionTime'].dt.total_seconds().to_numpy()
+        stopped = car['Speed'].to_numpy(dtype=np.float64) < STATIONARY_KMH
+        # Time stopped up to each sample; a stop's total is the difference at its bounds
+        still = np.concatenate([[0.0], np.cumsum(np.diff(time) * stopped[:-1])])
+        idx = stops.index.get_indexer(rows)
+        start = np.clip(np.searchsorted(time, stops['PitIn'].to_numpy()[idx]), 0, len(time) - 1)
+        stop = np.clip(np.searchsorted(time, stops['PitOut'].to_numpy()[idx]), 0, len(time) - 1)
+        stationary[idx] = still[stop] - still[start]
+    return stationary
+
+
+def lap_end_matrix(laps):
+    """Session time (s) at the end of every lap: laps x drivers DataFrame."""
+    table = pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=np.float64),
+        'Time': laps['Time'].dt.total_seconds().to_numpy(),
+    })
+    return table.pivot_table(index='LapNumber', columns='DriverNumber', values='Time', aggfunc='first')
+
+
+def build_undercuts(stops, lap_end):
+    """Outcome of every pair of close cars that stopped within UNDERCUT_WINDOW_LAPS of each other.
+
+    Driver stopped first, Rival later. Gaps are Driver minus Rival at the
+    end of the lap before Driver's stop and at the end of Rival's out-lap
+    (+ = Driver behind); Gain is how much Driver made up. Result is
+    'Undercut' (Driver got ahead), 'Overcut' (Rival got ahead) or 'Held'.
+    """
+    columns = {driver: idx for idx, driver in enumerate(lap_end.columns)}
+    times = lap_end.to_numpy()
+    laps = lap_end.index.to_numpy(dtype=np.int64)
+    row_of = np.full(laps.max() + 2 if len(laps) else 1, -1, dtype=np.int64)
+    row_of[laps] = np.arange(len(laps))
+
+    driver = stops['DriverNumber'].map(columns).to_numpy()
+    lap = stops['Lap'].to_numpy(dtype=np.int64)
+
+    def end_time(rows, cols):
+        # NaN where the lap does not exist (retired, or past the flag)
+        rows = np.where((rows >= 0) & (rows < len(row_of)), row_of[np.clip(rows, 0, len(row_of) - 1)], -1)
+        return np.where(rows >= 0, times[np.maximum(rows, 0), cols], np.nan)
+
+    # All stop pairs: first stop i, rival stop j
+    first, rival = np.meshgrid(np.arange(len(stops)), np.arange(len(stops)), indexing='ij')
+    first, rival = first.ravel(), rival.ravel()
+    laps_apart = lap[rival] - lap[first]
+    candidate = (driver[first] != driver[rival]) & (laps_apart > 0) & (laps_apart <= UNDERCUT_WINDOW_LAPS)
+    first, rival = first[candidate], rival[candidate]
+
+    before = end_time(lap[first] - 1, driver[first]) - end_time(lap[first] - 1, driver[rival])
+    after = end_time(lap[rival] + 1, driver[first]) - end_time(lap[rival] + 1, driver[rival])
+    close = np.abs(before) <= UNDERCUT_GAP_S
+    first, rival, before, after = first[close], rival[close], before[close], after[close]
+
+    pairs = pd.DataFrame({
+        'Driver': stops['DriverNumber'].to_numpy()[first],
+        'Rival': stops['DriverNumber'].to_numpy()[rival],
+        'Lap': lap[first],
+        'RivalLap': lap[rival],
+        'GapBefore': before,
+        'GapAfter': after,
+    })
+    # A rival's first stop in the window is the one that answers
+    pairs = pairs.sort_values(['Lap', 'Driver', 'RivalLap'], ignore_index=True).drop_duplicates(['Driver', 'Lap', 'Rival'])
+    pairs = pairs[pairs['GapAfter'].notna()].reset_index(drop=True)
+    pairs['Gain'] = pairs['GapBefore'] - pairs['GapAfter']
+    pairs['Result'] = np.where((pairs['GapBefore'] > 0) & (pairs['GapAfter'] < 0), 'Undercut',
+                               np.where((pairs['GapBefore'] < 0) & (pairs['GapAfter'] > 0), 'Overcut', 'Held'))
+    return pairs
+
+
+@per_session_cache('strategy')
+def get_strategy(session):
+    """Cached stint table, pit stops (with stationary time) and undercut outcomes of a session."""
+    laps = session.laps
+    stops = build_pit_stops(laps)
+    stops['Stationary'] = stationary_times(stops, session.car_data)
+    return {
+        'stints': build_stint_table(laps),
+        'stops': stops,
+        'undercuts': build_undercuts(stops, lap_end_matrix(laps)),
+    }
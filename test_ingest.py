@@ -0,0 +1,180 @@
+"""
+Offline tests for the ingest scheduler: a stubbed schedule, clock and loader
+stand in for FastF1, so nothing touches the network or the disk cache
+
+    python -m pytest -q test_ingest.py
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import ingest
+from sessions import session_cache
+
+NOW = datetime(2024, 12, 8, 16, 30)
+KEY_Q = (2024, 'Abu Dhabi Grand Prix', 'Q')
+KEY_R = (2024, 'Abu Dhabi Grand Prix', 'R')
+
+
+def schedule(year=2024):
+    return pd.DataFrame([
+        {
+            'EventName': 'Abu Dhabi Grand Prix',
+            'Session1': 'Practice 1', 'Session1DateUtc': pd.Timestamp('2024-12-06 09:30'),
+            'Session2': 'Practice 2', 'Session2DateUtc': pd.Timestamp('2024-12-06 13:00'),
+            'Session3': 'Practice 3', 'Session3DateUtc': pd.Timestamp('2024-12-07 10:30'),
+            'Session4': 'Qualifying', 'Session4DateUtc': pd.Timestamp('2024-12-07 14:00'),
+            'Session5': 'Race', 'Session5DateUtc': pd.Timestamp('2024-12-08 13:00'),
+        },
+        {
+            'EventName': 'Qatar Grand Prix',
+            'Session1': 'Practice 1', 'Session1DateUtc': pd.Timestamp('2024-11-29 13:30'),
+            'Session2': 'Sprint Qualifying', 'Session2DateUtc': pd.Timestamp('2024-11-29 17:30'),
+            'Session3': 'Sprint', 'Session3DateUtc': pd.Timestamp('2024-11-30 13:00'),
+            'Session4': 'Qualifying', 'Session4DateUtc': pd.Timestamp('2024-11-30 17:00'),
+            'Session5': 'Race', 'Session5DateUtc': pd.Timestamp('2024-12-01 16:00'),
+        },
+    ])
+
+
+def stub_session(laps=3):
+    return SimpleNamespace(laps=pd.DataFrame({'LapNumber': range(1, laps + 1)}))
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    # No disk inventory, no precompute stages, and retries due immediately
+    monkeypatch.setattr(ingest, 'inventory', lambda: [])
+    monkeypatch.setattr(ingest, 'precompute', lambda session, session_type, log: None)
+    monkeypatch.setattr(ingest, 'RETRY_S', 0.0)
+    yield
+    for key in (KEY_Q, KEY_R):
+        session_cache.pop(key)
+
+
+def scheduler(load):
+    return ingest.IngestScheduler(now=lambda: NOW, schedule=schedule, load=load, log=lambda message: None)
+
+
+def test_due_sessions_within_delay_and_lookback():
+    due = ingest.due_sessions(schedule(), NOW, session_codes=['Q', 'R'])
+    # Last week's event is outside the lookback, practice is not requested
+    assert [session['key'] for session in due] == [KEY_Q, KEY_R]
+
+    # The race started 30 minutes ago: its data is not due yet
+    early = ingest.due_sessions(schedule(), datetime(2024, 12, 8, 13, 30), session_codes=['Q', 'R'])
+    assert [session['key'] for session in early] == [KEY_Q]
+
+
+def test_ingests_due_sessions_once():
+    loaded = []
+
+    def load(*key):
+        loaded.append(key)
+        session = stub_session()
+        session_cache.put(key, session)
+        return session
+
+    ingester = scheduler(load)
+    assert ingester.run_once() == 2
+    assert ingester.ingested == {KEY_Q, KEY_R}
+    # Hot sessions are not loaded again
+    assert ingester.run_once() == 0
+    assert loaded == [KEY_Q, KEY_R]
+
+
+def test_retries_unpublished_session_then_ingests():
+    attempts = []
+
+    def load(*key):
+        attempts.append(key)
+        if key == KEY_R and attempts.count(KEY_R) < 3:
+            session_cache.put(key, stub_session(laps=0))
+            return stub_session(laps=0)
+        session_cache.put(key, stub_session())
+        return session_cache.get(key)
+
+    ingester = scheduler(load)
+    ingester.run_once()
+    assert ingester.attempts == {KEY_R: 1}
+    # A session without laps never stays where users would get it
+    assert KEY_R not in session_cache
+
+    ingester.run_once()
+    ingester.run_once()
+    assert attempts.count(KEY_R) == 3
+    assert KEY_R in ingester.ingested
+    assert ingester.attempts == {} and ingester.retry_at == {}
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(ingest, 'MAX_ATTEMPTS', 3)
+    calls = []
+
+    def load(*key):
+        calls.append(key)
+        raise ValueError('no data')
+
+    ingester = scheduler(load)
+    for _ in range(5):
+        ingester.run_once()
+    assert calls.count(KEY_Q) == 3 and calls.count(KEY_R) == 3
+    assert ingester.pending() == []
+
+
+def test_backoff_is_exponential_and_capped(monkeypatch):
+    monkeypatch.setattr(ingest, 'RETRY_S', 10.0)
+    monkeypatch.setattr(ingest, 'MAX_BACKOFF_S', 60.0)
+    monkeypatch.setattr(ingest.random, 'uniform', lambda low, high: 1.0)
+    assert [ingest.backoff(attempt) for attempt in range(1, 6)] == [10.0, 20.0, 40.0, 60.0, 60.0]
+
+
+def test_backoff_delays_the_retry(monkeypatch):
+    monkeypatch.setattr(ingest, 'RETRY_S', 3600.0)
+    calls = []
+
+    def load(*key):
+        calls.append(key)
+        raise ValueError('no data')
+
+    ingester = scheduler(load)
+    ingester.run_once()
+    ingester.run_once()
+    # Still inside the first backoff: no second attempt
+    assert calls == [KEY_Q, KEY_R]
+    assert 0 < ingester.next_wake() <= ingest.POLL_S
+
+
+def test_only_one_process_holds_the_ingest_lock(tmp_path):
+    path = str(tmp_path / '.ingest.lock')
+    holder = ingest.acquire_lock(path)
+    assert holder is not None
+    # A second open file description stands in for another worker
+    assert ingest.acquire_lock(path) is None
+    holder.close()
+    standby = ingest.acquire_lock(path)
+    assert standby is not None
+    standby.close()
+
+
+def test_standby_scheduler_does_not_ingest_until_it_gets_the_lock(tmp_path, monkeypatch):
+    path = str(tmp_path / '.ingest.lock')
+    holder = ingest.acquire_lock(path)
+    ingester = scheduler(load=lambda *key: pytest.fail('standby ingested'))
+    waits = []
+
+    def wait(timeout):
+        # The holder exits while the standby waits for its next check
+        waits.append(timeout)
+        holder.close()
+        return False
+
+    monkeypatch.setattr(ingester.stop, 'wait', wait)
+    monkeypatch.setattr(ingester, 'run', lambda: waits.append('run'))
+    ingest.run_exclusive(ingester, path)
+    assert waits == [ingest.POLL_S, 'run']
+    assert ingester.lock is not None
+    ingester.lock.close()
@@ -0,0 +1,45 @@
+"""
+Offline tests for overtake detection on compacted position data
+
+    python -m pytest -q test_overtakes.py
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compaction import compact_session
+from overtakes import on_track
+
+
+def compacted_pos(status):
+    """Position frames of two cars run through the session compaction."""
+    n = len(status)
+    frame = lambda: pd.DataFrame({  # noqa: E731
+        'SessionTime': pd.to_timedelta(np.arange(n) * 0.25, unit='s'),
+        'X': np.linspace(0, 100, n), 'Y': np.zeros(n), 'Z': np.zeros(n),
+    })
+    session = SimpleNamespace(_pos_data={'1': frame().assign(Status='OnTrack'), '2': frame().assign(Status=status)})
+    compact_session(session)
+    return session._pos_data
+
+
+def test_compaction_keeps_status():
+    pos = compacted_pos(['OnTrack'] * 4)
+    assert 'Status' in pos['2'].columns and 'Z' not in pos['2'].columns
+
+
+def test_off_track_samples_are_dropped_after_compaction():
+    pos = compacted_pos(['OnTrack', 'OnTrack', 'OffTrack', 'OffTrack', 'OnTrack'])
+    assert len(on_track(pos['1'])) == 5
+    # The car parked off track keeps only its on-track samples
+    kept = on_track(pos['2'])
+    assert kept['X'].tolist() == pytest.approx([0.0, 25.0, 100.0])
+
+
+def test_position_data_without_status_is_rejected():
+    pos = compacted_pos(['OnTrack'] * 4)['1'].drop(columns='Status')
+    with pytest.raises(ValueError):
+        on_track(pos)
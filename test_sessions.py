@@ -0,0 +1,130 @@
+"""
+Offline tests for the session loader: background prefetch, session key
+validation against a stubbed schedule, and pruning of the per-key state
+
+    python -m pytest -q test_sessions.py
+"""
+
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from fastf1.events import EventSchedule
+
+import sessions
+
+KEY = (2024, 'Abu Dhabi Grand Prix', 'R')
+
+
+class Event(dict):
+    """Stands in for a FastF1 event: a row with a year attribute."""
+    year = 2024
+
+
+class DoneExecutor:
+    """Executor whose futures have already finished when submit returns."""
+
+    def __init__(self, error=None):
+        self.error = error
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.error:
+            future.set_exception(self.error)
+        else:
+            future.set_result(None)
+        return future
+
+
+def prefetch_within(keys, timeout=5.0):
+    """Run prefetch in a thread; None if it did not return (deadlock)."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(futures=sessions.prefetch(keys)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return None if thread.is_alive() else result['futures']
+
+
+def test_prefetch_of_an_already_finished_load_does_not_deadlock(monkeypatch):
+    monkeypatch.setattr(sessions, '_executor', DoneExecutor())
+    futures = prefetch_within([KEY])
+    assert futures is not None, 'prefetch deadlocked'
+    assert futures[KEY].done()
+    # The inline done-callback cleaned up, and the lock is free again
+    assert KEY not in sessions._inflight
+    assert sessions._guard.acquire(timeout=1)
+    sessions._guard.release()
+
+
+def test_failure_of_an_already_finished_load_is_recorded(monkeypatch):
+    monkeypatch.setattr(sessions, '_executor', DoneExecutor(ValueError('no data')))
+    assert prefetch_within([KEY]) is not None
+    assert sessions.load_status([KEY])[2] == {KEY: 'no data'}
+    sessions._failures.pop(KEY, None)
+
+
+def schedule(year):
+    return EventSchedule(pd.DataFrame([
+        {'RoundNumber': 23, 'Country': 'Qatar', 'Location': 'Lusail', 'EventName': 'Qatar Grand Prix',
+         'Session1': 'Practice 1', 'Session2': 'Sprint Qualifying', 'Session3': 'Sprint',
+         'Session4': 'Qualifying', 'Session5': 'Race'},
+        {'RoundNumber': 24, 'Country': 'United Arab Emirates', 'Location': 'Yas Island', 'EventName': 'Abu Dhabi Grand Prix',
+         'Session1': 'Practice 1', 'Session2': 'Practice 2', 'Session3': 'Practice 3',
+         'Session4': 'Qualifying', 'Session5': 'Race'},
+    ]), year=year)
+
+
+@pytest.fixture
+def stub_schedule(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sessions, 'get_event_schedule', lambda year: calls.append(year) or schedule(year))
+    sessions.schedule_cache.clear()
+    yield calls
+    sessions.schedule_cache.clear()
+
+
+def test_session_keys_resolve_to_the_scheduled_event(stub_schedule):
+    assert sessions.resolve_session_key('2024', 'Abu Dhabi', 'R') == KEY
+    assert sessions.resolve_session_key(2024, 'Yas Island', 'Q') == (2024, 'Abu Dhabi Grand Prix', 'Q')
+    # One schedule lookup per season
+    assert stub_schedule == [2024]
+
+
+@pytest.mark.parametrize('year, race, session_type', [
+    (2024, 'Abu Dhabi', 'S'),      # no sprint at this event
+    (2024, 'Abu Dhabi', 'XYZ'),
+    (1950, 'Abu Dhabi', 'R'),      # before FastF1 timing data
+    (2999, 'Abu Dhabi', 'R'),
+])
+def test_unscheduled_sessions_are_rejected(stub_schedule, year, race, session_type):
+    with pytest.raises(ValueError):
+        sessions.resolve_session_key(year, race, session_type)
+
+
+def test_key_locks_are_dropped_after_use():
+    calls = []
+
+    @sessions.per_session_cache('test_key_locks')
+    def lap_count(session, driver):
+        # The lock of this key exists only while it is held
+        calls.append(len(sessions._key_locks))
+        return 1
+
+    session = SimpleNamespace(event=Event(EventName='Abu Dhabi Grand Prix'), name='Race')
+    for driver in ('1', '4', '16'):
+        lap_count(session, driver)
+    assert calls == [1, 1, 1]
+    assert sessions._key_locks == {}
+
+
+def test_failures_are_capped(monkeypatch):
+    monkeypatch.setattr(sessions, 'MAX_FAILURES', 3)
+    monkeypatch.setattr(sessions, '_failures', {})
+    for round_number in range(5):
+        future = Future()
+        future.set_exception(ValueError(f'round {round_number}'))
+        sessions._on_done((2024, round_number, 'R'), future)
+    # The newest failures are kept
+    assert list(sessions._failures) == [(2024, 2, 'R'), (2024, 3, 'R'), (2024, 4, 'R')]
@@ -0,0 +1,76 @@
+"""
+Weather analytics for the F1 Telemetry Dashboard
+The nearest weather sample is attached to every lap of the whole field in
+one merge_asof pass; the joined table is cached per session
+"""
+
+import numpy as np
+import pandas as pd
+
+from sessions import per_session_cache
+
+WEATHER_COLUMNS = ['AirTemp', 'TrackTemp', 'Humidity', 'Rainfall', 'WindSpeed']
+
+
+def build_lap_weather(laps, weather):
+    """Every lap with the weather sample nearest to its start.
+
+    Returns a DataFrame with DriverNumber, LapNumber, LapTime and LapStart
+    (s) plus WEATHER_COLUMNS, in DriverNumber/LapNumber order.
+    """
+    columns = [column for column in WEATHER_COLUMNS if column in weather.columns]
+    table = pd.DataFrame({
+        'DriverNumber': laps['DriverNumber'].astype(str).to_numpy(),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=np.float64),
+        'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+        'LapStart': laps['LapStartTime'].dt.total_seconds().to_numpy(),
+    })
+    table = table[table['LapStart'].notna() & table['LapNumber'].notna()].sort_values('LapStart')
+    samples = pd.DataFrame({'LapStart': weather['Time'].dt.total_seconds().to_numpy()})
+    for column in columns:
+        samples[column] = weather[column].to_numpy()
+    table = pd.merge_asof(table, samples.sort_values('LapStart'), on='LapStart', direction='nearest')
+    if 'Rainfall' in table.columns:
+        table['Rainfall'] = table['Rainfall'].fillna(False).astype(bool)
+    return table.sort_values(['DriverNumber', 'LapNumber'], ignore_index=True)
+
+
+def conditions_by_lap(lap_weather):
+    """Per lap number over the field: TrackTemp min/mean/max, mean AirTemp and whether it rained."""
+    grouped = lap_weather.groupby('LapNumber')
+    conditions = grouped['TrackTemp'].agg(TrackTempMin='min', TrackTemp='mean', TrackTempMax='max')
+    conditions['AirTemp'] = grouped['AirTemp'].mean()
+    conditions['Rainfall'] = grouped['Rainfall'].any() if 'Rainfall' in lap_weather.columns else False
+    return conditions.reset_index()
+
+
+def rain_spans(positions, rainfall):
+    """(first, last) position value of every run of consecutive rainy samples, e.g. lap numbers."""
+    rainfall = np.asarray(rainfall, dtype=bool)
+    edges = np.diff(np.concatenate([[False], rainfall, [False]]).astype(np.int8))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    positions = np.asarray(positions)
+    return [(float(positions[a]), float(positions[b])) for a, b in zip(starts, stops)]
+
+
+def rain_periods(weather):
+    """(start, end) session minutes of every rainy stretch of the weather samples."""
+    if 'Rainfall' not in weather.columns:
+        return []
+    minutes = weather['Time'].dt.total_seconds().to_numpy() / 60.0
+    return rain_spans(minutes, weather['Rainfall'].fillna(False).to_numpy())
+
+
+@per_session_cache('lap_weather')
+def get_lap_weather(session):
+    weather = session.weather_data
+    if weather is None or weather.empty:
+        return None
+    lap_weather = build_lap_weather(session.laps, weather)
+    conditions = conditions_by_lap(lap_weather)
+    return {
+        'laps': lap_weather,
+        'by_lap': conditions,
+        'rain_laps': rain_spans(conditions['LapNumber'], conditions['Rainfall']),
+        'rain_periods': rain_periods(weather),
+    }